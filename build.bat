@@ -16,6 +16,8 @@ goto :eof
 :: function to run from choice A
 :test
 echo You have selected A: Build and publish to TestPyPi (Test)
+echo Now compiling the job table...
+python -m lazuli.jobs
 echo Now building the distribution archives...
 python -m build
 echo Now uploading the distribution archives...
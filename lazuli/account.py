@@ -6,9 +6,14 @@ in the LICENSE file.
 Refer to `database.py` or the project wiki on GitHub for usage examples.
 """
 
+import logging
+import threading
 from typing import Any
+import lazuli.tracing as tracing
 import lazuli.utility as utils
 
+_logger = logging.getLogger(__name__)
+
 
 class Account:
 	"""`Account` object; models AzureMS accounts.
@@ -36,6 +41,8 @@ class Account:
 
 		self._account_info = account_info
 		self._database_config = database_config
+		# Guards setters/adders when the instance is shared between threads
+		self._lock = threading.RLock()
 
 		self._account_id: int = 0  # Primary Key - Do NOT set
 		self._username: str = ""  # varchar(64)
@@ -90,6 +97,7 @@ class Account:
 		return self._username
 
 	@username.setter
+	@utils.synchronized
 	def username(self, new_name: str) -> None:
 		# Check for length:
 		if len(str(new_name)) > 64:
@@ -122,6 +130,7 @@ class Account:
 		return self._logged_in
 
 	@logged_in.setter
+	@utils.synchronized
 	def logged_in(self, value: int) -> None:
 		if value > 127:  # DB only accepts 1-byte int
 			raise ValueError(
@@ -144,6 +153,7 @@ class Account:
 		return self._banned
 
 	@banned.setter
+	@utils.synchronized
 	def banned(self, value: int) -> None:
 		if value > 127:  # DB only accepts 1-byte int
 			raise ValueError(
@@ -164,6 +174,7 @@ class Account:
 		return self._ban_reason
 
 	@ban_reason.setter
+	@utils.synchronized
 	def ban_reason(self, value: str) -> None:
 		self.set_stat_by_column("banreason", value)  # type `text`; 65k chars
 		self._ban_reason = value
@@ -180,6 +191,7 @@ class Account:
 		return self._nx
 
 	@nx.setter
+	@utils.synchronized
 	def nx(self, value: int) -> None:
 		if value > 2147483647:
 			raise ValueError("Invalid input! Please keep NX within 2.1b!")
@@ -187,6 +199,8 @@ class Account:
 			self.set_stat_by_column("nxCash", value)
 			self._nx = value
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_nx(self, amount: int) -> None:
 		"""Adds the specified amount to the current NX pool
 
@@ -211,6 +225,7 @@ class Account:
 		return self._maple_points
 
 	@maple_points.setter
+	@utils.synchronized
 	def maple_points(self, value: int) -> None:
 		if value > 2147483647:
 			raise ValueError(
@@ -220,6 +235,8 @@ class Account:
 			self.set_stat_by_column("mPoints", value)
 			self._maple_points = value
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_maple_points(self, amount: int) -> None:
 		"""Adds the specified amount to the current Maple Points pool
 
@@ -244,6 +261,7 @@ class Account:
 		return self._vp
 
 	@vp.setter
+	@utils.synchronized
 	def vp(self, value: int) -> None:
 		if value > 2147483647:
 			raise ValueError(
@@ -253,6 +271,8 @@ class Account:
 			self.set_stat_by_column("vpoints", value)
 			self._vp = value
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_vp(self, amount: int) -> None:
 		"""Adds the specified amount to the current VP count
 
@@ -277,6 +297,7 @@ class Account:
 		return self._dp
 
 	@dp.setter
+	@utils.synchronized
 	def dp(self, value: int) -> None:
 		if value > 2147483647:
 			raise ValueError("Invalid input! Please keep DPs within 2.1b!")
@@ -284,6 +305,8 @@ class Account:
 			self.set_stat_by_column("realcash", value)
 			self._dp = value
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_dp(self, amount: int) -> None:
 		"""Adds the specified amount to the current DP count
 
@@ -307,6 +330,7 @@ class Account:
 		return self._char_slots
 
 	@char_slots.setter
+	@utils.synchronized
 	def char_slots(self, value: int) -> None:
 		if value > 52:
 			raise ValueError(
@@ -316,6 +340,8 @@ class Account:
 			self.set_stat_by_column("chrslot", value)
 			self._char_slots = value
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_char_slots(self, amount: int) -> None:
 		"""Adds the specified amount to the current character slot count
 
@@ -436,6 +462,14 @@ class Account:
 		"""
 		return utils.get_stat_by_column(self._account_info, column)
 
+	def _refresh_column(self, column: str, value: Any) -> None:
+		# Applies a value read from the database to the instance (in memory);
+		# used by `utility.retry_on_conflict`
+		self._account_info[column] = value
+		self.init_account_stats()
+
+	@tracing.traced
+	@utils.synchronized
 	def set_stat_by_column(self, column: str, value: Any) -> bool:
 		"""Sets an account's attributes by column name in database
 
@@ -448,6 +482,10 @@ class Account:
 		**NOT** recommended to use this method on its own, as it will not update
 		the account instance variables (in memory) post-change.
 
+		With compare-and-set enabled (see the `compare_and_set` argument of
+		`Lazuli`), the update only applies if the column still holds the
+		value last read by this object; see `utility.compare_and_set`.
+
 		Args:
 
 			value (`int` or `str`): Represents the value to be set in the database
@@ -457,17 +495,24 @@ class Account:
 			A `bool` representing whether the operation was successful.
 
 		Raises:
+			ConcurrentUpdateError: The column was changed since it was last read (compare-and-set only)
 			A generic error, handled in `utility.write_to_db`
 		"""
-		status = utils.write_to_db(
-			self._database_config,
-			f"UPDATE `accounts` SET {column} = '{value}' "
-			f"WHERE `id` = '{self.account_id}'"
-		)
+		if self._database_config.get('compare_and_set'):
+			status = utils.compare_and_set(
+				self._database_config, "accounts", column,
+				self.account_id, self._account_info.get(column), value,
+			)
+		else:
+			status = utils.write_to_db(
+				self._database_config,
+				f"UPDATE `accounts` SET {column} = '{value}' "
+				f"WHERE `id` = '{self.account_id}'"
+			)
 		if status:
-			print(
-				f"Successfully updated {column} value "
-				f"for user id: {self.account_id}.")
+			_logger.debug(
+				"Successfully updated %s value for user id: %s.", column, self.account_id
+			)
 			# Update the stats in the dictionary:
 			self._account_info[column] = value
 		return status
@@ -0,0 +1,84 @@
+"""This module holds the avatar URL builder and cache for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+Avatars are generated by `MapleStory.io`, from the character's skin, face,
+hair, and equipped items. `Character::get_char_img()` and
+`Lazuli::get_avatar_urls()` build their URLs with `build_avatar_url()`; the
+latter also keeps the URLs in an `AvatarCache`, keyed by a hash of the
+outfit, so characters whose outfit did not change reuse their URL.
+
+	Typical usage example:
+
+	urls = lazuli.get_avatar_urls(online_names)  # {"KOOKIIE": "https://...", ...}
+"""
+import threading
+from typing import Iterable, Optional
+
+AVATAR_URL = "https://maplestory.io/api/GMS/216/Character/200{skin}/{items}/stand1/1"
+# Number of outfits kept by an `AvatarCache`, by default
+DEFAULT_CACHE_SIZE = 4096
+
+Outfit = tuple[int, int, int, tuple[int, ...]]  # (skin, face, hair, equipped item IDs)
+
+
+def build_avatar_url(skin: int, face: int, hair: int, item_ids: Iterable[int]) -> str:
+	"""Builds a `MapleStory.io` avatar URL; PLEASE FETCH IT SPARINGLY!
+
+	Args:
+
+		skin (`int`): Represents the skin colour (`characters.skincolor`)
+		face (`int`): Represents the face ID
+		hair (`int`): Represents the hair ID
+		item_ids (`Iterable[int]`): Represents the IDs of the equipped items (inventory type `-1`)
+
+	Returns:
+		A string, a link to the generated avatar
+	"""
+	items = ",".join(str(item_id) for item_id in (face, hair, *item_ids))
+	return AVATAR_URL.format(skin=skin, items=items)
+
+
+class AvatarCache:
+	"""`AvatarCache` object; thread-safe LRU cache of avatar URLs, keyed by outfit
+
+	The key is the hash of the outfit (skin, face, hair, and equipped
+	items), checked against the full outfit on a hit, so that two outfits
+	with the same hash never share a URL.
+	"""
+
+	def __init__(self, max_size: int=DEFAULT_CACHE_SIZE) -> None:
+		if max_size < 1:
+			raise ValueError("The cache must hold at least one outfit!")
+		self._max_size = max_size
+		self._urls: dict[int, tuple[Outfit, str]] = {}  # In LRU order; least recent first
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self) -> int:
+		return len(self._urls)
+
+	def get_url(self, outfit: Outfit) -> str:
+		"""Fetches the URL of an outfit, building (and caching) it on a miss"""
+		key = hash(outfit)
+		with self._lock:
+			cached: Optional[tuple[Outfit, str]] = self._urls.pop(key, None)
+			if cached is not None and cached[0] == outfit:
+				self._urls[key] = cached  # Now the most recent
+				self.hits += 1
+				return cached[1]
+			self.misses += 1
+			url = build_avatar_url(*outfit)
+			self._urls[key] = (outfit, url)
+			if len(self._urls) > self._max_size:
+				del self._urls[next(iter(self._urls))]
+			return url
+
+	def clear(self) -> None:
+		"""Empties the cache"""
+		with self._lock:
+			self._urls.clear()
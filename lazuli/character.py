@@ -6,12 +6,18 @@ in the LICENSE file.
 Refer to `database.py` or the project wiki on GitHub for usage examples.
 """
 
-from typing import Any
+import logging
+import threading
+from typing import Any, Optional
 from lazuli.account import Account
+from lazuli.avatar import build_avatar_url
 from lazuli.inventory import Inventory
-from lazuli.jobs import JOBS
+import lazuli.jobs as jobs
+import lazuli.tracing as tracing
 import lazuli.utility as utils
 
+_logger = logging.getLogger(__name__)
+
 
 class Character:
 	"""`Character` object; models AzureMS characters.
@@ -26,6 +32,7 @@ class Character:
 		self,
 		char_stats: dict[str, Any],
 		database_config: dict[str, str],
+		account_info: Optional[dict[str, Any]]=None,
 	) -> None:
 		"""Emulates how the `Character` object is handled by a game server
 
@@ -39,9 +46,12 @@ class Character:
 
 			char_stats (`dict`): Represents character stats, formatted in AzureMS style
 			database_config (`dict`): Represents the protected attributes from a `Lazuli` object
+			account_info (`dict`): Optional; Represents the attributes of the character's account, if already fetched (e.g. in bulk). Fetched from the database otherwise
 		"""
 		self._stats = char_stats
 		self._database_config = database_config
+		# Guards setters/adders when the instance is shared between threads
+		self._lock = threading.RLock()
 
 		self._character_id: int = 0
 		self._account_id: int = 0
@@ -79,7 +89,10 @@ class Character:
 
 		# Create Account object instance via class constructor,
 		# using details from Character object instance
-		self._account = self.init_account()
+		if account_info is not None:
+			self._account = Account(account_info, self._database_config)
+		else:
+			self._account = self.init_account()
 
 	# fill with attributes from init
 	def init_stats(self) -> None:
@@ -122,6 +135,7 @@ class Character:
 		self._honour = self._stats.get("innerExp", 0)  # Best guess - might be wrong!
 		self._mute = self._stats.get("chatban", "false")
 
+	@tracing.traced
 	def init_account(self) -> Account:
 		"""Instantiate an `Account` object corresponding to the character
 
@@ -189,6 +203,7 @@ class Character:
 		return self._level
 
 	@level.setter
+	@utils.synchronized
 	def level(self, x: int) -> None:
 		if x > 275:
 			raise ValueError("Level should not exceed 275!")
@@ -198,6 +213,8 @@ class Character:
 			self.set_stat_by_column("level", x)
 			self._level = x
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_level(self, amount: int) -> None:
 		"""Adds the specified amount to the current level count
 
@@ -215,15 +232,16 @@ class Character:
 		"""`int`: Represents the Job ID of the character
 
 		Note that the setter does not allow arbitrary Job IDs not documented
-		in SpiritSuite.
+		in SpiritSuite (see `jobs.JOBS_BY_ID`).
 
 		### CAN ONLY BE SET WHEN SERVER IS OFF!
 		"""
 		return self._job
 
 	@job.setter
+	@utils.synchronized
 	def job(self, job_id: int) -> None:
-		if str(job_id) not in JOBS:
+		if int(job_id) not in jobs.JOBS_BY_ID:
 			raise ValueError("Invalid Job ID!")
 		else:
 			self.set_stat_by_column("job", job_id)
@@ -235,7 +253,7 @@ class Character:
 		Returns:
 			A string representing the job name corresponding to a job ID
 		"""
-		return JOBS[str(self.job)]
+		return jobs.JOBS_BY_ID[int(self.job)]
 
 	@property
 	def name(self) -> str:
@@ -254,6 +272,7 @@ class Character:
 		return self._name
 
 	@name.setter
+	@utils.synchronized
 	def name(self, new_name: str) -> None:
 		# Check length against max length in Azure DB
 		length = len(str(new_name))
@@ -285,6 +304,7 @@ class Character:
 		return self._meso
 
 	@meso.setter
+	@utils.synchronized
 	def meso(self, amount: int) -> None:
 		if amount > 10000000000:
 			raise ValueError("You should not try to set meso to more than 10b!")
@@ -294,6 +314,8 @@ class Character:
 			self.set_stat_by_column("meso", amount)
 			self._meso = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_mesos(self, amount: int) -> None:
 		"""Adds the specified amount to the current meso count
 
@@ -318,6 +340,7 @@ class Character:
 		return self._fame
 
 	@fame.setter
+	@utils.synchronized
 	def fame(self, amount: int) -> None:
 		if amount > 32767:
 			raise ValueError("You should not try to set fame to more than 32k!")
@@ -327,6 +350,8 @@ class Character:
 			self.set_stat_by_column("fame", amount)
 			self._fame = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_fame(self, amount: int) -> None:
 		"""Adds the specified amount to the current fame count
 
@@ -350,6 +375,7 @@ class Character:
 		return self._map
 
 	@map.setter
+	@utils.synchronized
 	def map(self, map_id: int) -> None:
 		# Best guess for map ID limits - might be wrong!
 		if map_id < 100000000 or map_id > 999999999:
@@ -369,6 +395,7 @@ class Character:
 		return self._face
 
 	@face.setter
+	@utils.synchronized
 	def face(self, face_id: int) -> None:
 		# Best guess for face ID limits - might be wrong!
 		if face_id < 20000 or face_id > 29999:
@@ -388,6 +415,7 @@ class Character:
 		return self._hair
 
 	@hair.setter
+	@utils.synchronized
 	def hair(self, hair_id: int) -> None:
 		# Best guess for hair ID limits - might be wrong!
 		if hair_id < 30000 or hair_id > 49999:
@@ -407,6 +435,7 @@ class Character:
 		return self._skin
 
 	@skin.setter
+	@utils.synchronized
 	def skin(self, skin_id: int) -> None:
 		# Best guess for skin ID limits - might be wrong!
 		if skin_id < 0 or skin_id > 16:
@@ -426,6 +455,7 @@ class Character:
 		return self._gender
 
 	@gender.setter
+	@utils.synchronized
 	def gender(self, gender_id: int) -> None:
 		# Best guess for gender ID limits - might be wrong!
 		if gender_id < -1 or gender_id > 1:
@@ -449,6 +479,7 @@ class Character:
 		return self._exp
 
 	@exp.setter
+	@utils.synchronized
 	def exp(self, exp_amount: int) -> None:
 		if exp_amount > 9223372036854775807:  # Azure DB uses Bigint for EXP
 			raise ValueError(
@@ -462,6 +493,8 @@ class Character:
 			self.set_stat_by_column("exp", exp_amount)
 			self._exp = exp_amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_exp(self, amount: int) -> None:
 		"""Add the specified amount to the current existing EXP pool
 
@@ -486,6 +519,7 @@ class Character:
 		return self._strength
 
 	@strength.setter
+	@utils.synchronized
 	def strength(self, amount: int) -> None:
 		# Azure DB uses Int (max 2.1b) for stats, but it may cause problems
 		# with the client if one exceeds signed shorts (max 32k)
@@ -497,6 +531,8 @@ class Character:
 			self.set_stat_by_column("str", amount)
 			self._strength = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_str(self, amount: int) -> None:
 		"""Add the specified amount to the current existing STR pool
 
@@ -521,6 +557,7 @@ class Character:
 		return self._dex
 
 	@dex.setter
+	@utils.synchronized
 	def dex(self, amount: int) -> None:
 		if amount > 32767:
 			raise ValueError("You should not try to set DEX above 30k!")
@@ -530,6 +567,8 @@ class Character:
 			self.set_stat_by_column("dex", amount)
 			self._dex = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_dex(self, amount: int) -> None:
 		"""Add the specified amount to the current existing DEX pool
 
@@ -554,6 +593,7 @@ class Character:
 		return self._inte
 
 	@inte.setter
+	@utils.synchronized
 	def inte(self, amount: int) -> None:
 		if amount > 32767:
 			raise ValueError("You should not try to set INT above 30k!")
@@ -563,6 +603,8 @@ class Character:
 			self.set_stat_by_column("int", amount)
 			self._inte = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_inte(self, amount: int) -> None:
 		"""Add the specified amount to the current existing INT pool
 
@@ -587,6 +629,7 @@ class Character:
 		return self._luk
 
 	@luk.setter
+	@utils.synchronized
 	def luk(self, amount: int) -> None:
 		if amount > 32767:
 			raise ValueError("You should not try to set LUK above 30k!")
@@ -596,6 +639,8 @@ class Character:
 			self.set_stat_by_column("luk", amount)
 			self._luk = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_luk(self, amount: int) -> None:
 		"""Add the specified amount to the current existing LUK pool
 
@@ -634,6 +679,7 @@ class Character:
 		return self._max_hp
 
 	@max_hp.setter
+	@utils.synchronized
 	def max_hp(self, amount: int) -> None:
 		# Client-sided cap of 500k
 		if amount > 500000:
@@ -644,6 +690,8 @@ class Character:
 			self.set_stat_by_column("maxhp", amount)
 			self._max_hp = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_max_hp(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Max HP pool
 
@@ -668,6 +716,7 @@ class Character:
 		return self._max_mp
 
 	@max_mp.setter
+	@utils.synchronized
 	def max_mp(self, amount: int) -> None:
 		# Client-sided cap of 500k
 		if amount > 500000:
@@ -678,6 +727,8 @@ class Character:
 			self.set_stat_by_column("maxmp", amount)
 			self._max_mp = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_max_mp(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Max MP pool
 
@@ -703,6 +754,7 @@ class Character:
 		return self._ap
 
 	@ap.setter
+	@utils.synchronized
 	def ap(self, amount: int) -> None:
 		# Azure DB uses Int (max 2.1b) for stats, but it may cause problems
 		# with the client if one exceeds signed shorts (max 32k)
@@ -714,6 +766,8 @@ class Character:
 			self.set_stat_by_column("ap", amount)
 			self._ap = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_ap(self, amount: int) -> None:
 		"""Add the specified amount to the current existing free AP pool
 
@@ -737,6 +791,7 @@ class Character:
 		return self._bl_slots
 
 	@bl_slots.setter
+	@utils.synchronized
 	def bl_slots(self, amount: int) -> None:
 		# Client-sided cap of 100
 		if amount > 100:
@@ -747,6 +802,8 @@ class Character:
 			self.set_stat_by_column("buddyCapacity", amount)
 			self._bl_slots = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_bl_slots(self, amount: int) -> None:
 		"""Add the specified amount to the current existing BL slots cap
 
@@ -771,6 +828,7 @@ class Character:
 		return self._rebirths
 
 	@rebirths.setter
+	@utils.synchronized
 	def rebirths(self, amount: int) -> None:
 		if amount > 2147483647:
 			raise ValueError("You should not try to set rebirths above 2.1b!")
@@ -780,6 +838,8 @@ class Character:
 			self.set_stat_by_column("reborns", amount)
 			self._rebirths = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_rebirths(self, amount: int) -> None:
 		"""Add the specified amount to the current existing rebirth count
 
@@ -806,6 +866,7 @@ class Character:
 		return self._ambition
 
 	@ambition.setter
+	@utils.synchronized
 	def ambition(self, amount: int) -> None:
 		# TODO: Add checks; DB allows 2.1b,
 		#  but not sure what the actual cap in source is
@@ -816,6 +877,8 @@ class Character:
 		self.set_stat_by_column("ambition", amount)
 		self._ambition = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_ambition(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Ambition pool
 
@@ -842,6 +905,7 @@ class Character:
 		return self._insight
 
 	@insight.setter
+	@utils.synchronized
 	def insight(self, amount: int) -> None:
 		# TODO: Add checks; DB allows 2.1b,
 		#  but not sure what the actual cap in source is
@@ -852,6 +916,8 @@ class Character:
 		self.set_stat_by_column("insight", amount)
 		self._insight = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_insight(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Insight pool
 
@@ -878,6 +944,7 @@ class Character:
 		return self._willpower
 
 	@willpower.setter
+	@utils.synchronized
 	def willpower(self, amount: int) -> None:
 		# TODO: Add checks; DB allows 2.1b,
 		#  but not sure what the actual cap in source is
@@ -888,6 +955,8 @@ class Character:
 		self.set_stat_by_column("willpower", amount)
 		self._willpower = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_willpower(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Willpower pool
 
@@ -914,6 +983,7 @@ class Character:
 		return self._diligence
 
 	@diligence.setter
+	@utils.synchronized
 	def diligence(self, amount: int) -> None:
 		# TODO: Add checks; DB allows 2.1b,
 		#  but not sure what the actual cap in source is
@@ -924,6 +994,8 @@ class Character:
 		self.set_stat_by_column("diligence", amount)
 		self._diligence = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_diligence(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Diligence pool
 
@@ -950,6 +1022,7 @@ class Character:
 		return self._empathy
 
 	@empathy.setter
+	@utils.synchronized
 	def empathy(self, amount: int) -> None:
 		# TODO: Add checks; DB allows 2.1b,
 		#  but not sure what the actual cap in source is
@@ -960,6 +1033,8 @@ class Character:
 		self.set_stat_by_column("empathy", amount)
 		self._empathy = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_empathy(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Empathy pool
 
@@ -986,6 +1061,7 @@ class Character:
 		return self._charm
 
 	@charm.setter
+	@utils.synchronized
 	def charm(self, amount: int) -> None:
 		# TODO: Add checks; DB allows 2.1b,
 		#  but not sure what the actual cap in source is
@@ -996,6 +1072,8 @@ class Character:
 		self.set_stat_by_column("charm", amount)
 		self._charm = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_charm(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Charm pool
 
@@ -1038,6 +1116,7 @@ class Character:
 		return self._honour
 
 	@honour.setter
+	@utils.synchronized
 	def honour(self, amount: int) -> None:
 		# TODO: Add checks; DB allows 2.1b,
 		#  but not sure what the actual cap in source is
@@ -1048,6 +1127,8 @@ class Character:
 		self.set_stat_by_column("innerExp", amount)
 		self._honour = amount
 
+	@utils.synchronized
+	@utils.retry_on_conflict
 	def add_honour(self, amount: int) -> None:
 		"""Add the specified amount to the current existing Honour pool
 
@@ -1071,6 +1152,7 @@ class Character:
 		return self._mute
 
 	@mute.setter
+	@utils.synchronized
 	def mute(self, status: str) -> None:
 		if status in ("false", "true"):
 			self.set_stat_by_column("chatban", status)
@@ -1133,6 +1215,7 @@ class Character:
 
 		return attributes
 
+	@tracing.traced
 	def get_inv(self) -> Inventory:
 		"""Create an `Inventory` instance from the Character ID attribute
 
@@ -1151,23 +1234,22 @@ class Character:
 		inventory = Inventory(self.character_id, self._database_config)
 		return inventory
 
+	@tracing.traced
 	def get_char_img(self) -> str:
 		"""Generates a character avatar using `MapleStory.io`; PLEASE USE SPARINGLY!
 
+		Loads the character's whole inventory; for many characters, use
+		`Lazuli::get_avatar_urls()` instead.
+
 		Returns:
 			A string, a link to the generated avatar
 		"""
-		equipped_items = [self.face, self.hair]
 		equipped_inv = self.get_inv().equipped_inv
+		item_ids = [equipped_inv[item]["itemid"] for item in equipped_inv]
+		return build_avatar_url(self.skin, self.face, self.hair, item_ids)
 
-		for item in equipped_inv:
-			item_id = equipped_inv[item]["itemid"]
-			equipped_items.append(item_id)
-
-		url = f"https://maplestory.io/api/GMS/216/Character/200{self.skin}/{str(equipped_items)[1:-1]}/stand1/1".replace(" ", "")
-
-		return url
-
+	@tracing.traced
+	@utils.synchronized
 	def set_stat_by_column(self, column: str, value: Any) -> None:
 		"""Update a character's stats from column name in database
 
@@ -1178,6 +1260,10 @@ class Character:
 		**NOT** recommended to use this alone, as it won't update the
 		character instance variables (in memory) post-change.
 
+		With compare-and-set enabled (see the `compare_and_set` argument of
+		`Lazuli`), the update only applies if the column still holds the
+		value last read by this object; see `utility.compare_and_set`.
+
 		### ONLY WORKS WHEN SERVER IS OFF!
 
 		Args:
@@ -1189,21 +1275,74 @@ class Character:
 			A `bool` representing whether the operation was successful
 
 		Raises:
+			ConcurrentUpdateError: The column was changed since it was last read (compare-and-set only)
 			Generic error, handled in `utility.write_to_db`
 		"""
-		status = utils.write_to_db(
-			self._database_config,
-			f"UPDATE `characters` SET {column} = '{value}' "
-			f"WHERE `name` = '{self.name}'"
-		)
+		if self._database_config.get('compare_and_set'):
+			status = utils.compare_and_set(
+				self._database_config, "characters", column,
+				self.character_id, self._stats.get(column), value,
+			)
+		else:
+			status = utils.write_to_db(
+				self._database_config,
+				f"UPDATE `characters` SET {column} = '{value}' "
+				f"WHERE `name` = '{self.name}'"
+			)
 		if status:
-			print(
-				f"Successfully updated {column} value "
-				f"for character: {self.name}."
+			_logger.debug(
+				"Successfully updated %s value for character: %s.", column, self.name
 			)
 			self._stats[column] = value  # Update the stats in the dictionary
 		return status
 
+	def _refresh_column(self, column: str, value: Any) -> None:
+		# Applies a value read from the database to the instance (in memory);
+		# used by `utility.retry_on_conflict`
+		self._stats[column] = value
+		self.init_stats()
+
+	@utils.synchronized
+	def _apply_stats(self, char_stats: dict[str, Any]) -> dict[str, tuple[Any, Any]]:
+		# Applies a row read from the database to the instance (in memory);
+		# returns the changed columns, as (old value, new value)
+		diff = {
+			column: (self._stats.get(column), value)
+			for column, value in char_stats.items()
+			if self._stats.get(column) != value
+		}
+		if diff:
+			self._stats.update((column, new) for column, (_, new) in diff.items())
+			self.init_stats()
+		return diff
+
+	@tracing.traced
+	def refresh(self) -> dict[str, tuple[Any, Any]]:
+		"""Fetches the character's current stats, and applies the changes to the instance
+
+		Only the `characters` row is fetched (one query); the account is
+		left as is. The row is read from the primary, even if reads are
+		otherwise routed to replicas, as a lagging replica would roll back
+		changes made through this instance.
+		Use `Lazuli::refresh_many()` for many characters at once.
+
+		Returns:
+			A `dict`, mapping each changed column to a `tuple` of its old and
+			new value, e.g. `{"level": (199, 200)}`. Empty if nothing changed,
+			or if the character no longer exists
+
+		Raises:
+			Generic error on failure, handled by `utility.get_db_all_hits()`
+		"""
+		rows = utils.get_db_all_hits(
+			self._database_config,
+			"SELECT * FROM `characters` WHERE `id` = %s", (self.character_id,),
+			primary=True,
+		)
+		if not rows:
+			return {}
+		return self._apply_stats(rows[0])
+
 	def get_stat_by_column(self, column: str) -> Any:
 		"""Fetches account attribute by column name
 
@@ -0,0 +1,329 @@
+"""This module holds the LazuliCluster class for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+	Typical usage example:
+
+	cluster = LazuliCluster({
+		"Scania": Lazuli(schema="kms_316"),
+		"Bera": {"host": "10.0.0.2", "schema": "kms_316"},  # Lazuli arguments
+	})
+	cluster.get_meso_ranking(10)  # [("KOOKIIE", 123456789, "Scania"), ...]
+	cluster.get_char_by_name("KOOKIIE")  # {"Scania": Character, ...}
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+import heapq
+import itertools
+import operator
+from typing import Any, Callable, Iterable, Optional, TypeVar, Union
+from lazuli.character import Character
+from lazuli.database import Lazuli
+import lazuli.jobs as jobs
+import lazuli.sketches as sketches
+
+T = TypeVar("T")
+
+
+class LazuliCluster:
+	"""`LazuliCluster` object; models several AzureMS worlds, each with its own DB.
+
+	Wraps one `Lazuli` object per world, and runs each lookup or ranking
+	against every world at once, on a thread pool. A global ranking costs
+	one parallel round of per-world top-K queries; since each world's
+	ranking is already sorted, the results are merged lazily with a heap,
+	and only the first K rows are kept. Every row is tagged with the name
+	of the world it came from.
+
+	A world whose query fails (see `utility.get_db_all_hits()`) contributes
+	no rows, rather than failing the whole round.
+	"""
+
+	def __init__(
+		self,
+		worlds: dict[str, Union[Lazuli, dict[str, Any]]],
+		max_workers: Optional[int]=None,
+	) -> None:
+		"""Creates a cluster from the given worlds
+
+		Args:
+
+			worlds (`dict`): Represents the worlds; maps the name of each world to a `Lazuli` object, or to a `dict` of arguments for one
+			max_workers (`int`): Optional; Maximum number of worlds queried at once. Defaults to the number of worlds
+
+		Raises:
+			ValueError: No worlds given
+		"""
+		if not worlds:
+			raise ValueError("At least one world is required!")
+		self._worlds: dict[str, Lazuli] = {
+			world: database if isinstance(database, Lazuli) else Lazuli(**database)
+			for world, database in worlds.items()
+		}
+		self._executor = ThreadPoolExecutor(
+			max_workers=max_workers or len(self._worlds),
+			thread_name_prefix="lazuli-cluster",
+		)
+
+	def __getitem__(self, world: str) -> Lazuli:
+		return self._worlds[world]
+
+	def __enter__(self) -> "LazuliCluster":
+		return self
+
+	def __exit__(self, *exc_info: Any) -> None:
+		self.close()
+
+	@property
+	def worlds(self) -> list[str]:
+		"""`list[str]`: Represents the names of the worlds, in the order given"""
+		return list(self._worlds)
+
+	def close(self) -> None:
+		"""Shuts down the thread pool; the cluster cannot be used afterwards"""
+		self._executor.shutdown(wait=True)
+
+	def map(self, function: Callable[[Lazuli], T]) -> dict[str, T]:
+		"""Runs a function against every world at once
+
+		Args:
+
+			function (`Callable`): Represents the function to run; called with the `Lazuli` object of each world
+
+		Returns:
+			A `dict`, mapping the name of each world to the function's result
+
+		Raises:
+			The exception raised by the function for the first world (in the
+			order given) that failed, once every world is done
+		"""
+		futures = {
+			world: self._executor.submit(function, database)
+			for world, database in self._worlds.items()
+		}
+		# Let every world finish before raising, so no query outlives the call
+		wait(futures.values())
+		return {world: future.result() for world, future in futures.items()}
+
+	def build_sketches(
+		self,
+		table: str,
+		quantiles: Iterable[str]=(),
+		distinct: Iterable[str]=(),
+		filters: Optional[dict[str, Any]]=None,
+	) -> dict[str, Any]:
+		"""Builds quantile and distinct-count sketches across all worlds
+
+		Runs `Lazuli::build_sketches()` in every world at once, and merges
+		the sketches of each column into one.
+
+		Args:
+
+			table (`str`): Represents the table, e.g. `characters`
+			quantiles (`Iterable[str]`): Optional; Represents the numeric columns to build a `KLLSketch` of
+			distinct (`Iterable[str]`): Optional; Represents the columns to build a `HyperLogLog` of
+			filters (`dict`): Optional; Only sketch matching rows (see `utility.build_where_clause()`)
+
+		Returns:
+			A `dict`, mapping each column to its merged sketch
+		"""
+		quantiles, distinct = list(quantiles), list(distinct)
+		results = self.map(
+			lambda database: database.build_sketches(table, quantiles, distinct, filters)
+		)
+		return sketches.merge_sketches(results.values())
+
+	def get_char_by_name(self, char_name: str) -> dict[str, Character]:
+		"""Fetches the character with the given name from every world
+
+		Uses `Lazuli::get_chars_by_names()` in each world.
+
+		Args:
+
+			char_name (`str`): Represents the character name (aka IGN)
+
+		Returns:
+			A `dict`, mapping the name of each world that has such a
+			character to its `Character` object
+		"""
+		results = self.map(lambda database: database.get_chars_by_names([char_name]))
+		return {
+			world: characters[char_name]
+			for world, characters in results.items()
+			if characters and char_name in characters
+		}
+
+	def get_online_count(self) -> int:
+		"""Fetches the number of players currently online, across all worlds
+
+		Returns:
+			An `int`, representing the number of players online
+		"""
+		results = self.map(lambda database: database.get_online_list())
+		return sum(len(players or []) for players in results.values())
+
+	def get_online_players(self) -> list[tuple[str, str]]:
+		"""Fetches usernames of all players currently online, across all worlds
+
+		Returns:
+			A `list` of `tuple`, representing usernames and their world
+		"""
+		results = self.map(lambda database: database.get_online_players())
+		return [
+			(username, world)
+			for world, usernames in results.items()
+			for username in usernames or []
+		]
+
+	def get_ranking(
+		self,
+		column: str,
+		number_of_players: int=5,
+		show_gm: bool=False,
+		job_ids: Optional[Iterable[int]]=None,
+	) -> list[tuple[str, Any, str]]:
+		"""Fetches the top ranking players across all worlds, in terms of the given column
+
+		Runs `Lazuli::get_ranking()` in every world at once, and merges the
+		results. Ties are ordered by world, in the order given.
+
+		Args:
+
+			column (`str`): Represents the column in the `characters` table to rank by, e.g. `level`
+			number_of_players (`int`): Optional; Number of players to show, e.g. Top 5 Ranking (default), Top 10 Ranking, etc.
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+			job_ids (`Iterable[int]`): Optional; Only rank characters with these Job IDs. Defaults to all jobs
+
+		Returns:
+			A `list` of `tuple`, representing player names, their
+			corresponding values, and their world
+
+		Raises:
+			ValueError: Invalid column name
+		"""
+		if job_ids is not None:
+			job_ids = sorted(job_ids)  # Shared by every world; must not be a one-shot iterator
+		results = self.map(
+			lambda database: database.get_ranking(column, number_of_players, show_gm, job_ids)
+		)
+		merged = heapq.merge(
+			*(
+				[(name, value, world) for name, value in ranking or []]
+				for world, ranking in results.items()
+			),
+			key=operator.itemgetter(1),
+			reverse=True,
+		)
+		return list(itertools.islice(merged, number_of_players))
+
+	def get_level_ranking(
+		self,
+		number_of_players: int=5,
+		show_gm: bool=False,
+	) -> list[tuple[str, int, str]]:
+		"""Fetches the top ranking players across all worlds, in terms of level
+
+		Uses `LazuliCluster::get_ranking`.
+
+		Args:
+
+			number_of_players (`int`): Optional; Number of players to show, e.g. Top 5 Ranking (default), Top 10 Ranking, etc.
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+
+		Returns:
+			A `list` of `tuple`, representing player names, their
+			corresponding level, and their world
+		"""
+		return self.get_ranking("level", number_of_players, show_gm)
+
+	def get_meso_ranking(
+		self,
+		number_of_players: int=5,
+		show_gm: bool=False,
+	) -> list[tuple[str, int, str]]:
+		"""Fetches the top ranking players across all worlds, in terms of mesos
+
+		Uses `LazuliCluster::get_ranking`.
+
+		Args:
+
+			number_of_players (`int`): Optional; Number of players to show, e.g. Top 5 Ranking (default), Top 10 Ranking, etc.
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+
+		Returns:
+			A `list` of `tuple`, representing player names, their
+			corresponding mesos, and their world
+		"""
+		return self.get_ranking("meso", number_of_players, show_gm)
+
+	def get_fame_ranking(
+		self,
+		number_of_players: int=5,
+		show_gm: bool=False,
+	) -> list[tuple[str, int, str]]:
+		"""Fetches the top ranking players across all worlds, in terms of fame
+
+		Uses `LazuliCluster::get_ranking`.
+
+		Args:
+
+			number_of_players (`int`): Optional; Number of players to show, e.g. Top 5 Ranking (default), Top 10 Ranking, etc.
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+
+		Returns:
+			A `list` of `tuple`, representing player names, their
+			corresponding fame, and their world
+		"""
+		return self.get_ranking("fame", number_of_players, show_gm)
+
+	def get_rebirth_ranking(
+		self,
+		number_of_players: int=5,
+		show_gm: bool=False,
+	) -> list[tuple[str, int, str]]:
+		"""Fetches the top ranking players across all worlds, in terms of rebirths
+
+		Uses `LazuliCluster::get_ranking`.
+
+		Args:
+
+			number_of_players (`int`): Optional; Number of players to show, e.g. Top 5 Ranking (default), Top 10 Ranking, etc.
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+
+		Returns:
+			A `list` of `tuple`, representing player names, their
+			corresponding rebirths, and their world
+		"""
+		return self.get_ranking("reborns", number_of_players, show_gm)
+
+	def get_ranking_by_branch(
+		self,
+		branch: str,
+		column: str="level",
+		number_of_players: int=5,
+		show_gm: bool=False,
+	) -> list[tuple[str, Any, str]]:
+		"""Fetches the top ranking players of a job branch across all worlds, e.g. `Hero`
+
+		Uses `LazuliCluster::get_ranking`; see `Lazuli::get_ranking_by_branch()`.
+
+		Args:
+
+			branch (`str`): Represents the job branch, named after its final advancement
+			column (`str`): Optional; Represents the column to rank by. Defaults to `level`
+			number_of_players (`int`): Optional; Number of players to show, e.g. Top 5 Ranking (default), Top 10 Ranking, etc.
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+
+		Returns:
+			A `list` of `tuple`, representing player names, their
+			corresponding values, and their world
+
+		Raises:
+			KeyError: Unknown job branch
+		"""
+		return self.get_ranking(
+			column, number_of_players, show_gm,
+			job_ids=jobs.get_branch_job_ids(branch),
+		)
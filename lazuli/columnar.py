@@ -0,0 +1,351 @@
+"""This module holds the CharacterColumns class for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+	Typical usage example:
+
+	table = lazuli.load_character_columns(["level", "meso"], {"gm <": 1})
+	table.group_by_job("level")  # {"Hero": 187.4, "Bishop": 201.2, ...}
+	table.gini("meso")  # 0.83
+	table.describe("level")  # {"count": ..., "mean": ..., "p50": ..., ...}
+"""
+from array import array
+import math
+from typing import Any, Iterable, Optional, Union
+import lazuli.jobs as jobs
+
+# Imported on first use: NumPy is optional, and slow to import
+numpy: Any = None
+
+# Narrowest `array` typecode that holds each known `characters` column;
+# columns not listed use 64-bit integers (or doubles, for fractions)
+COLUMN_TYPECODES = {
+	"id": "i",
+	"accountid": "i",
+	"level": "h",
+	"job": "h",
+	"gm": "b",
+	"gender": "b",
+	"skincolor": "b",
+	"fame": "i",
+	"reborns": "i",
+	"str": "i",
+	"dex": "i",
+	"int": "i",
+	"luk": "i",
+	"maxhp": "i",
+	"maxmp": "i",
+	"ap": "i",
+	"map": "i",
+	"buddyCapacity": "h",
+	"meso": "q",
+	"exp": "q",
+}
+AGGREGATES = ("count", "sum", "mean", "min", "max")
+
+Column = Union[array, "numpy.ndarray"]
+
+
+class CharacterColumns:
+	"""`CharacterColumns` object; selected `characters` columns as typed arrays.
+
+	Each column is held in one compact `array` (2 to 8 bytes per value,
+	instead of a Python `int` per value), or in a NumPy array sharing the
+	same memory if NumPy is installed and enabled. The `job` column is
+	always included, for the group-by helpers keyed by `jobs.JOBS_BY_ID`.
+	Aggregates run over the whole column at once: in NumPy if available,
+	in single passes of plain Python otherwise. Columns holding `NULL`s
+	are widened to floats, with `NULL` as `nan`.
+
+	Use `Lazuli::load_character_columns()` rather than this class's constructor.
+	"""
+
+	def __init__(self, columns: dict[str, Column]) -> None:
+		"""Wraps already-loaded columns of equal length
+
+		Args:
+
+			columns (`dict`): Represents the columns, by name
+		"""
+		self._columns = columns
+
+	@classmethod
+	def from_rows(
+		cls,
+		names: list[str],
+		rows: Iterable[tuple],
+		use_numpy: Optional[bool]=None,
+	) -> "CharacterColumns":
+		"""Packs rows of values into one typed array per column
+
+		Args:
+
+			names (`list[str]`): Represents the column names, in the order of each row
+			rows (`Iterable[tuple]`): Represents the rows; consumed once, e.g. from `utility.stream_db_rows()`
+			use_numpy (`bool`): Optional; Whether to return NumPy arrays. Defaults to `True` if NumPy is installed
+
+		Returns:
+			A `CharacterColumns` object
+
+		Raises:
+			RuntimeError: NumPy was requested, but is not installed
+			ValueError: Non-numeric column
+		"""
+		to_numpy = use_numpy is not False and _import_numpy()
+		if use_numpy and not to_numpy:
+			raise RuntimeError("NumPy is not installed!")
+		arrays = [array(COLUMN_TYPECODES.get(name, "q")) for name in names]
+		appends = [column.append for column in arrays]
+		for row in rows:
+			for index, value in enumerate(row):
+				try:
+					appends[index](value)
+				except (OverflowError, TypeError):
+					# Out of range, fractional, or NULL: widen the column and retry
+					if value is not None and not isinstance(value, (int, float)):
+						raise ValueError(f"Column {names[index]} is not numeric!") from None
+					arrays[index] = _widen(arrays[index], value)
+					appends[index] = arrays[index].append
+					appends[index](math.nan if value is None else value)
+		columns: dict[str, Column] = dict(zip(names, arrays))
+		if to_numpy:
+			columns = {
+				name: numpy.frombuffer(column, dtype=column.typecode)
+				for name, column in columns.items()
+			}
+		return cls(columns)
+
+	def __len__(self) -> int:
+		return len(next(iter(self._columns.values()), ()))
+
+	def __getitem__(self, column: str) -> Column:
+		return self._columns[column]
+
+	def __contains__(self, column: str) -> bool:
+		return column in self._columns
+
+	@property
+	def columns(self) -> list[str]:
+		"""`list[str]`: Represents the names of the loaded columns"""
+		return list(self._columns)
+
+	@property
+	def nbytes(self) -> int:
+		"""`int`: Represents the memory held by the column data, in bytes"""
+		return sum(len(column) * column.itemsize for column in self._columns.values())
+
+	def group_by(
+		self,
+		key_column: str,
+		value_column: str,
+		aggregate: str="mean",
+	) -> dict[Any, float]:
+		"""Aggregates one column, grouped by the values of another
+
+		Args:
+
+			key_column (`str`): Represents the column to group by, e.g. `job`
+			value_column (`str`): Represents the column to aggregate, e.g. `level`
+			aggregate (`str`): Optional; One of `count`, `sum`, `mean`, `min`, `max`. Defaults to `mean`
+
+		Returns:
+			A `dict`, mapping each value of the key column to the aggregate
+
+		Raises:
+			ValueError: Unknown aggregate
+			KeyError: Column not loaded
+		"""
+		return self._group(self._columns[key_column], self._columns[value_column], aggregate)
+
+	def group_by_job(self, value_column: str, aggregate: str="mean") -> dict[str, float]:
+		"""Aggregates one column, grouped by job name, e.g. mean level by job
+
+		Job IDs sharing a name are grouped together; unknown Job IDs are
+		grouped as `Unknown (<id>)`.
+
+		Args:
+
+			value_column (`str`): Represents the column to aggregate, e.g. `level`
+			aggregate (`str`): Optional; One of `count`, `sum`, `mean`, `min`, `max`. Defaults to `mean`
+
+		Returns:
+			A `dict`, mapping each job name to the aggregate
+
+		Raises:
+			ValueError: Unknown aggregate
+		"""
+		job_ids = self._columns["job"]
+		present = sorted(set(job_ids.tolist()))
+		names = [jobs.JOBS_BY_ID.get(job_id, f"Unknown ({job_id})") for job_id in present]
+		if len(set(names)) == len(names):
+			by_id = self._group(job_ids, self._columns[value_column], aggregate)
+			return {name: by_id[job_id] for job_id, name in zip(present, names)}
+		# Several IDs share a name: map each ID to its name's index, then group by that
+		name_indices = {name: index for index, name in enumerate(dict.fromkeys(names))}
+		lookup = {job_id: name_indices[name] for job_id, name in zip(present, names)}
+		if isinstance(job_ids, array):
+			keys: Column = array("i", (lookup[job_id] for job_id in job_ids))
+		else:
+			table = numpy.zeros(max(present) - min(present) + 1, dtype="i")
+			for job_id, index in lookup.items():
+				table[job_id - min(present)] = index
+			keys = table[job_ids - min(present)]
+		by_index = self._group(keys, self._columns[value_column], aggregate)
+		return {name: by_index[index] for name, index in name_indices.items()}
+
+	def gini(self, column: str) -> float:
+		"""Computes the Gini coefficient of a column, e.g. of mesos
+
+		`0` means every character holds the same amount; values near `1`
+		mean a few characters hold nearly everything.
+
+		Args:
+
+			column (`str`): Represents the column, e.g. `meso`
+
+		Returns:
+			A `float` between `0` and `1`; `0` for an empty or all-zero column
+		"""
+		values = self._columns[column]
+		count = len(values)
+		if numpy is not None and not isinstance(values, array):
+			ordered = numpy.sort(values).astype("d")
+			total = ordered.sum()
+			weighted = (numpy.arange(1, count + 1) * ordered).sum()
+		else:
+			ordered = sorted(values)
+			total = float(sum(ordered))
+			weighted = float(sum(rank * value for rank, value in enumerate(ordered, 1)))
+		if not count or not total:
+			return 0.0
+		return float(2 * weighted / (count * total) - (count + 1) / count)
+
+	def histogram(self, column: str, bins: int=10) -> list[tuple[float, float, int]]:
+		"""Counts the values of a column in equal-width bins
+
+		Args:
+
+			column (`str`): Represents the column, e.g. `level`
+			bins (`int`): Optional; Number of bins. Defaults to `10`
+
+		Returns:
+			A `list` of `tuple`, representing the lower bound, upper bound
+			and count of each bin; the last bin includes its upper bound
+		"""
+		values = self._columns[column]
+		if not len(values):
+			return []
+		if numpy is not None and not isinstance(values, array):
+			counts, edges = numpy.histogram(values, bins=bins)
+			return [
+				(float(edges[index]), float(edges[index + 1]), int(counts[index]))
+				for index in range(bins)
+			]
+		lowest, highest = min(values), max(values)
+		width = (highest - lowest) / bins or 1
+		counts = [0] * bins
+		for value in values:
+			counts[min(int((value - lowest) / width), bins - 1)] += 1
+		return [
+			(lowest + index * width, lowest + (index + 1) * width, counts[index])
+			for index in range(bins)
+		]
+
+	def describe(self, column: str) -> dict[str, float]:
+		"""Summarises the distribution of a column
+
+		Args:
+
+			column (`str`): Represents the column, e.g. `level`
+
+		Returns:
+			A `dict` with the `count`, `mean`, `std` (population), `min`,
+			`p50`, `p90`, `p99`, and `max`; empty for an empty column
+		"""
+		values = self._columns[column]
+		count = len(values)
+		if not count:
+			return {}
+		if numpy is not None and not isinstance(values, array):
+			ordered = numpy.sort(values)
+			mean = float(values.mean())
+			std = float(values.std())
+		else:
+			ordered = sorted(values)
+			mean = sum(ordered) / count
+			std = math.sqrt(sum((value - mean) ** 2 for value in ordered) / count)
+
+		def percentile(share: float) -> float:
+			# Nearest-rank percentile
+			return float(ordered[min(count - 1, max(0, math.ceil(share * count) - 1))])
+
+		return {
+			"count": count,
+			"mean": mean,
+			"std": std,
+			"min": float(ordered[0]),
+			"p50": percentile(0.5),
+			"p90": percentile(0.9),
+			"p99": percentile(0.99),
+			"max": float(ordered[-1]),
+		}
+
+	@staticmethod
+	def _group(keys: Column, values: Column, aggregate: str) -> dict[Any, float]:
+		if aggregate not in AGGREGATES:
+			raise ValueError(f"Unknown aggregate: {aggregate}; expected one of {AGGREGATES}")
+		if numpy is not None and not isinstance(keys, array):
+			if not len(keys):
+				return {}
+			unique, inverse = numpy.unique(keys, return_inverse=True)
+			counts = numpy.bincount(inverse, minlength=len(unique))
+			if aggregate in ("min", "max"):
+				# Sort the values by group, then reduce each contiguous run
+				ordered = values[numpy.argsort(inverse, kind="stable")]
+				starts = numpy.concatenate(([0], numpy.cumsum(counts)[:-1]))
+				result = (numpy.minimum if aggregate == "min" else numpy.maximum).reduceat(ordered, starts)
+			elif aggregate == "count":
+				result = counts
+			else:
+				result = numpy.bincount(inverse, weights=values, minlength=len(unique))
+				if aggregate == "mean":
+					result = result / counts
+			return {key.item(): value.item() for key, value in zip(unique, result)}
+
+		groups: dict[Any, list] = {}  # key: [count, sum, min, max]
+		for key, value in zip(keys, values):
+			group = groups.get(key)
+			if group is None:
+				groups[key] = [1, value, value, value]
+			else:
+				group[0] += 1
+				group[1] += value
+				if value < group[2]:
+					group[2] = value
+				if value > group[3]:
+					group[3] = value
+		index = {"count": 0, "sum": 1, "min": 2, "max": 3}
+		if aggregate == "mean":
+			return {key: group[1] / group[0] for key, group in sorted(groups.items())}
+		return {key: group[index[aggregate]] for key, group in sorted(groups.items())}
+
+
+def _widen(column: array, value: Any) -> array:
+	typecode = "d" if isinstance(value, float) or value is None else "q"
+	if column.typecode == "q" and typecode == "q":
+		typecode = "d"  # Beyond 64 bits; precision is lost, but nothing else fits
+	return array(typecode, column)
+
+
+def _import_numpy() -> bool:
+	global numpy
+	if numpy is None:
+		try:
+			import numpy as module  # pylint: disable=import-outside-toplevel
+		except ImportError:
+			return False
+		numpy = module
+	return True
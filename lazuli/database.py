@@ -14,12 +14,35 @@ Refer to the project wiki on GitHub for more in-depth examples.
 	meso = char.money  # Use of Character methods to fetch data from DB
 	char.money = 123456789  # Use of Character methods to write data to DB
 """
-from typing import Any, Union
+import functools
+import itertools
+import logging
+import threading
+import time
+from typing import (
+	Any, AsyncIterator, ContextManager, Iterable, Iterator, Optional, Sequence, Union,
+)
 from lazuli.character import Character
 from lazuli.account import Account
+import lazuli.avatar as avatar
+from lazuli.columnar import CharacterColumns
 from lazuli.inventory import Inventory
+from lazuli.loader import BatchLoader
+from lazuli.name_index import NameIndex
+from lazuli.progress import ProgressSampler, ProgressStore
+import lazuli.presence as presence
+from lazuli.singleflight import SingleFlight
+import lazuli.snapshot_file as snapshot_file
+import lazuli.routing as routing
+import lazuli.sketches as sketches
+import lazuli.dupes as dupes
+import lazuli.economy as economy
+import lazuli.jobs as jobs
+import lazuli.tracing as tracing
 import lazuli.utility as utils
 
+_logger = logging.getLogger(__name__)
+
 
 class Lazuli:
 	"""`Database` object; models the AzureMS DB.
@@ -36,6 +59,12 @@ class Lazuli:
 	of `utf8`, `latin1`, and `euckr` in its database - YMMV when attempting
 	to expand attribute handling features.
 
+	A `Lazuli` object (and the `Character`, `Account`, and `Inventory` objects
+	created from it) may be shared between threads. Each query checks out its
+	own connection from a pool shared by every object pointing at the same
+	database, and setters/adders hold a per-instance lock while writing, so
+	concurrent updates to a shared instance are not lost.
+
 	Attributes:
 
 		host (`str`): Optional; IP address of the database. Defaults to `localhost`
@@ -44,6 +73,14 @@ class Lazuli:
 		password (`str`): Optional; Password for access to the database. Defaults to empty string.
 		port (`int`): Optional; Port with which to access the database. Defaults to `3306`
 		charset (`str`): Optional; Encoding. Defaults to `euckr`
+		pool_size (`int`): Optional; Maximum number of open connections to the database. Only the first `Lazuli` object pointing at a database sets it. Defaults to `5`
+		pool_timeout (`float`): Optional; Seconds a query waits for a free connection before raising `PoolExhaustedError`; `None` waits forever. Defaults to `30`
+		coalesce_reads (`bool`): Optional; Whether identical concurrent reads share one DB call (see `Lazuli::get_db_all_hits()`). Defaults to `True`
+		replicas (`Iterable`): Optional; Read replicas of the database; either a host name, or a `dict` of the attributes that differ from the primary's (see `routing.py`). Defaults to none
+		read_strategy (`str`): Optional; How a replica is picked for each read; `"round_robin"` or `"least_latency"`. Defaults to `"round_robin"`
+		read_your_writes (`float`): Optional; Seconds after a write during which reads go to the primary instead of a replica. Defaults to `0` (disabled)
+		compare_and_set (`bool`): Optional; Whether setters only update a column if it still holds the value last read, raising `ConcurrentUpdateError` otherwise (see `utility.compare_and_set`). Defaults to `False`
+		cas_retries (`int`): Optional; How many times adders re-read a conflicting column and try again, before raising `ConcurrentUpdateError`. Defaults to `0`
 	"""
 
 	def __init__(
@@ -53,7 +90,15 @@ class Lazuli:
 			user: str="root",
 			password: str="",
 			port: str=3306,
-			charset: str="euckr"
+			charset: str="euckr",
+			pool_size: int=utils.DEFAULT_POOL_SIZE,
+			pool_timeout: Optional[float]=utils.DEFAULT_POOL_TIMEOUT,
+			coalesce_reads: bool=True,
+			replicas: Optional[Iterable[Union[str, dict[str, Any]]]]=None,
+			read_strategy: str=routing.ROUND_ROBIN,
+			read_your_writes: float=0.0,
+			compare_and_set: bool=False,
+			cas_retries: int=0,
 	) -> None:
 		self._host = host
 		self._schema = schema
@@ -61,6 +106,7 @@ class Lazuli:
 		self._password = password
 		self._port = port
 		self._charset = charset
+		self._pool_size = pool_size
 
 		self._database_config = {
 			'host': self._host,
@@ -68,19 +114,45 @@ class Lazuli:
 			'password': self._password,
 			'schema': self._schema,
 			'port': self._port,
-			'charset': self._charset
+			'charset': self._charset,
+			'pool_size': self._pool_size,
+			'pool_timeout': pool_timeout,
+			'compare_and_set': compare_and_set,
+			'cas_retries': cas_retries,
 		}
+		if replicas:
+			# Shared with every object created from this one, through the config
+			self._database_config['router'] = routing.ReplicaRouter(
+				self._database_config, replicas, read_strategy, read_your_writes,
+			)
 
-	def get_db_all_hits(self, query: str) -> list:
+		self._name_index: Optional[NameIndex] = None
+		self._name_index_lock = threading.Lock()
+		self._single_flight: Optional[SingleFlight] = (
+			SingleFlight() if coalesce_reads else None
+		)
+		self._batch_loader = BatchLoader(self)
+		self._avatar_cache = avatar.AvatarCache()
+
+	def get_db_all_hits(
+		self,
+		query: str,
+		params: Optional[Sequence[Any]]=None,
+	) -> list:
 		"""Fetch all matching data from DB using the provided query
 
 		Wrapper function. Uses the DB config from `Lazuli` attributes for
 		DB connection. Feeds the config values into `utility.get_db_all_hits()`.
 		Added here for explicit API-use purposes (discouraged).
+		Unless disabled with `coalesce_reads=False`, identical queries
+		(same query and parameters) issued concurrently share a single
+		in-flight DB call; each caller receives its own copy of the rows.
+		Reads inside `Lazuli::snapshot()` are never coalesced.
 
 		Args:
 
 			query (`str`): Represents the SQL query to be executed
+			params (`Sequence`): Optional; Represents the values for the `%s` placeholders in the query
 
 		Returns:
 			A `list` of objects, representing the result of the provided SQL query,
@@ -91,9 +163,102 @@ class Lazuli:
 			`utility.get_db_all_hits()` method
 
 		"""
-		data = utils.get_db_all_hits(self._database_config, query)
+		if self._single_flight is None or utils.in_snapshot(self._database_config):
+			return utils.get_db_all_hits(self._database_config, query, params)
+		data, shared = self._single_flight.do(
+			(query, tuple(params or ())),
+			utils.get_db_all_hits, self._database_config, query, params,
+		)
+		return self._copy_if_shared(data, shared)
+
+	async def get_db_all_hits_async(
+		self,
+		query: str,
+		params: Optional[Sequence[Any]]=None,
+	) -> list:
+		"""Fetch all matching data from DB without blocking the event loop
+
+		Awaitable version of `Lazuli::get_db_all_hits()`; the query runs in the
+		event loop's default executor. Identical concurrent queries are
+		coalesced across coroutines and threads alike.
+
+		Args:
+
+			query (`str`): Represents the SQL query to be executed
+			params (`Sequence`): Optional; Represents the values for the `%s` placeholders in the query
+
+		Returns:
+			A `list` of objects, representing the result of the provided SQL query
+		"""
+		if self._single_flight is None:
+			import asyncio  # pylint: disable=import-outside-toplevel
+			loop = asyncio.get_running_loop()
+			return await loop.run_in_executor(
+				None, utils.get_db_all_hits, self._database_config, query, params
+			)
+		data, shared = await self._single_flight.do_async(
+			(query, tuple(params or ())),
+			utils.get_db_all_hits, self._database_config, query, params,
+		)
+		return self._copy_if_shared(data, shared)
+
+	@staticmethod
+	def _copy_if_shared(data: Any, shared: bool) -> Any:
+		# Rows become the `_stats` of `Character` objects etc., which are
+		# mutated by setters; callers sharing a result must not share rows
+		if shared and data:
+			return [dict(row) for row in data]
 		return data
 
+	def coalescing_stats(self) -> dict[str, int]:
+		"""Fetch counters for read coalescing (see `Lazuli::get_db_all_hits()`)
+
+		Returns:
+			A `dict` with the total number of reads (`calls`), the number of
+			reads that hit the database (`executed`), and the number of reads
+			that shared another read's result instead (`coalesced`).
+			All counters are `0` if coalescing is disabled.
+		"""
+		if self._single_flight is None:
+			return {"calls": 0, "executed": 0, "coalesced": 0}
+		return self._single_flight.stats()
+
+	def routing_stats(self) -> Optional[dict[str, Any]]:
+		"""Fetch counters for reads routed to replicas (see `routing.py`)
+
+		Returns:
+			A `dict` with the number of reads served by the primary
+			(`primary_reads`), and per replica (`replicas`) the number of
+			reads served, failed reads, and the moving-average latency.
+			Defaults to `None` if no replicas are configured.
+		"""
+		router = self._database_config.get('router')
+		if router is None:
+			return None
+		return router.stats()
+
+	def snapshot(self) -> ContextManager[Any]:
+		"""Run every read of a `with` block against one consistent snapshot
+
+		Pins one connection in a read-only `REPEATABLE READ` transaction,
+		started `WITH CONSISTENT SNAPSHOT`, for the duration of the block.
+		Every read made by the current thread inside the block, including
+		those of `Character`, `Account`, and `Inventory` objects created from
+		this one, runs over that connection, and sees the database as it was
+		when the block was entered - values cannot tear while the server
+		writes. Writes are not affected. See `utility.snapshot()`.
+
+		Use as:
+
+			with lazuli.snapshot():
+				char = lazuli.get_char_by_name("KOOKIIE")
+				report = char.get_deep_copy()
+
+		Returns:
+			A context manager, yielding the pinned connection
+		"""
+		return utils.snapshot(self._database_config)
+
 	def get_db_first_hit(self, query: str) -> Any:
 		"""Fetch data (first result) from DB using the provided query
 
@@ -113,6 +278,7 @@ class Lazuli:
 		"""
 		return self.get_db_all_hits(query)[0]
 
+	@tracing.traced
 	def get_char_by_name(self, char_name: str) -> Character:
 		"""Create a `Character` instance from the given character name
 
@@ -141,6 +307,7 @@ class Lazuli:
 		character = Character(character_stats, self._database_config)
 		return character
 
+	@tracing.traced
 	def get_inv_by_name(self, char_name: str) -> Inventory:
 		"""Create an `Inventory` instance from the given character name
 
@@ -168,6 +335,7 @@ class Lazuli:
 		inventory = Inventory(char_id, self._database_config)
 		return inventory
 
+	@tracing.traced
 	def get_account_by_username(self, username: str) -> Account:
 		"""Given a username (NOT IGN), create a new `Account` object instance
 
@@ -196,6 +364,271 @@ class Lazuli:
 		account = Account(account_info, self._database_config)
 		return account
 
+	def _get_rows_in(
+		self,
+		table: str,
+		column: str,
+		values: Iterable[Any],
+		primary: bool=False,
+		strict: bool=False,
+	) -> list[dict[str, Any]]:
+		"""Fetch every row whose column matches one of the values
+
+		Runs one `IN (...)` query per `utility.BULK_CHUNK_SIZE` values. With
+		`primary` set, the queries bypass the replicas and are not coalesced.
+		With `strict` set, a failed query raises `RuntimeError`; otherwise its
+		rows are left out (the error is logged by `utility.get_db_all_hits()`).
+		"""
+		rows = []
+		for values_chunk in utils.chunk(list(values), utils.BULK_CHUNK_SIZE):
+			where, params = utils.build_where_clause({column: values_chunk})
+			query = f"SELECT * FROM `{table}` {where}"
+			if primary:
+				data = utils.get_db_all_hits(self._database_config, query, params, primary=True)
+			else:
+				data = self.get_db_all_hits(query, params)
+			if data is None and strict:
+				raise RuntimeError(f"Unable to fetch rows from `{table}`; see the log for details")
+			rows.extend(data or [])
+		return rows
+
+	@tracing.traced
+	def get_chars_by_names(
+		self,
+		char_names: Iterable[str],
+		strict: bool=False,
+	) -> dict[str, Character]:
+		"""Create `Character` instances for many character names at once
+
+		Fetches all the characters with one `IN (...)` query, and all of their
+		accounts with another, instead of three queries per character as with
+		`Lazuli::get_char_by_name()`.
+
+		Args:
+
+			char_names (`Iterable[str]`): Represents the character names (aka IGNs)
+			strict (`bool`): Optional; Raise `RuntimeError` when a query fails, instead of leaving its rows out. Defaults to `False`
+
+		Returns:
+			A `dict` mapping each given name to its `Character` object.
+			Names without a matching character are left out.
+
+		Raises:
+			Generic error on failure, handled by `utility.get_db_all_hits()`
+			RuntimeError: A query failed, with `strict` set
+		"""
+		char_names = list(dict.fromkeys(char_names))
+		if not char_names:
+			return {}
+		char_rows = self._get_rows_in("characters", "name", char_names, strict=strict)
+		account_rows = {
+			row['id']: row for row in self._get_rows_in(
+				"accounts", "id", {row['accountid'] for row in char_rows}, strict=strict
+			)
+		}
+		# Names are compared case-insensitively by the DB's collation
+		characters = {
+			row['name'].casefold(): Character(
+				row, self._database_config, account_rows.get(row['accountid'])
+			)
+			for row in char_rows
+		}
+		return {
+			name: characters[name.casefold()]
+			for name in char_names if name.casefold() in characters
+		}
+
+	@tracing.traced
+	def get_avatar_urls(self, char_names: Iterable[str]) -> dict[str, str]:
+		"""Generates `MapleStory.io` avatar URLs for many characters at once
+
+		Fetches the skin, face, hair, and equipped items (inventory type
+		`-1`) of all the characters with one joined `IN (...)` query, instead
+		of loading a whole `Inventory` per character as with
+		`Character::get_char_img()`. URLs are kept in an LRU cache keyed by
+		the hash of each outfit (see `avatar.py`), so characters whose outfit
+		did not change reuse their URL.
+
+		Args:
+
+			char_names (`Iterable[str]`): Represents the character names (aka IGNs)
+
+		Returns:
+			A `dict` mapping each given name to its avatar URL.
+			Names without a matching character are left out.
+
+		Raises:
+			Generic error on failure, handled by `utility.get_db_all_hits()`
+		"""
+		char_names = list(dict.fromkeys(char_names))
+		outfits: dict[str, tuple[int, int, int, list[int]]] = {}
+		for names_chunk in utils.chunk(char_names, utils.BULK_CHUNK_SIZE):
+			placeholders = ", ".join(["%s"] * len(names_chunk))
+			rows = self.get_db_all_hits(
+				"SELECT c.`name`, c.`skincolor`, c.`face`, c.`hair`, i.`itemid` "
+				"FROM `characters` c LEFT JOIN `inventoryitems` i "
+				"ON i.`characterid` = c.`id` AND i.`inventorytype` = %s "
+				f"WHERE c.`name` IN ({placeholders}) ORDER BY c.`id`, i.`inventoryitemid`",
+				[utils.get_inv_type_by_name("equipped"), *names_chunk],
+			) or []
+			for row in rows:
+				# Names are compared case-insensitively by the DB's collation
+				outfit = outfits.setdefault(
+					row['name'].casefold(), (row['skincolor'], row['face'], row['hair'], [])
+				)
+				if row['itemid'] is not None:  # `NULL` if nothing is equipped
+					outfit[3].append(row['itemid'])
+		urls = {}
+		for name in char_names:
+			outfit = outfits.get(name.casefold())
+			if outfit is not None:
+				skin, face, hair, item_ids = outfit
+				urls[name] = self._avatar_cache.get_url((skin, face, hair, tuple(item_ids)))
+		return urls
+
+	@tracing.traced
+	def refresh_many(
+		self,
+		characters: Iterable[Character],
+	) -> dict[int, dict[str, tuple[Any, Any]]]:
+		"""Fetches the current stats of many cached characters, and applies the changes
+
+		Fetches all the `characters` rows with one `IN (...)` query (per
+		`utility.BULK_CHUNK_SIZE` characters), instead of rebuilding each
+		`Character`. Only changed columns are reported, so level-ups and the
+		like can be announced cheaply, e.g. `diff.get("level")`. Rows are
+		read from the primary, as a lagging replica would report stale
+		values as changes (or roll back changes made through the instances).
+
+		Args:
+
+			characters (`Iterable[Character]`): Represents the cached characters to refresh
+
+		Returns:
+			A `dict`, mapping the ID of each changed character to a `dict` of
+			its changed columns and their `(old, new)` values. Unchanged and
+			deleted characters are left out
+
+		Raises:
+			Generic error on failure, handled by `utility.get_db_all_hits()`
+		"""
+		by_id: dict[int, list[Character]] = {}
+		for character in characters:
+			by_id.setdefault(character.character_id, []).append(character)
+		if not by_id:
+			return {}
+		diffs = {}
+		for row in self._get_rows_in("characters", "id", by_id, primary=True):
+			for character in by_id.get(row['id'], ()):
+				diff = character._apply_stats(row)  # pylint: disable=protected-access
+				if diff:
+					diffs[row['id']] = diff
+		return diffs
+
+	@tracing.traced
+	def get_accounts_by_ids(
+		self,
+		account_ids: Iterable[int],
+		strict: bool=False,
+	) -> dict[int, Account]:
+		"""Create `Account` instances for many account IDs with one query
+
+		Args:
+
+			account_ids (`Iterable[int]`): Represents the account IDs
+			strict (`bool`): Optional; Raise `RuntimeError` when a query fails, instead of leaving its rows out. Defaults to `False`
+
+		Returns:
+			A `dict` mapping each found account ID to its `Account` object
+
+		Raises:
+			Generic error on failure, handled by `utility.get_db_all_hits()`
+			RuntimeError: A query failed, with `strict` set
+		"""
+		account_ids = set(account_ids)
+		if not account_ids:
+			return {}
+		return {
+			row['id']: Account(row, self._database_config)
+			for row in self._get_rows_in("accounts", "id", account_ids, strict=strict)
+		}
+
+	@tracing.traced
+	def get_invs_by_char_ids(
+		self,
+		char_ids: Iterable[int],
+		strict: bool=False,
+	) -> dict[int, Inventory]:
+		"""Create `Inventory` instances for many character IDs with one query
+
+		Args:
+
+			char_ids (`Iterable[int]`): Represents the character IDs
+			strict (`bool`): Optional; Raise `RuntimeError` when a query fails, instead of leaving its rows out. Defaults to `False`
+
+		Returns:
+			A `dict` mapping each given character ID to its `Inventory` object
+			(empty for characters without items)
+
+		Raises:
+			Generic error on failure, handled by `utility.get_db_all_hits()`
+			RuntimeError: A query failed, with `strict` set
+		"""
+		char_ids = set(char_ids)
+		if not char_ids:
+			return {}
+		items: dict[int, list[dict[str, Any]]] = {char_id: [] for char_id in char_ids}
+		for row in self._get_rows_in("inventoryitems", "characterid", char_ids, strict=strict):
+			items[row['characterid']].append(row)
+		return {
+			char_id: Inventory(char_id, self._database_config, char_items)
+			for char_id, char_items in items.items()
+		}
+
+	def batch_loader(self) -> BatchLoader:
+		"""Fetch the automatic batching loader for use in async code
+
+		Character-by-name, account-by-ID, and inventory-by-character-ID
+		requests awaited through the loader in the same event-loop tick are
+		dispatched together, one `IN (...)` query per kind of request.
+		See `loader.py` for details.
+
+		Returns:
+			A `BatchLoader` object, shared by all callers of this `Lazuli` instance
+		"""
+		return self._batch_loader
+
+	@tracing.traced
+	def name_index(self, refresh: bool=False) -> NameIndex:
+		"""Fetch the in-memory index of character and account names
+
+		The index is built on first use, by loading every character and
+		account name once. Subsequent calls return the same index; only names
+		with a higher `id` than any seen so far are fetched on refresh.
+		Meant for autocomplete, where querying the DB per keystroke is not viable.
+		See `name_index.py` for the query methods.
+
+		Args:
+
+			refresh (`bool`): Optional; Whether to fetch newly created names before returning. Defaults to `False`
+
+		Returns:
+			A `NameIndex` object, shared by all callers of this `Lazuli` instance
+
+		Raises:
+			Generic error on failure, handled by `utility.get_db_all_hits()`
+		"""
+		with self._name_index_lock:  # Build it only once, if called concurrently
+			if self._name_index is None:
+				name_index = NameIndex(self._database_config)
+				name_index.refresh()
+				self._name_index = name_index
+				return name_index
+		if refresh:
+			self._name_index.refresh()
+		return self._name_index
+
+	@tracing.traced
 	def set_char_stat(self, name: str, column: str, value: Union[str, int]) -> bool:
 		"""Set the given value for the given name and column
 
@@ -222,9 +655,328 @@ class Lazuli:
 			f"WHERE `name` = '{name}'"
 		)
 		if status:
-			print(f"Successfully set {name}'s stats in database.")
+			_logger.debug("Successfully set %s's stats in database.", name)
 		return status
 
+	@tracing.traced
+	def add_char_stat_bulk(
+		self,
+		column: str,
+		amount: int,
+		filters: Optional[dict[str, Any]]=None,
+	) -> Optional[int]:
+		"""Add the given amount to a stat of every character matching the filters
+
+		Runs as set-based `UPDATE` statements in a single transaction, instead
+		of instantiating a `Character` per recipient. Results are clamped to
+		the same bounds as the corresponding `Character` setter (see
+		`utility.CHARACTER_STAT_LIMITS`), without overflowing on the way
+		(see `utility.clamped_add_params()`). Unlike the setters, which raise
+		`ValueError` on out-of-range values, the clamping is silent: adding
+		1b mesos to a character holding 9.5b leaves them with 10b.
+		Long `IN (...)` lists are split into chunks of
+		`utility.BULK_CHUNK_SIZE` values.
+
+		### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+		Args:
+
+			column (`str`): Represents the column in the database, e.g. `meso`
+			amount (`int`): Represents the amount to be added (may be negative)
+			filters (`dict`): Optional; Represents the characters to update, e.g. `{"level >=": 200}` or `{"name": [...]}`. Defaults to every character
+
+		Returns:
+			An `int`, representing the number of characters whose value
+			changed; characters left as they were (adding `0`, or already at
+			the bound) are not counted, even if they matched the filters.
+			Defaults to `None` if the operation fails.
+
+		Raises:
+			ValueError: Column is not a numeric character stat, or invalid filters
+		"""
+		if column not in utils.CHARACTER_STAT_LIMITS:
+			raise ValueError(f"{column} is not a character stat that can be added to!")
+		lower, upper = utils.CHARACTER_STAT_LIMITS[column]
+		statements = utils.build_chunked_statements(
+			f"UPDATE `characters` SET `{column}` = {utils.CLAMPED_ADD.format(column=column)}",
+			utils.clamped_add_params(amount, lower, upper),
+			filters,
+		)
+		return utils.write_batch_to_db(self._database_config, statements)
+
+	def add_mesos_bulk(
+		self,
+		amount: int,
+		filters: Optional[dict[str, Any]]=None,
+	) -> Optional[int]:
+		"""Add the given amount of mesos to every character matching the filters
+
+		Uses `Lazuli::add_char_stat_bulk()`; results are kept within 0 to 10b.
+
+		### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+		Args:
+
+			amount (`int`): Represents the amount of mesos to be added
+			filters (`dict`): Optional; Represents the characters to update. Defaults to every character
+
+		Returns:
+			An `int`, representing the number of characters whose mesos changed.
+			Defaults to `None` if the operation fails.
+		"""
+		return self.add_char_stat_bulk("meso", amount, filters)
+
+	@tracing.traced
+	def add_char_stat_by_name(
+		self,
+		column: str,
+		amounts: dict[str, int],
+	) -> Optional[int]:
+		"""Add a different amount to a stat of each of the given characters
+
+		Runs as `executemany` batches in a single transaction. Results are
+		clamped as in `Lazuli::add_char_stat_bulk()`.
+
+		### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+		Args:
+
+			column (`str`): Represents the column in the database, e.g. `meso`
+			amounts (`dict`): Represents the amount to be added, keyed by character name
+
+		Returns:
+			An `int`, representing the number of characters updated.
+			Defaults to `None` if the operation fails.
+
+		Raises:
+			ValueError: Column is not a numeric character stat
+		"""
+		if column not in utils.CHARACTER_STAT_LIMITS:
+			raise ValueError(f"{column} is not a character stat that can be added to!")
+		lower, upper = utils.CHARACTER_STAT_LIMITS[column]
+		return utils.write_many_to_db(
+			self._database_config,
+			f"UPDATE `characters` SET `{column}` = {utils.CLAMPED_ADD.format(column=column)} "
+			"WHERE `name` = %s",
+			[(*utils.clamped_add_params(amount, lower, upper), name) for name, amount in amounts.items()],
+		)
+
+	@tracing.traced
+	def add_account_stat_bulk(
+		self,
+		column: str,
+		amount: int,
+		filters: Optional[dict[str, Any]]=None,
+	) -> Optional[int]:
+		"""Add the given amount to a stat of every account matching the filters
+
+		Runs as set-based `UPDATE` statements in a single transaction, instead
+		of instantiating an `Account` per recipient. Results are clamped to
+		the same bounds as the corresponding `Account` setter (see
+		`utility.ACCOUNT_STAT_LIMITS`), without overflowing on the way.
+		As with `Lazuli::add_char_stat_bulk()`, the clamping is silent,
+		whereas the setters raise `ValueError` on out-of-range values.
+
+		### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+		Args:
+
+			column (`str`): Represents the column in the database, e.g. `nxCash`
+			amount (`int`): Represents the amount to be added (may be negative)
+			filters (`dict`): Optional; Represents the accounts to update, e.g. `{"id": [...]}`. Defaults to every account
+
+		Returns:
+			An `int`, representing the number of accounts whose value
+			changed; accounts left as they were (adding `0`, or already at
+			the bound) are not counted, even if they matched the filters.
+			Defaults to `None` if the operation fails.
+
+		Raises:
+			ValueError: Column is not a numeric account stat, or invalid filters
+		"""
+		if column not in utils.ACCOUNT_STAT_LIMITS:
+			raise ValueError(f"{column} is not an account stat that can be added to!")
+		lower, upper = utils.ACCOUNT_STAT_LIMITS[column]
+		statements = utils.build_chunked_statements(
+			f"UPDATE `accounts` SET `{column}` = {utils.CLAMPED_ADD.format(column=column)}",
+			utils.clamped_add_params(amount, lower, upper),
+			filters,
+		)
+		return utils.write_batch_to_db(self._database_config, statements)
+
+	def add_nx_bulk(self, amount: int, account_ids: list[int]) -> Optional[int]:
+		"""Add the given amount of NX to each of the given accounts
+
+		Uses `Lazuli::add_account_stat_bulk()`.
+
+		### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+		Args:
+
+			amount (`int`): Represents the amount of NX to be added
+			account_ids (`list[int]`): Represents the IDs of the accounts to update
+
+		Returns:
+			An `int`, representing the number of accounts updated.
+			Defaults to `None` if the operation fails.
+		"""
+		if not account_ids:
+			return 0
+		return self.add_account_stat_bulk("nxCash", amount, {"id": account_ids})
+
+	@tracing.traced
+	def add_account_stat_by_id(
+		self,
+		column: str,
+		amounts: dict[int, int],
+	) -> Optional[int]:
+		"""Add a different amount to a stat of each of the given accounts
+
+		Runs as `executemany` batches in a single transaction. Results are
+		clamped as in `Lazuli::add_account_stat_bulk()`.
+
+		### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+		Args:
+
+			column (`str`): Represents the column in the database, e.g. `nxCash`
+			amounts (`dict`): Represents the amount to be added, keyed by account ID
+
+		Returns:
+			An `int`, representing the number of accounts updated.
+			Defaults to `None` if the operation fails.
+
+		Raises:
+			ValueError: Column is not a numeric account stat
+		"""
+		if column not in utils.ACCOUNT_STAT_LIMITS:
+			raise ValueError(f"{column} is not an account stat that can be added to!")
+		lower, upper = utils.ACCOUNT_STAT_LIMITS[column]
+		return utils.write_many_to_db(
+			self._database_config,
+			f"UPDATE `accounts` SET `{column}` = {utils.CLAMPED_ADD.format(column=column)} "
+			"WHERE `id` = %s",
+			[(*utils.clamped_add_params(amount, lower, upper), account_id)
+				for account_id, amount in amounts.items()],
+		)
+
+	@tracing.traced
+	def unstuck_all(
+		self,
+		filters: Optional[dict[str, Any]]=None,
+		dry_run: bool=False,
+	) -> Optional[int]:
+		"""Set `loggedin` to `0` for every logged-in account matching the filters
+
+		Bulk version of `Account::unstuck()`, e.g. for use after a server
+		crash. Runs as set-based `UPDATE` statements in a single transaction.
+		Only logged-in accounts are matched, and each of them changes, so a
+		dry run reports the same number as the real run. Dry runs count on the
+		primary, even if reads are otherwise routed to replicas.
+
+		### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+		Args:
+
+			filters (`dict`): Optional; Represents the accounts to unstuck, e.g. `{"id": [...]}`. Defaults to every account
+			dry_run (`bool`): Optional; Only count the accounts that would be updated. Defaults to `False`
+
+		Returns:
+			An `int`, representing the number of accounts updated (or that
+			would be updated, for dry runs).
+			Defaults to `None` if the operation fails.
+
+		Raises:
+			ValueError: Invalid filters
+		"""
+		filters = {**(filters or {}), "loggedin >": 0}
+		if dry_run:
+			return utils.count_in_db(
+				self._database_config,
+				utils.build_chunked_statements(
+					"SELECT COUNT(*) FROM `accounts`", [], filters
+				),
+				primary=True,  # Replicas may lag behind the accounts being updated
+			)
+		statements = utils.build_chunked_statements(
+			"UPDATE `accounts` SET `loggedin` = %s", [0], filters
+		)
+		return utils.write_batch_to_db(self._database_config, statements)
+
+	@tracing.traced
+	def ban_accounts(
+		self,
+		ids_or_names: list[Union[int, str]],
+		reason: str,
+		dry_run: bool=False,
+	) -> Optional[int]:
+		"""Ban every given account, recording the given ban reason
+
+		Bulk version of the `Account::banned` and `Account::ban_reason`
+		setters, e.g. for ban waves. `int` values are treated as account IDs,
+		and `str` values as usernames (NOT IGNs). Targets are matched with
+		one `WHERE id IN (...) OR name IN (...)` condition, split into chunked
+		set-based `UPDATE` statements run in a single transaction.
+		Only accounts that would change (not already banned with the same
+		reason) are counted, so a dry run reports the same number as the
+		real run, and an account given both by ID and by username counts once.
+		Dry runs read from the primary, even if reads are otherwise routed to
+		replicas.
+
+		### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+		Args:
+
+			ids_or_names (`list[int | str]`): Represents the account IDs and/or usernames to ban
+			reason (`str`): Represents the ban reason
+			dry_run (`bool`): Optional; Only count the accounts that would be updated. Defaults to `False`
+
+		Returns:
+			An `int`, representing the number of accounts updated (or that
+			would be updated, for dry runs).
+			Defaults to `None` if the operation fails.
+		"""
+		account_ids = [value for value in ids_or_names if isinstance(value, int)]
+		usernames = [value for value in ids_or_names if isinstance(value, str)]
+		if not account_ids and not usernames:
+			return 0
+
+		conditions = []
+		for ids_chunk, names_chunk in itertools.zip_longest(
+			utils.chunk(account_ids, utils.BULK_CHUNK_SIZE),
+			utils.chunk(usernames, utils.BULK_CHUNK_SIZE),
+			fillvalue=(),
+		):
+			targets, params = [], []
+			for column, values in (("id", ids_chunk), ("name", names_chunk)):
+				if values:
+					targets.append(f"`{column}` IN ({', '.join(['%s'] * len(values))})")
+					params.extend(values)
+			# Null-safe, so that a `NULL` ban reason counts as a change
+			conditions.append((
+				f"WHERE ({' OR '.join(targets)}) "
+				"AND NOT (`banned` <=> %s AND `banreason` <=> %s)",
+				[*params, 1, reason],
+			))
+
+		if dry_run:
+			# IDs rather than counts, as an account may match in two chunks
+			matched = set()
+			for where, params in conditions:
+				rows = utils.get_db_all_hits(
+					self._database_config, f"SELECT `id` FROM `accounts` {where}", params, primary=True
+				)
+				if rows is None:
+					return None
+				matched.update(row['id'] for row in rows)
+			return len(matched)
+		statements = [
+			(f"UPDATE `accounts` SET `banned` = %s, `banreason` = %s {where}", [1, reason, *params])
+			for where, params in conditions
+		]
+		return utils.write_batch_to_db(self._database_config, statements)
+
+	@tracing.traced
 	def get_online_list(self) -> list[dict[str, Any]]:
 		"""Fetch the list of players' data for all players currently online
 
@@ -279,6 +1031,133 @@ class Lazuli:
 			return player_data
 		return utils.extract_name(player_data)
 
+	@staticmethod
+	def _username_queries(account_ids: list[int]) -> list[tuple[str, list[Any]]]:
+		queries = []
+		for ids_chunk in utils.chunk(account_ids, utils.BULK_CHUNK_SIZE):
+			where, params = utils.build_where_clause({"id": ids_chunk})
+			queries.append((f"SELECT `id`, `name` FROM `accounts` {where}", params))
+		return queries
+
+	def watch_online(
+		self,
+		interval: float=5.0,
+		max_interval: float=60.0,
+	) -> Iterator[presence.OnlineEvent]:
+		"""Yields an event whenever an account logs in or out, by polling
+
+		Each poll fetches only the IDs of the accounts online, and compares
+		them to those of the previous poll (kept in memory); usernames are
+		only fetched for accounts that just logged in. Polls are `interval`
+		seconds apart while players come and go, and back off towards
+		`max_interval` while nothing changes (see `presence.OnlineWatcher`).
+		Polls that fail are logged and skipped. Never returns; stop iterating
+		to stop polling.
+
+		Args:
+
+			interval (`float`): Optional; Shortest time between polls, in seconds. Defaults to `5`
+			max_interval (`float`): Optional; Longest time between polls, in seconds. Defaults to `60`
+
+		Returns:
+			An iterator of `presence.OnlineEvent`, with the `kind`
+			(`presence.LOGIN` or `presence.LOGOUT`), `account_id`, `username`,
+			and `time` of each change
+		"""
+		watcher = presence.OnlineWatcher(interval, max_interval)
+		while True:
+			rows = self.get_db_all_hits(presence.ONLINE_IDS_QUERY)
+			if rows is not None:  # Errors are logged by `utility.get_db_all_hits()`
+				online_ids = [row['id'] for row in rows]
+				missing = watcher.missing_usernames(online_ids)
+				for query, params in self._username_queries(missing):
+					watcher.add_usernames({
+						row['id']: row['name'] for row in self.get_db_all_hits(query, params) or ()
+					})
+				yield from watcher.update(online_ids)
+			time.sleep(watcher.interval)
+
+	async def watch_online_async(
+		self,
+		interval: float=5.0,
+		max_interval: float=60.0,
+	) -> AsyncIterator[presence.OnlineEvent]:
+		"""Asynchronous version of `Lazuli::watch_online()`, for `async for` loops
+
+		Queries run in the event loop's default executor, and the waits
+		between polls do not block the event loop.
+
+		Args:
+
+			interval (`float`): Optional; Shortest time between polls, in seconds. Defaults to `5`
+			max_interval (`float`): Optional; Longest time between polls, in seconds. Defaults to `60`
+
+		Returns:
+			An asynchronous iterator of `presence.OnlineEvent`
+		"""
+		import asyncio  # pylint: disable=import-outside-toplevel
+		watcher = presence.OnlineWatcher(interval, max_interval)
+		while True:
+			rows = await self.get_db_all_hits_async(presence.ONLINE_IDS_QUERY)
+			if rows is not None:
+				online_ids = [row['id'] for row in rows]
+				missing = watcher.missing_usernames(online_ids)
+				for query, params in self._username_queries(missing):
+					rows = await self.get_db_all_hits_async(query, params)
+					watcher.add_usernames({row['id']: row['name'] for row in rows or ()})
+				for event in watcher.update(online_ids):
+					yield event
+			await asyncio.sleep(watcher.interval)
+
+	@tracing.traced
+	def get_ranking(
+		self,
+		column: str,
+		number_of_players: int=5,
+		show_gm: bool=False,
+		job_ids: Optional[Iterable[int]]=None,
+	) -> list[tuple[str, Any]]:
+		"""Fetches the top ranking players in terms of the given column
+
+		Generic method used by the `Lazuli::get_XXX_ranking()` methods.
+		Only the name and ranked column are fetched from the database.
+		Uses `Lazuli::get_db_all_hits` to query, and
+		`utility.extract_name_and_value` to process the data.
+
+		Args:
+
+			column (`str`): Represents the column in the `characters` table to rank by, e.g. `level`
+			number_of_players (`int`): Optional; Number of players to show, e.g. Top 5 Ranking (default), Top 10 Ranking, etc.
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+			job_ids (`Iterable[int]`): Optional; Only rank characters with these Job IDs (e.g. `jobs.JOB_BRANCHES["Hero"]`). Defaults to all jobs
+
+		Returns:
+			A `list` of `tuple`, representing player names and their
+			corresponding values. Empty if `job_ids` is empty
+
+		Raises:
+			ValueError: Invalid column name
+		"""
+		utils.check_column_name(column)
+		filters: dict[str, Any] = {}
+		if job_ids is not None:
+			filters["job"] = sorted(job_ids)
+			if not filters["job"]:  # No job matches; `IN ()` is not valid SQL
+				return []
+		if not show_gm:
+			filters["gm <"] = 1
+		where, params = utils.build_where_clause(filters)
+		prepared_statement = (
+			f"SELECT `name`, `{column}` FROM `characters` {where} "
+			f"ORDER BY `{column}` DESC LIMIT %s"
+		)
+		player_data = self.get_db_all_hits(
+			prepared_statement, [*params, int(number_of_players)]
+		)
+		if not player_data:  # empty list
+			return player_data
+		return utils.extract_name_and_value(player_data, column)
+
 	def get_level_ranking(
 		self,
 		number_of_players: int=5,
@@ -286,8 +1165,7 @@ class Lazuli:
 	) -> list[tuple[str, int]]:
 		"""Fetches the top ranking players in terms of level
 
-		Uses `Lazuli::get_db_all_hits` to query, and
-		`utility.extract_name_and_value` to process the data.
+		Uses `Lazuli::get_ranking`.
 
 		Args:
 
@@ -298,19 +1176,7 @@ class Lazuli:
 			A `list` of `tuple`, representing player names and their
 			corresponding level
 		"""
-		if show_gm:
-			prepared_statement = (
-				f"SELECT * FROM `characters` ORDER BY `level` DESC "
-				f"LIMIT {number_of_players}"
-			)
-		else:
-			prepared_statement = (
-				f"SELECT * FROM `characters` WHERE `gm` < 1 ORDER BY `level` "
-				f"DESC LIMIT {number_of_players}"
-			)
-
-		player_data = self.get_db_all_hits(prepared_statement)
-		return utils.extract_name_and_value(player_data, "level")
+		return self.get_ranking("level", number_of_players, show_gm)
 
 	def get_meso_ranking(
 		self,
@@ -319,8 +1185,7 @@ class Lazuli:
 	) -> list[tuple[str, int]]:
 		"""Fetches the top ranking players in terms of mesos
 
-		Uses `Lazuli::get_db_all_hits` to query, and
-		`utility.extract_name_and_value` to process the data.
+		Uses `Lazuli::get_ranking`.
 
 		Args:
 
@@ -331,19 +1196,7 @@ class Lazuli:
 			A `list` of `tuple`, representing player names and their
 			corresponding mesos
 		"""
-		if show_gm:
-			prepared_statement = (
-				f"SELECT * FROM `characters` ORDER BY `meso` DESC "
-				f"LIMIT {number_of_players}"
-			)
-		else:
-			prepared_statement = (
-				f"SELECT * FROM `characters` WHERE `gm` < 1 ORDER BY `meso` "
-				f"DESC LIMIT {number_of_players}"
-			)
-
-		player_data = self.get_db_all_hits(prepared_statement)
-		return utils.extract_name_and_value(player_data, "meso")
+		return self.get_ranking("meso", number_of_players, show_gm)
 
 	def get_fame_ranking(
 		self,
@@ -352,8 +1205,7 @@ class Lazuli:
 	) -> list[tuple[str, int]]:
 		"""Fetches the top ranking players in terms of fame
 
-		Uses `Lazuli::get_db_all_hits` to query, and
-		`utility.extract_name_and_value` to process the data.
+		Uses `Lazuli::get_ranking`.
 
 		Args:
 
@@ -364,19 +1216,7 @@ class Lazuli:
 			A `list` of `tuple`, representing player names and their
 			corresponding fame
 		"""
-		if show_gm:
-			prepared_statement = (
-				f"SELECT * FROM `characters` ORDER BY `fame` DESC "
-				f"LIMIT {number_of_players}"
-			)
-		else:
-			prepared_statement = (
-				f"SELECT * FROM `characters` WHERE `gm` < 1 ORDER BY `fame` "
-				f"DESC LIMIT {number_of_players}"
-			)
-
-		player_data = self.get_db_all_hits(prepared_statement)
-		return utils.extract_name_and_value(player_data, "fame")
+		return self.get_ranking("fame", number_of_players, show_gm)
 
 	def get_rebirth_ranking(
 		self,
@@ -385,8 +1225,7 @@ class Lazuli:
 	) -> list[tuple[str, int]]:
 		"""Fetches the top ranking players in terms of rebirths
 
-		Uses `Lazuli::get_db_all_hits` to query, and
-		`utility.extract_name_and_value` to process the data.
+		Uses `Lazuli::get_ranking`.
 
 		Args:
 
@@ -397,19 +1236,7 @@ class Lazuli:
 			A `list` of `tuple`, representing player names and their
 			corresponding rebirths
 		"""
-		if show_gm:
-			prepared_statement = (
-				f"SELECT * FROM `characters` ORDER BY `reborns` DESC "
-				f"LIMIT {number_of_players}"
-			)
-		else:
-			prepared_statement = (
-				f"SELECT * FROM `characters` WHERE `gm` < 1 ORDER BY `reborns` "
-				f"DESC LIMIT {number_of_players}"
-			)
-
-		player_data = self.get_db_all_hits(prepared_statement)
-		return utils.extract_name_and_value(player_data, "reborns")
+		return self.get_ranking("reborns", number_of_players, show_gm)
 
 	def get_rebirth_ranking_by_job_id(
 		self,
@@ -419,8 +1246,7 @@ class Lazuli:
 	) -> list[tuple[str, int]]:
 		"""Fetches the top ranking players (by class) in terms of rebirths
 
-		Uses `Lazuli::get_db_all_hits` to query, and
-		`utility.extract_name_and_value` to process the data.
+		Uses `Lazuli::get_ranking`.
 		Searches based on specific job IDs.
 
 		Args:
@@ -433,16 +1259,335 @@ class Lazuli:
 			A `list` of `tuple`, representing player names and their
 			corresponding rebirths
 		"""
-		if show_gm:
-			prepared_statement = (
-				f"SELECT * FROM `characters` WHERE `job`={job_id} ORDER BY "
-				f"`reborns`DESC LIMIT {number_of_players}"
+		return self.get_ranking(
+			"reborns", number_of_players, show_gm, job_ids=[int(job_id)]
+		)
+
+	def get_ranking_by_branch(
+		self,
+		branch: str,
+		column: str="level",
+		number_of_players: int=5,
+		show_gm: bool=False,
+	) -> list[tuple[str, Any]]:
+		"""Fetches the top ranking players of a job branch, e.g. `Hero`
+
+		Uses the precomputed job hierarchy (`jobs.JOB_BRANCHES`) to rank
+		every advancement of the branch together, via `Lazuli::get_ranking`.
+		Use `jobs.JOB_TREE` to find the branches that stem from a 1st job,
+		e.g. all Mage branches.
+
+		Args:
+
+			branch (`str`): Represents the job branch, named after its final advancement
+			column (`str`): Optional; Represents the column to rank by. Defaults to `level`
+			number_of_players (`int`): Optional; Number of players to show, e.g. Top 5 Ranking (default), Top 10 Ranking, etc.
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+
+		Returns:
+			A `list` of `tuple`, representing player names and their
+			corresponding values
+
+		Raises:
+			KeyError: Unknown job branch
+		"""
+		return self.get_ranking(
+			column, number_of_players, show_gm,
+			job_ids=jobs.get_branch_job_ids(branch),
+		)
+
+	@tracing.traced
+	def load_character_columns(
+		self,
+		columns: Iterable[str],
+		filters: Optional[dict[str, Any]]=None,
+		use_numpy: Optional[bool]=None,
+	) -> CharacterColumns:
+		"""Loads numeric `characters` columns of many characters, for analytics
+
+		Streams only the given columns (and `job`) from the database, via
+		`utility.stream_db_rows()`, straight into one typed array per column;
+		no `Character` objects or per-row `dict`s are built. Use the returned
+		`CharacterColumns` to aggregate, e.g. `group_by_job("level")`.
+
+		Args:
+
+			columns (`Iterable[str]`): Represents the numeric columns to load, e.g. `["level", "meso"]`
+			filters (`dict`): Optional; Only load matching characters (see `utility.build_where_clause()`), e.g. `{"gm <": 1}`
+			use_numpy (`bool`): Optional; Whether to load into NumPy arrays. Defaults to `True` if NumPy is installed
+
+		Returns:
+			A `CharacterColumns` object
+
+		Raises:
+			ValueError: Invalid or non-numeric column name
+			RuntimeError: NumPy was requested, but is not installed
+			Database errors, logged and re-raised by `utility.stream_db_rows()`
+		"""
+		names = list(dict.fromkeys(["job", *columns]))
+		for column in names:
+			utils.check_column_name(column)
+		where, params = utils.build_where_clause(filters)
+		selected = ", ".join(f"`{column}`" for column in names)
+		rows = utils.stream_db_rows(
+			self._database_config, f"SELECT {selected} FROM `characters` {where}", params
+		)
+		return CharacterColumns.from_rows(names, rows, use_numpy)
+
+	@tracing.traced
+	def export_snapshot(self, path: str) -> int:
+		"""Exports the frequently-read columns of every character to a snapshot file
+
+		Each export is written to a new data file, and published by
+		atomically replacing the pointer file at `path` (on Windows too), so
+		`snapshot_file.SnapshotReader` objects (in this or other processes)
+		never see a partial export; they map the new file on their next
+		check. Rows are streamed via `utility.stream_db_rows()`. See
+		`snapshot_file.py` for the format.
+
+		Args:
+
+			path (`str`): Represents the path of the snapshot (pointer) file; data files are written next to it
+
+		Returns:
+			An `int`, representing the number of characters exported
+
+		Raises:
+			Database errors, logged and re-raised by `utility.stream_db_rows()`
+		"""
+		rows = utils.stream_db_rows(self._database_config, snapshot_file.SNAPSHOT_QUERY)
+		return snapshot_file.write_snapshot(path, rows)
+
+	@tracing.traced
+	def sample_progress(self, store: ProgressStore, active_only: bool=False) -> int:
+		"""Adds the current values of the store's columns, for every character, as a round
+
+		Runs one projected scan of `characters` (`id`, `name`, and the
+		tracked columns only), streamed via `utility.stream_db_rows()`.
+		See `progress.py` for the queries the store answers.
+
+		Args:
+
+			store (`ProgressStore`): Represents the store to add the round to
+			active_only (`bool`): Optional; Only sample characters whose account is logged in. Defaults to `False`
+
+		Returns:
+			An `int`, representing the number of characters sampled
+
+		Raises:
+			Database errors, logged and re-raised by `utility.stream_db_rows()`
+		"""
+		selected = ", ".join(f"`{column}`" for column in ["id", "name", *store.columns])
+		query = f"SELECT {selected} FROM `characters`"
+		if active_only:
+			query += " WHERE `accountid` IN (SELECT `id` FROM `accounts` WHERE `loggedin` > 0)"
+		return store.add_round(utils.stream_db_rows(self._database_config, query))
+
+	def progress_sampler(
+		self,
+		store: ProgressStore,
+		interval: float=300.0,
+		active_only: bool=False,
+	) -> ProgressSampler:
+		"""Creates a sampler that runs `Lazuli::sample_progress()` on an interval
+
+		Args:
+
+			store (`ProgressStore`): Represents the store to add rounds to
+			interval (`float`): Optional; Time between rounds, in seconds. Defaults to `300`
+			active_only (`bool`): Optional; Only sample characters whose account is logged in. Defaults to `False`
+
+		Returns:
+			A `ProgressSampler` object; call its `start()` method to start sampling
+		"""
+		return ProgressSampler(
+			functools.partial(self.sample_progress, store, active_only), interval
+		)
+
+	@tracing.traced
+	def build_sketches(
+		self,
+		table: str,
+		quantiles: Iterable[str]=(),
+		distinct: Iterable[str]=(),
+		filters: Optional[dict[str, Any]]=None,
+	) -> dict[str, Any]:
+		"""Builds quantile and distinct-count sketches of columns, in one streaming pass
+
+		Only the sketched columns are fetched, via `utility.stream_db_rows()`,
+		and no rows are kept; see `sketches.py` for the accuracy of each
+		kind of sketch. Sketches of several worlds can be merged with
+		`sketches.merge_sketches()` (see `LazuliCluster::build_sketches()`).
+
+		Args:
+
+			table (`str`): Represents the table, e.g. `characters` or `inventoryitems`
+			quantiles (`Iterable[str]`): Optional; Represents the numeric columns to build a `KLLSketch` of, e.g. `["level", "meso"]`
+			distinct (`Iterable[str]`): Optional; Represents the columns to build a `HyperLogLog` of, e.g. `["itemid"]`
+			filters (`dict`): Optional; Only sketch matching rows (see `utility.build_where_clause()`), e.g. `{"gm <": 1}`
+
+		Returns:
+			A `dict`, mapping each column to its sketch; a column in both
+			`quantiles` and `distinct` also has a `"<column>:distinct"` entry
+
+		Raises:
+			ValueError: Invalid table or column name, or no columns given
+			Database errors, logged and re-raised by `utility.stream_db_rows()`
+		"""
+		quantiles, distinct = list(quantiles), list(distinct)
+		columns = list(dict.fromkeys([*quantiles, *distinct]))
+		if not columns:
+			raise ValueError("At least one column is required!")
+		utils.check_column_name(table)
+		for column in columns:
+			utils.check_column_name(column)
+		where, params = utils.build_where_clause(filters)
+		selected = ", ".join(f"`{column}`" for column in columns)
+		rows = utils.stream_db_rows(
+			self._database_config, f"SELECT {selected} FROM `{table}` {where}", params
+		)
+		return sketches.build_sketches(columns, rows, quantiles, distinct)
+
+	@tracing.traced
+	def scan_for_dupes(
+		self,
+		thresholds: Optional[dict[int, int]]=None,
+		default_threshold: Optional[int]=None,
+		owner_threshold: int=1,
+		top_owners: int=10,
+		streaming: bool=False,
+	) -> list[dupes.DupeFinding]:
+		"""Finds items held in abnormal quantities, and who holds the most of them
+
+		By default, items are totalled with a `GROUP BY itemid` query, then
+		the owners of flagged items with a `GROUP BY itemid, characterid`
+		query (streamed). With `streaming=True`, a single scan of
+		`(itemid, characterid, quantity)` is streamed in that order instead,
+		and totalled on the client in bounded memory (see `dupes.py`); use
+		it when `GROUP BY` over the whole table is too heavy for the DB.
+		Without a default threshold, only the items given are scanned.
+
+		Args:
+
+			thresholds (`dict[int, int]`): Optional; Maps item IDs to the total quantity at which they are flagged, e.g. `{1002140: 5}`
+			default_threshold (`int`): Optional; Total quantity at which any other item is flagged. Defaults to none (only scan the items given)
+			owner_threshold (`int`): Optional; Smallest quantity for an owner of a flagged item to be listed. Defaults to `1`
+			top_owners (`int`): Optional; Maximum number of owners listed per item. Defaults to `10`
+			streaming (`bool`): Optional; Whether to stream one ordered scan instead of running `GROUP BY` queries. Defaults to `False`
+
+		Returns:
+			A `list` of `dupes.DupeFinding`, most severe (quantity relative
+			to threshold) first, with the names of the listed owners
+
+		Raises:
+			ValueError: No thresholds given, or thresholds below 1
+			Database errors, logged and re-raised by `utility.stream_db_rows()`
+		"""
+		resolved = dupes.Thresholds(thresholds, default_threshold)
+		filters = {} if resolved.item_ids is None else {"itemid": resolved.item_ids}
+		where, params = utils.build_where_clause(filters)
+		if streaming:
+			rows = utils.stream_db_rows(
+				self._database_config,
+				f"SELECT `itemid`, `characterid`, `quantity` FROM `inventoryitems` {where} "
+				"ORDER BY `itemid`, `characterid`",
+				params,
 			)
+			findings = dupes.scan_sorted_rows(rows, resolved, owner_threshold, top_owners)
 		else:
-			prepared_statement = (
-				f"SELECT * FROM `characters` WHERE `job`={job_id} AND `gm` < 1 "
-				f"ORDER BY `reborns` DESC LIMIT {number_of_players}"
+			findings = self._scan_for_dupes_grouped(
+				resolved, where, params, owner_threshold, top_owners
 			)
+		return self._name_dupe_owners(findings)
 
-		player_data = self.get_db_all_hits(prepared_statement)
-		return utils.extract_name_and_value(player_data, "reborns")
+	def _scan_for_dupes_grouped(
+		self,
+		thresholds: "dupes.Thresholds",
+		where: str,
+		params: list[Any],
+		owner_threshold: int,
+		top_owners: int,
+	) -> list[dupes.DupeFinding]:
+		totals = self.get_db_all_hits(
+			"SELECT `itemid`, SUM(`quantity`) AS `total`, COUNT(*) AS `stacks`, "
+			"COUNT(DISTINCT `characterid`) AS `owners` "
+			f"FROM `inventoryitems` {where} GROUP BY `itemid` HAVING SUM(`quantity`) >= %s",
+			[*params, thresholds.lowest],
+		) or []
+		flagged = {
+			row['itemid']: row for row in totals
+			if thresholds(row['itemid']) is not None
+			and row['total'] >= thresholds(row['itemid'])
+		}
+		owners = {item_id: dupes.TopOwners(top_owners, owner_threshold) for item_id in flagged}
+		for item_ids in utils.chunk(sorted(flagged), utils.BULK_CHUNK_SIZE):
+			item_where, item_params = utils.build_where_clause({"itemid": item_ids})
+			rows = utils.stream_db_rows(
+				self._database_config,
+				"SELECT `itemid`, `characterid`, SUM(`quantity`), COUNT(*) "
+				f"FROM `inventoryitems` {item_where} GROUP BY `itemid`, `characterid` "
+				"HAVING SUM(`quantity`) >= %s",
+				[*item_params, owner_threshold],
+			)
+			for item_id, character_id, quantity, stacks in rows:
+				owners[item_id].add(character_id, int(quantity), stacks)
+		return dupes.rank_findings(
+			dupes.DupeFinding(
+				item_id, int(row['total']), row['stacks'], row['owners'],
+				thresholds(item_id), owners[item_id].ranked(),
+			)
+			for item_id, row in flagged.items()
+		)
+
+	def _name_dupe_owners(self, findings: list[dupes.DupeFinding]) -> list[dupes.DupeFinding]:
+		character_ids = {owner.character_id for finding in findings for owner in finding.top_owners}
+		if not character_ids:
+			return findings
+		names = {}
+		for ids_chunk in utils.chunk(sorted(character_ids), utils.BULK_CHUNK_SIZE):
+			where, params = utils.build_where_clause({"id": ids_chunk})
+			for row in self.get_db_all_hits(
+				f"SELECT `id`, `name` FROM `characters` {where}", params
+			) or ():
+				names[row['id']] = row['name']
+		return [
+			finding._replace(top_owners=[
+				owner._replace(name=names.get(owner.character_id)) for owner in finding.top_owners
+			])
+			for finding in findings
+		]
+
+	@tracing.traced
+	def economy_report(
+		self,
+		concurrency: int=economy.DEFAULT_CONCURRENCY,
+		range_size: int=economy.DEFAULT_RANGE_SIZE,
+	) -> Optional[economy.EconomyReport]:
+		"""Totals the currencies and items in circulation, with parallel range scans
+
+		Splits `characters`, `accounts`, and `inventoryitems` into ranges of
+		their primary keys, and runs one aggregate query per range, up to
+		`concurrency` at once, each on its own pooled connection (served by
+		a replica, if any; see `routing.py`). The partial totals are then
+		added up (see `economy.py`).
+		Since every query checks out a connection from the pool, no more
+		than `pool_size` queries run at once, whatever the concurrency.
+
+		Args:
+
+			concurrency (`int`): Optional; Maximum number of range queries running at once; lower it to spare the game DB. Defaults to `4`
+			range_size (`int`): Optional; Number of primary keys covered by each range query. Defaults to `50000`
+
+		Returns:
+			An `economy.EconomyReport` holding the totals (mesos, NX, Maple
+			Points, VP, DP, characters, accounts), the items by inventory tab,
+			and the time spent on each table, or `None` if any query failed
+
+		Raises:
+			ValueError: Concurrency or range size below 1
+		"""
+		return economy.run_report(
+			functools.partial(utils.get_db_all_hits, self._database_config),
+			concurrency=min(concurrency, self._pool_size),  # More threads would only wait for the pool
+			range_size=range_size,
+		)
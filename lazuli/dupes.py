@@ -0,0 +1,152 @@
+"""This module holds the duplicate-item (dupe) scanner for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+Dupe exploits show up as abnormal amounts of identical items. The scanner
+totals each item over `inventoryitems` (rows, quantity, and distinct
+owners), flags items whose quantity reaches their threshold, and lists the
+owners holding the most of each flagged item. It runs either as `GROUP BY`
+queries (the database does the counting), or as one scan streamed in
+`(itemid, characterid)` order (the client counts one owner at a time, so
+memory only grows with the size of the report, not of the table).
+
+	Typical usage example:
+
+	findings = lazuli.scan_for_dupes({1002140: 5, 1302000: 50}, owner_threshold=2)
+	for finding in findings:  # Most severe first
+		print(finding.item_id, finding.quantity, finding.top_owners[0].name)
+"""
+import heapq
+import itertools
+from typing import Iterable, NamedTuple, Optional
+
+
+class ItemOwner(NamedTuple):
+	"""Represents how much of a flagged item one character holds"""
+	character_id: int
+	quantity: int
+	rows: int
+	name: Optional[str] = None
+
+
+class DupeFinding(NamedTuple):
+	"""Represents an item whose total quantity reached its threshold"""
+	item_id: int
+	quantity: int  # Across all owners
+	rows: int  # `inventoryitems` rows; one per equip, one per stack otherwise
+	owners: int  # Distinct characters holding the item
+	threshold: int
+	top_owners: list[ItemOwner]  # Most first; only those at or above the owner threshold
+
+	@property
+	def severity(self) -> float:
+		"""`float`: Represents the quantity as a multiple of the threshold; reports are ranked by it"""
+		return self.quantity / self.threshold
+
+
+class Thresholds:
+	"""Resolves the threshold of each item: its own, or the default (if any)"""
+
+	def __init__(self, per_item: Optional[dict[int, int]], default: Optional[int]) -> None:
+		self.per_item = dict(per_item or {})
+		self.default = default
+		if not self.per_item and default is None:
+			raise ValueError("Give per-item thresholds, a default threshold, or both!")
+		if any(threshold < 1 for threshold in [*self.per_item.values(), default or 1]):
+			raise ValueError("Thresholds must be at least 1!")
+
+	def __call__(self, item_id: int) -> Optional[int]:
+		return self.per_item.get(item_id, self.default)
+
+	@property
+	def lowest(self) -> int:
+		"""`int`: Represents the lowest threshold; items below it are never flagged"""
+		return min([*self.per_item.values(), *([self.default] if self.default is not None else [])])
+
+	@property
+	def item_ids(self) -> Optional[list[int]]:
+		"""`list[int]`: Represents the only items to scan; `None` (all items) if there is a default"""
+		return None if self.default is not None else sorted(self.per_item)
+
+
+class TopOwners:
+	"""Keeps the owners holding the most of an item, among those at or above the owner threshold"""
+
+	def __init__(self, limit: int, owner_threshold: int) -> None:
+		self._limit = limit
+		self._owner_threshold = owner_threshold
+		self._heap: list[tuple[int, int, int]] = []  # (quantity, -character ID, rows); least first
+
+	def add(self, character_id: int, quantity: int, rows: int) -> None:
+		if quantity < self._owner_threshold or not self._limit:
+			return
+		entry = (quantity, -character_id, rows)
+		if len(self._heap) < self._limit:
+			heapq.heappush(self._heap, entry)
+		elif entry > self._heap[0]:
+			heapq.heapreplace(self._heap, entry)
+
+	def ranked(self) -> list[ItemOwner]:
+		"""Returns the owners kept, most first (lowest character ID first, on ties)"""
+		return [
+			ItemOwner(-negated_id, quantity, rows)
+			for quantity, negated_id, rows in sorted(self._heap, reverse=True)
+		]
+
+
+def rank_findings(findings: Iterable[DupeFinding]) -> list[DupeFinding]:
+	"""Sorts findings, most severe first"""
+	return sorted(findings, key=lambda finding: (-finding.severity, finding.item_id))
+
+
+def scan_sorted_rows(
+	rows: Iterable[tuple[int, int, int]],
+	thresholds: Thresholds,
+	owner_threshold: int=1,
+	top_owners: int=10,
+) -> list[DupeFinding]:
+	"""Finds dupes in rows sorted by item, then by owner, in one pass
+
+	Only the running totals of the current item, the current owner, and
+	the current item's top owners are held, so memory does not grow with
+	the number of rows.
+
+	Args:
+
+		rows (`Iterable[tuple]`): Represents `(itemid, characterid, quantity)` rows, ordered by `itemid`, then `characterid`
+		thresholds (`Thresholds`): Represents the threshold of each item
+		owner_threshold (`int`): Optional; Smallest quantity for an owner to be listed. Defaults to `1`
+		top_owners (`int`): Optional; Maximum number of owners listed per item. Defaults to `10`
+
+	Returns:
+		A `list` of `DupeFinding`, most severe first
+	"""
+	findings = []
+	item_id = owner_id = None
+	quantity = item_rows = owners = 0
+	owner_quantity = owner_rows = 0
+	top = TopOwners(top_owners, owner_threshold)
+
+	for row_item_id, character_id, row_quantity in itertools.chain(rows, [(None, None, 0)]):
+		if character_id != owner_id or row_item_id != item_id:
+			if owner_id is not None:  # Close the previous owner
+				owners += 1
+				top.add(owner_id, owner_quantity, owner_rows)
+			owner_id, owner_quantity, owner_rows = character_id, 0, 0
+		if row_item_id != item_id:
+			threshold = None if item_id is None else thresholds(item_id)
+			if threshold is not None and quantity >= threshold:  # Close the previous item
+				findings.append(DupeFinding(
+					item_id, quantity, item_rows, owners, threshold, top.ranked()
+				))
+			item_id, quantity, item_rows, owners = row_item_id, 0, 0, 0
+			top = TopOwners(top_owners, owner_threshold)
+		row_quantity = row_quantity or 1
+		quantity += row_quantity
+		item_rows += 1
+		owner_quantity += row_quantity
+		owner_rows += 1
+	return rank_findings(findings)
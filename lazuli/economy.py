@@ -0,0 +1,153 @@
+"""This module holds the economy (circulation) report for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+The report totals mesos, NX, Maple Points, VP, and DP in circulation, and
+items by inventory tab. Each table is split into ranges of its primary key,
+and the ranges are scanned in parallel, one aggregate query per range, on
+pooled connections. Every aggregate is a `COUNT` or a `SUM`, so the partial
+results of the ranges combine by addition.
+
+	Typical usage example:
+
+	report = lazuli.economy_report(concurrency=2)  # Go easy on the game DB
+	print(report.totals["meso"], report.items_by_tab["use"]["quantity"])
+	print(f"Scanned {report.ranges} ranges in {report.elapsed:.2f}s")
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from typing import Any, Callable, NamedTuple, Optional
+import lazuli.utility as utils
+
+# Number of range scans running at once, by default
+DEFAULT_CONCURRENCY = 4
+# Number of primary keys covered by each range scan, by default
+DEFAULT_RANGE_SIZE = 50000
+
+Fetch = Callable[[str, list[Any]], Optional[list[dict[str, Any]]]]
+
+
+class TableScan(NamedTuple):
+	"""Represents the aggregates computed over one table"""
+	table: str
+	key: str  # Integer primary key; the table is split into ranges of it
+	select: str  # `COUNT` and `SUM` expressions only; partial results are added up
+	group_by: Optional[str] = None
+
+
+SCANS = (
+	TableScan("characters", "id", "COUNT(*) AS `characters`, SUM(`meso`) AS `meso`"),
+	TableScan(
+		"accounts", "id",
+		"COUNT(*) AS `accounts`, SUM(`nxCash`) AS `nx`, SUM(`mPoints`) AS `maple_points`, "
+		"SUM(`vpoints`) AS `vote_points`, SUM(`realcash`) AS `donation_points`",
+	),
+	TableScan(
+		"inventoryitems", "inventoryitemid",
+		"COUNT(*) AS `stacks`, SUM(`quantity`) AS `quantity`", group_by="inventorytype",
+	),
+)
+
+
+class EconomyReport(NamedTuple):
+	"""Represents the totals of an economy report, and how long they took"""
+	totals: dict[str, int]  # e.g. "meso", "nx", "vote_points", "characters", "accounts"
+	items_by_tab: dict[str, dict[str, int]]  # Tab name (see `utility.MAP_INV_TYPES`) -> "stacks", "quantity"
+	timings: dict[str, float]  # Table -> seconds spent in its range queries (summed across threads)
+	ranges: int  # Number of range queries run
+	elapsed: float  # Wall-clock seconds for the whole report
+
+
+def split_ranges(low: int, high: int, range_size: int) -> list[tuple[int, int]]:
+	"""Splits the keys from `low` to `high` (inclusive) into half-open `[start, end)` ranges"""
+	return [
+		(start, min(start + range_size, high + 1))
+		for start in range(low, high + 1, range_size)
+	]
+
+
+def tab_name(inventory_type: int) -> str:
+	"""`str`: Names an inventory type as in `utility.MAP_INV_TYPES`; unknown types by number"""
+	return utils.get_inv_name_by_type(inventory_type) or str(inventory_type)
+
+
+def run_report(
+	fetch: Fetch,
+	scans: tuple[TableScan, ...]=SCANS,
+	concurrency: int=DEFAULT_CONCURRENCY,
+	range_size: int=DEFAULT_RANGE_SIZE,
+) -> Optional[EconomyReport]:
+	"""Scans every table in parallel ranges, and combines the partial aggregates
+
+	Args:
+
+		fetch (`Callable`): Represents the function running each query; called with the query and its parameters, returning `dict` rows, or `None` on error
+		scans (`tuple[TableScan]`): Optional; Represents the tables and aggregates to scan. Defaults to `SCANS`
+		concurrency (`int`): Optional; Maximum number of queries running at once. Defaults to `DEFAULT_CONCURRENCY`
+		range_size (`int`): Optional; Number of primary keys covered by each range query. Defaults to `DEFAULT_RANGE_SIZE`
+
+	Returns:
+		An `EconomyReport`, or `None` if any query failed (partial totals
+		would understate the economy)
+
+	Raises:
+		ValueError: Concurrency or range size below 1
+	"""
+	if concurrency < 1 or range_size < 1:
+		raise ValueError("Concurrency and range size must be at least 1!")
+	start = time.perf_counter()
+	timings = {scan.table: 0.0 for scan in scans}
+	timings_lock = threading.Lock()
+
+	def timed(scan: TableScan, query: str, params: list[Any]) -> Optional[list[dict[str, Any]]]:
+		query_start = time.perf_counter()
+		rows = fetch(query, params)
+		with timings_lock:  # Ranges of one table finish in several threads
+			timings[scan.table] += time.perf_counter() - query_start
+		return rows
+
+	with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="lazuli-economy") as executor:
+		bounds = [
+			executor.submit(
+				timed, scan,
+				f"SELECT MIN(`{scan.key}`) AS `low`, MAX(`{scan.key}`) AS `high` FROM `{scan.table}`", [],
+			)
+			for scan in scans
+		]
+		partials = []
+		for scan, future in zip(scans, bounds):
+			rows = future.result()
+			if rows is None:
+				return None
+			if not rows or rows[0]['low'] is None:  # Empty table
+				continue
+			group = f"`{scan.group_by}`, " if scan.group_by else ""
+			group_by = f" GROUP BY `{scan.group_by}`" if scan.group_by else ""
+			query = (
+				f"SELECT {group}{scan.select} FROM `{scan.table}` "
+				f"WHERE `{scan.key}` >= %s AND `{scan.key}` < %s{group_by}"
+			)
+			partials.extend(
+				(scan, executor.submit(timed, scan, query, [low, high]))
+				for low, high in split_ranges(rows[0]['low'], rows[0]['high'], range_size)
+			)
+		results = [(scan, future.result()) for scan, future in partials]
+
+	if any(rows is None for _, rows in results):
+		return None
+	totals: dict[str, int] = {}
+	items_by_tab: dict[str, dict[str, int]] = {}
+	for scan, rows in results:
+		for row in rows:
+			if scan.group_by:
+				target = items_by_tab.setdefault(tab_name(row[scan.group_by]), {})
+			else:
+				target = totals
+			for column, value in row.items():
+				if column != scan.group_by:
+					target[column] = target.get(column, 0) + int(value or 0)  # `SUM` gives `Decimal`
+	return EconomyReport(totals, items_by_tab, timings, len(results), time.perf_counter() - start)
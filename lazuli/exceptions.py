@@ -0,0 +1,79 @@
+"""This module holds the exceptions raised by the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+	Typical usage example:
+
+	lazuli = Lazuli(compare_and_set=True)
+	char = lazuli.get_char_by_name("KOOKIIE")
+	try:
+		char.meso = 123456789
+	except ConcurrentUpdateError as e:
+		print(f"{e.column} was changed to {e.actual} in the meantime!")
+"""
+from typing import Any
+
+
+class ConcurrentUpdateError(RuntimeError):
+	"""Raised when a compare-and-set update finds the value changed since it was read
+
+	Only raised when compare-and-set is enabled (see the `compare_and_set`
+	argument of `Lazuli`). Nothing is written when this is raised.
+
+	Attributes:
+
+		table (`str`): Represents the table of the row, e.g. `characters`
+		column (`str`): Represents the column that was to be updated
+		row_id (`int`): Represents the `id` of the row
+		expected (`Any`): Represents the value last read, which the update was conditional on
+		actual (`Any`): Represents the value found in the database instead; `None` if the row no longer exists
+	"""
+
+	def __init__(
+		self,
+		table: str,
+		column: str,
+		row_id: int,
+		expected: Any,
+		actual: Any,
+	) -> None:
+		super().__init__(
+			f"{table}.{column} of row {row_id} was changed concurrently! "
+			f"Expected: {expected!r}; Encountered: {actual!r}"
+		)
+		self.table = table
+		self.column = column
+		self.row_id = row_id
+		self.expected = expected
+		self.actual = actual
+
+
+class PoolExhaustedError(TimeoutError):
+	"""Raised when no pooled connection became free within the pool's timeout
+
+	Every connection of the pool stayed checked out for the whole wait
+	(see the `pool_size` and `pool_timeout` arguments of `Lazuli`). A
+	thread that already holds one of them (e.g. inside `Lazuli::snapshot()`,
+	or while iterating over `utility.stream_db_rows()`) and asks for another
+	would otherwise wait on itself forever.
+
+	Attributes:
+
+		database (`str`): Represents the database of the pool, as `host:port/schema`
+		size (`int`): Represents the maximum number of open connections of the pool
+		timeout (`float`): Represents the seconds waited
+	"""
+
+	def __init__(self, database: str, size: int, timeout: float) -> None:
+		super().__init__(
+			f"Timed out after {timeout}s waiting for a connection to {database}: "
+			f"all {size} pooled connections are checked out! Raise `pool_size`, "
+			"or make sure this thread is not holding one already (e.g. inside "
+			"a snapshot, or an unfinished `stream_db_rows()` iteration)."
+		)
+		self.database = database
+		self.size = size
+		self.timeout = timeout
@@ -5,10 +5,13 @@ Use of this source code is governed by a AGPL-style license that can be found
 in the LICENSE file.
 Refer to database.py or the project wiki on GitHub for usage examples.
 """
+import logging
 from typing import Any, Optional
-import mysql.connector as con
+import lazuli.tracing as tracing
 import lazuli.utility as utils
 
+_logger = logging.getLogger(__name__)
+
 
 class Inventory:
 	"""`Inventory` object; quasi-models AzureMS inventories.
@@ -23,7 +26,13 @@ class Inventory:
 	(aka setter methods).
 	"""
 
-	def __init__(self, character_id: int, db_config: dict[str, str]) -> None:
+	@tracing.traced
+	def __init__(
+		self,
+		character_id: int,
+		db_config: dict[str, str],
+		items: Optional[list[dict[str, Any]]]=None,
+	) -> None:
 		"""`Inventory` object; quasi-models AzureMS inventories.
 
 		Modelled after SwordieDB project's `Inventory` class init method.
@@ -37,12 +46,16 @@ class Inventory:
 
 			character_id (`int`): Represents the foreign key
 			db_config (`dict`): Represents the protected attributes from a `Lazuli` object
+			items (`list[dict]`): Optional; Represents the character's rows in the `inventoryitems` table, if already fetched (e.g. in bulk). Fetched from the database otherwise
 	"""
 		self._character_id = character_id
 		self._database_config = db_config
 
 		# `list[`dict`]`: Represents all inventory/equipped items
-		self._all_items = self.fetch_all_inv_items()
+		if items is not None:
+			self._all_items = items
+		else:
+			self._all_items = self.fetch_all_inv_items()
 
 		self._equip_inv = self.init_equip_items()
 		self._use_inv = self.init_use_inv()
@@ -138,24 +151,12 @@ class Inventory:
 		Returns:
 			A `list` of `dict` representing all inventory/equipped items
 		"""
-		try:
-			database = con.connect(
-				host=self._database_config['host'],
-				user=self._database_config['user'],
-				password=self._database_config['password'],
-				database=self._database_config['schema'],
-				port=self._database_config['port'],
-				charset=self._database_config['charset']
-			)
-			cursor = database.cursor(dictionary=True)
-			cursor.execute(
-				f"SELECT * FROM `inventoryitems` WHERE `characterid` = "
-				f"'{self._character_id}'"
-			)
-			inventory = cursor.fetchall()
-			return inventory
-		except Exception as e:
-			print(f"ERROR: Unable to fetch inventory items\n{e}")
+		# Errors are logged (and `None` returned) by `utility.get_db_all_hits()`
+		return utils.get_db_all_hits(
+			self._database_config,
+			"SELECT * FROM `inventoryitems` WHERE `characterid` = %s",
+			(self._character_id,),
+		)
 
 	def load_inv(self, inv_type: int) -> dict[int, dict[str, Optional[int]]]:
 		"""Given an inventory type, fetch every item associated with it
@@ -201,7 +202,7 @@ class Inventory:
 				# as the key for the dictionary
 			return inv
 		except Exception as e:
-			print(f"ERROR: Unable to load inventory type {inv_type}\n{e}")
+			_logger.error("Unable to load inventory type %s: %s", inv_type, e)
 
 	def init_equip_items(self) -> dict[int, dict[str, Optional[int]]]:
 		"""Extract items belonging to the EQUIP tab from the full list of items"""
@@ -1,22 +1,58 @@
 """Contains the mapping for Job IDs to canonical names
 
-This module looks for a `jobs.yaml` file in the package, and parses it into a
-Python dictionary named `JOBS`. This can be thought of as a non-lazy instantiated singleton.
-Note that if this file cannot be located, an exception is raised. The YAML 
-file used is the same as the one maintained by Team SPIRIT: 
+The job table is maintained as a `jobs.yaml` file in the package, and compiled
+at build time into the `jobs_table` module (run `python -m lazuli.jobs` after
+editing the YAML file), so that it can be loaded without parsing YAML on
+every `import lazuli`. This module exposes the compiled table as:
+
+- `JOBS_BY_ID`: `dict[int, str]` mapping Job IDs to Job names
+- `JOB_BRANCHES`: `dict[str, frozenset[int]]` mapping each job branch (named
+  after its final advancement, e.g. `Hero`) to the IDs of every advancement in
+  that branch, from 1st job onwards
+- `JOB_TREE`: `dict[int, tuple[str, ...]]` mapping each 1st job ID to the
+  branches that stem from it (e.g. `200` (Magician) to the three Mage branches)
+- `JOBS`: `dict[str, str]`; the same mapping as `JOBS_BY_ID`, keyed by `str`
+  (kept for backwards compatibility)
+
+The YAML file used is the same as the one maintained by Team SPIRIT:
 https://github.com/TEAM-SPIRIT-Productions/MapleStoryJobIDs
 
 See the parser docs here:
 https://yaml.readthedocs.io/en/latest/index.html
 """
-from importlib.abc import Traversable
-import importlib.resources
-from pathlib import Path
+from typing import TYPE_CHECKING
+from lazuli.jobs_table import JOBS_BY_ID, JOB_BRANCHES, JOB_TREE
+
+if TYPE_CHECKING:  # `importlib.resources` is slow to import; see `get_yaml_file`
+    from importlib.abc import Traversable
+
+YAML_FILE_NAME = "jobs.yaml"
+TABLE_FILE_NAME = "jobs_table.py"
+
+JOBS: dict[str, str] = {str(job_id): name for job_id, name in JOBS_BY_ID.items()}
 
-from ruamel.yaml import YAML
+# Branches whose 1st job breaks the usual `branch ID // 10 * 100` convention,
+# keyed by branch ID (i.e. Job ID // 10)
+_FIRST_JOB_OVERRIDES = {
+    33: 301,  # Pathfinder
+    53: 501,  # Cannoneer
+    57: 508,  # Jett
+    312: 3101,  # Demon Avenger
+}
 
 
-def get_yaml_file(file_name: str) -> Traversable:
+def get_branch_job_ids(branch: str) -> frozenset[int]:
+    """Returns the IDs of every advancement in a job branch, e.g. `Hero`
+
+    Raises:
+        KeyError: Unknown job branch
+    """
+    return JOB_BRANCHES[branch]
+
+
+def get_yaml_file(file_name: str) -> "Traversable":
+    import importlib.resources  # pylint: disable=import-outside-toplevel
+
     # Note: `importlib.resources.files` will only work when lazuli is imported as a package
     package_files = importlib.resources.files("lazuli")
     yaml_file = package_files.joinpath(file_name)
@@ -26,9 +62,12 @@ def get_yaml_file(file_name: str) -> Traversable:
 
 
 def parse_yaml_file(file_name: str) -> dict:
+    # Build-time only; `ruamel.yaml` is not a runtime dependency
+    from ruamel.yaml import YAML  # pylint: disable=import-outside-toplevel
+
     # Create YAML parser object
     yaml = YAML(typ="safe", pure=True)
-    
+
     with open(get_yaml_file(file_name), "r", encoding="utf-8") as yaml_file:
         contents = yaml.load(yaml_file)
         if contents is None:
@@ -36,5 +75,81 @@ def parse_yaml_file(file_name: str) -> dict:
     return contents
 
 
-YAML_FILE_NAME = "jobs.yaml"
-JOBS: dict[str, str] = parse_yaml_file(YAML_FILE_NAME)
+def compile_job_table(
+    contents: dict,
+) -> tuple[dict[int, str], dict[str, frozenset[int]], dict[int, tuple[str, ...]]]:
+    """Converts the parsed YAML file into `(JOBS_BY_ID, JOB_BRANCHES, JOB_TREE)`
+
+    Beginner jobs (`Job ID % 1000 < 100`) are shared by several branches, so
+    they are not part of any branch. 2nd job onwards share the branch ID
+    `Job ID // 10`; 1st jobs that no branch stems from form a branch of
+    their own.
+    """
+    jobs_by_id = {int(job_id): name for job_id, name in contents.items()}
+
+    members_by_branch: dict[int, list[int]] = {}
+    for job_id in jobs_by_id:
+        if job_id % 1000 >= 100 and job_id % 100 >= 10:
+            members_by_branch.setdefault(job_id // 10, []).append(job_id)
+
+    branches: dict[str, frozenset[int]] = {}
+    tree: dict[int, list[str]] = {}
+    for branch_id, members in sorted(members_by_branch.items()):
+        first_job = _FIRST_JOB_OVERRIDES.get(branch_id, branch_id // 10 * 100)
+        if first_job in jobs_by_id:
+            members.append(first_job)
+        name = jobs_by_id[max(members)]
+        if name in branches:
+            raise ValueError(f"Job branch {name} is defined twice!")
+        branches[name] = frozenset(members)
+        tree.setdefault(first_job, []).append(name)
+
+    for job_id, name in sorted(jobs_by_id.items()):
+        is_first_job = job_id % 1000 >= 100 and job_id % 100 < 10
+        if is_first_job and job_id not in tree and name not in branches:
+            branches[name] = frozenset([job_id])
+            tree[job_id] = [name]
+
+    return (
+        jobs_by_id,
+        branches,
+        {job_id: tuple(names) for job_id, names in sorted(tree.items())},
+    )
+
+
+def write_job_table(file_name: str=YAML_FILE_NAME) -> str:
+    """Compiles the YAML file into the `jobs_table` module; returns its path"""
+    jobs_by_id, branches, tree = compile_job_table(parse_yaml_file(file_name))
+    lines = [
+        '"""Compiled job table for the lazuli package - DO NOT EDIT',
+        "",
+        f"Generated from `{file_name}` by `python -m lazuli.jobs`.",
+        "See `jobs.py` for what each mapping holds.",
+        '"""',
+        "",
+        "JOBS_BY_ID: dict[int, str] = {",
+        *(f"\t{job_id}: {name!r}," for job_id, name in jobs_by_id.items()),
+        "}",
+        "",
+        "JOB_BRANCHES: dict[str, frozenset[int]] = {",
+        *(
+            f"\t{name!r}: frozenset({sorted(job_ids)!r}),"
+            for name, job_ids in branches.items()
+        ),
+        "}",
+        "",
+        "JOB_TREE: dict[int, tuple[str, ...]] = {",
+        *(f"\t{job_id}: {names!r}," for job_id, names in tree.items()),
+        "}",
+        "",
+    ]
+    import importlib.resources  # pylint: disable=import-outside-toplevel
+
+    table_file = importlib.resources.files("lazuli").joinpath(TABLE_FILE_NAME)
+    with open(table_file, "w", encoding="utf-8", newline="\n") as output:
+        output.write("\n".join(lines))
+    return str(table_file)
+
+
+if __name__ == "__main__":
+    print(f"Job table written to {write_job_table()}")
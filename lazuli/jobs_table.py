@@ -0,0 +1,344 @@
+"""Compiled job table for the lazuli package - DO NOT EDIT
+
+Generated from `jobs.yaml` by `python -m lazuli.jobs`.
+See `jobs.py` for what each mapping holds.
+"""
+
+JOBS_BY_ID: dict[int, str] = {
+	0: 'Beginner',
+	100: 'Warrior',
+	110: 'Fighter',
+	111: 'Crusader',
+	112: 'Hero',
+	120: 'Page',
+	121: 'White Knight',
+	122: 'Paladin',
+	130: 'Spearman',
+	131: 'Dragon Knight',
+	132: 'Dark Knight',
+	200: 'Magician',
+	210: 'Fire Poison Wizard',
+	211: 'Fire Poison Mage',
+	212: 'Fire Poison Archmage',
+	220: 'Ice Lightning Wizard',
+	221: 'Ice Lightning Mage',
+	222: 'Ice Lightning Archmage',
+	230: 'Cleric',
+	231: 'Priest',
+	232: 'Bishop',
+	300: 'Archer',
+	310: 'Hunter',
+	311: 'Ranger',
+	312: 'Bowmaster',
+	320: 'Cross Bowman',
+	321: 'Sniper',
+	322: 'Marksman',
+	301: 'Pathfinder',
+	330: 'Pathfinder',
+	331: 'Pathfinder',
+	332: 'Pathfinder',
+	400: 'Rogue',
+	410: 'Assassin',
+	411: 'Hermit',
+	412: 'Night Lord',
+	420: 'Bandit',
+	421: 'Chief Bandit',
+	422: 'Shadower',
+	430: 'Blade Recruit',
+	431: 'Blade Acolyte',
+	432: 'Blade Specialist',
+	433: 'Blade Lord',
+	434: 'Blade Master',
+	500: 'Pirate',
+	510: 'Brawler',
+	511: 'Marauder',
+	512: 'Buccaneer',
+	520: 'Gunslinger',
+	521: 'Outlaw',
+	522: 'Corsair',
+	501: 'Cannon Shooter',
+	530: 'Cannoneer',
+	531: 'Cannon Trooper',
+	532: 'Cannon Master',
+	508: 'Jett',
+	570: 'Jett',
+	571: 'Jett',
+	572: 'Jett',
+	1000: 'Noblesse',
+	1100: 'Dawn Warrior',
+	1110: 'Dawn Warrior',
+	1111: 'Dawn Warrior',
+	1112: 'Dawn Warrior',
+	1200: 'Blaze Wizard',
+	1210: 'Blaze Wizard',
+	1211: 'Blaze Wizard',
+	1212: 'Blaze Wizard',
+	1300: 'Wind Archer',
+	1310: 'Wind Archer',
+	1311: 'Wind Archer',
+	1312: 'Wind Archer',
+	1400: 'Night Walker',
+	1410: 'Night Walker',
+	1411: 'Night Walker',
+	1412: 'Night Walker',
+	1500: 'Thunder Breaker',
+	1510: 'Thunder Breaker',
+	1511: 'Thunder Breaker',
+	1512: 'Thunder Breaker',
+	2000: 'Aran',
+	2100: 'Aran',
+	2110: 'Aran',
+	2111: 'Aran',
+	2112: 'Aran',
+	2001: 'Evan',
+	2200: 'Evan',
+	2210: 'Evan',
+	2211: 'Evan',
+	2212: 'Evan',
+	2213: 'Evan',
+	2214: 'Evan',
+	2215: 'Evan',
+	2216: 'Evan',
+	2217: 'Evan',
+	2218: 'Evan',
+	2002: 'Mercedes',
+	2300: 'Mercedes',
+	2310: 'Mercedes',
+	2311: 'Mercedes',
+	2312: 'Mercedes',
+	2003: 'Phantom',
+	2400: 'Phantom',
+	2410: 'Phantom',
+	2411: 'Phantom',
+	2412: 'Phantom',
+	2005: 'Shade',
+	2500: 'Shade',
+	2510: 'Shade',
+	2511: 'Shade',
+	2512: 'Shade',
+	2004: 'Luminous',
+	2700: 'Luminous',
+	2710: 'Luminous',
+	2711: 'Luminous',
+	2712: 'Luminous',
+	3000: 'Citizen',
+	3001: 'Demon',
+	3100: 'Demon Slayer',
+	3110: 'Demon Slayer',
+	3111: 'Demon Slayer',
+	3112: 'Demon Slayer',
+	3101: 'Demon Avenger',
+	3120: 'Demon Avenger',
+	3121: 'Demon Avenger',
+	3122: 'Demon Avenger',
+	3200: 'Battle Mage',
+	3210: 'Battle Mage',
+	3211: 'Battle Mage',
+	3212: 'Battle Mage',
+	3300: 'Wild Hunter',
+	3310: 'Wild Hunter',
+	3311: 'Wild Hunter',
+	3312: 'Wild Hunter',
+	3500: 'Mechanic',
+	3510: 'Mechanic',
+	3511: 'Mechanic',
+	3512: 'Mechanic',
+	3002: 'Xenon',
+	3600: 'Xenon',
+	3610: 'Xenon',
+	3611: 'Xenon',
+	3612: 'Xenon',
+	3700: 'Blaster',
+	3710: 'Blaster',
+	3711: 'Blaster',
+	3712: 'Blaster',
+	4001: 'Hayato',
+	4100: 'Hayato',
+	4110: 'Hayato',
+	4111: 'Hayato',
+	4112: 'Hayato',
+	4002: 'Kanna',
+	4200: 'Kanna',
+	4210: 'Kanna',
+	4211: 'Kanna',
+	4212: 'Kanna',
+	5000: 'Mihile',
+	5100: 'Mihile',
+	5110: 'Mihile',
+	5111: 'Mihile',
+	5112: 'Mihile',
+	6000: 'Kaiser',
+	6100: 'Kaiser',
+	6110: 'Kaiser',
+	6111: 'Kaiser',
+	6112: 'Kaiser',
+	6001: 'Angelic Buster',
+	6500: 'Angelic Buster',
+	6510: 'Angelic Buster',
+	6511: 'Angelic Buster',
+	6512: 'Angelic Buster',
+	6002: 'Cadena',
+	6400: 'Cadena',
+	6410: 'Cadena',
+	6411: 'Cadena',
+	6412: 'Cadena',
+	6003: 'Kain',
+	6300: 'Kain',
+	6310: 'Kain',
+	6311: 'Kain',
+	6312: 'Kain',
+	10000: 'Zero',
+	10100: 'Zero',
+	10110: 'Zero',
+	10111: 'Zero',
+	10112: 'Zero',
+	11000: 'Beast Tamer',
+	11200: 'Beast Tamer',
+	11210: 'Beast Tamer',
+	11211: 'Beast Tamer',
+	11212: 'Beast Tamer',
+	14000: 'Kinesis',
+	14200: 'Kinesis',
+	14210: 'Kinesis',
+	14211: 'Kinesis',
+	14212: 'Kinesis',
+	15000: 'Illium',
+	15200: 'Illium',
+	15210: 'Illium',
+	15211: 'Illium',
+	15212: 'Illium',
+	15001: 'Ark',
+	15500: 'Ark',
+	15510: 'Ark',
+	15511: 'Ark',
+	15512: 'Ark',
+	15002: 'Adele',
+	15100: 'Adele',
+	15110: 'Adele',
+	15111: 'Adele',
+	15112: 'Adele',
+	16000: 'Hoyoung',
+	16400: 'Hoyoung',
+	16410: 'Hoyoung',
+	16411: 'Hoyoung',
+	16412: 'Hoyoung',
+	16001: 'Lara',
+	16200: 'Lara',
+	16210: 'Lara',
+	16211: 'Lara',
+	16212: 'Lara',
+	800: 'Manager',
+	900: 'GM',
+	910: 'Super GM',
+	8000: 'Riding Skills',
+	9000: 'Additional Skills',
+	40000: 'V-Skills',
+	13000: 'Pink Bean',
+	13100: 'Pink Bean',
+	13001: 'Yeti',
+	13500: 'Yeti',
+}
+
+JOB_BRANCHES: dict[str, frozenset[int]] = {
+	'Hero': frozenset([100, 110, 111, 112]),
+	'Paladin': frozenset([100, 120, 121, 122]),
+	'Dark Knight': frozenset([100, 130, 131, 132]),
+	'Fire Poison Archmage': frozenset([200, 210, 211, 212]),
+	'Ice Lightning Archmage': frozenset([200, 220, 221, 222]),
+	'Bishop': frozenset([200, 230, 231, 232]),
+	'Bowmaster': frozenset([300, 310, 311, 312]),
+	'Marksman': frozenset([300, 320, 321, 322]),
+	'Pathfinder': frozenset([301, 330, 331, 332]),
+	'Night Lord': frozenset([400, 410, 411, 412]),
+	'Shadower': frozenset([400, 420, 421, 422]),
+	'Blade Master': frozenset([400, 430, 431, 432, 433, 434]),
+	'Buccaneer': frozenset([500, 510, 511, 512]),
+	'Corsair': frozenset([500, 520, 521, 522]),
+	'Cannon Master': frozenset([501, 530, 531, 532]),
+	'Jett': frozenset([508, 570, 571, 572]),
+	'Super GM': frozenset([900, 910]),
+	'Dawn Warrior': frozenset([1100, 1110, 1111, 1112]),
+	'Blaze Wizard': frozenset([1200, 1210, 1211, 1212]),
+	'Wind Archer': frozenset([1300, 1310, 1311, 1312]),
+	'Night Walker': frozenset([1400, 1410, 1411, 1412]),
+	'Thunder Breaker': frozenset([1500, 1510, 1511, 1512]),
+	'Aran': frozenset([2100, 2110, 2111, 2112]),
+	'Evan': frozenset([2200, 2210, 2211, 2212, 2213, 2214, 2215, 2216, 2217, 2218]),
+	'Mercedes': frozenset([2300, 2310, 2311, 2312]),
+	'Phantom': frozenset([2400, 2410, 2411, 2412]),
+	'Shade': frozenset([2500, 2510, 2511, 2512]),
+	'Luminous': frozenset([2700, 2710, 2711, 2712]),
+	'Demon Slayer': frozenset([3100, 3110, 3111, 3112]),
+	'Demon Avenger': frozenset([3101, 3120, 3121, 3122]),
+	'Battle Mage': frozenset([3200, 3210, 3211, 3212]),
+	'Wild Hunter': frozenset([3300, 3310, 3311, 3312]),
+	'Mechanic': frozenset([3500, 3510, 3511, 3512]),
+	'Xenon': frozenset([3600, 3610, 3611, 3612]),
+	'Blaster': frozenset([3700, 3710, 3711, 3712]),
+	'Hayato': frozenset([4100, 4110, 4111, 4112]),
+	'Kanna': frozenset([4200, 4210, 4211, 4212]),
+	'Mihile': frozenset([5100, 5110, 5111, 5112]),
+	'Kaiser': frozenset([6100, 6110, 6111, 6112]),
+	'Kain': frozenset([6300, 6310, 6311, 6312]),
+	'Cadena': frozenset([6400, 6410, 6411, 6412]),
+	'Angelic Buster': frozenset([6500, 6510, 6511, 6512]),
+	'Zero': frozenset([10100, 10110, 10111, 10112]),
+	'Beast Tamer': frozenset([11200, 11210, 11211, 11212]),
+	'Kinesis': frozenset([14200, 14210, 14211, 14212]),
+	'Adele': frozenset([15100, 15110, 15111, 15112]),
+	'Illium': frozenset([15200, 15210, 15211, 15212]),
+	'Ark': frozenset([15500, 15510, 15511, 15512]),
+	'Lara': frozenset([16200, 16210, 16211, 16212]),
+	'Hoyoung': frozenset([16400, 16410, 16411, 16412]),
+	'Manager': frozenset([800]),
+	'Pink Bean': frozenset([13100]),
+	'Yeti': frozenset([13500]),
+}
+
+JOB_TREE: dict[int, tuple[str, ...]] = {
+	100: ('Hero', 'Paladin', 'Dark Knight'),
+	200: ('Fire Poison Archmage', 'Ice Lightning Archmage', 'Bishop'),
+	300: ('Bowmaster', 'Marksman'),
+	301: ('Pathfinder',),
+	400: ('Night Lord', 'Shadower', 'Blade Master'),
+	500: ('Buccaneer', 'Corsair'),
+	501: ('Cannon Master',),
+	508: ('Jett',),
+	800: ('Manager',),
+	900: ('Super GM',),
+	1100: ('Dawn Warrior',),
+	1200: ('Blaze Wizard',),
+	1300: ('Wind Archer',),
+	1400: ('Night Walker',),
+	1500: ('Thunder Breaker',),
+	2100: ('Aran',),
+	2200: ('Evan',),
+	2300: ('Mercedes',),
+	2400: ('Phantom',),
+	2500: ('Shade',),
+	2700: ('Luminous',),
+	3100: ('Demon Slayer',),
+	3101: ('Demon Avenger',),
+	3200: ('Battle Mage',),
+	3300: ('Wild Hunter',),
+	3500: ('Mechanic',),
+	3600: ('Xenon',),
+	3700: ('Blaster',),
+	4100: ('Hayato',),
+	4200: ('Kanna',),
+	5100: ('Mihile',),
+	6100: ('Kaiser',),
+	6300: ('Kain',),
+	6400: ('Cadena',),
+	6500: ('Angelic Buster',),
+	10100: ('Zero',),
+	11200: ('Beast Tamer',),
+	13100: ('Pink Bean',),
+	13500: ('Yeti',),
+	14200: ('Kinesis',),
+	15100: ('Adele',),
+	15200: ('Illium',),
+	15500: ('Ark',),
+	16200: ('Lara',),
+	16400: ('Hoyoung',),
+}
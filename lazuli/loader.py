@@ -0,0 +1,142 @@
+"""This module holds the BatchLoader class for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+	Typical usage example:
+
+	loader = lazuli.batch_loader()
+	# Both lookups are dispatched together, as one `IN (...)` query:
+	char_1, char_2 = await asyncio.gather(
+		loader.load_char("KOOKIIE"),
+		loader.load_char("Brandon"),
+	)
+"""
+import functools
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Optional
+from lazuli.account import Account
+from lazuli.character import Character
+from lazuli.inventory import Inventory
+
+if TYPE_CHECKING:
+	import asyncio  # Slow to import; only imported once a request is awaited
+	from lazuli.database import Lazuli
+
+CHARACTER_BY_NAME = "character_by_name"
+ACCOUNT_BY_ID = "account_by_id"
+INVENTORY_BY_CHARACTER_ID = "inventory_by_character_id"
+
+
+class BatchLoader:
+	"""`BatchLoader` object; DataLoader-style automatic batching of fetches.
+
+	Requests awaited in the same event-loop tick are queued instead of being
+	sent one by one. At the end of the tick, each kind of request is
+	dispatched as a single bulk fetch (see `Lazuli::get_chars_by_names()`,
+	`Lazuli::get_accounts_by_ids()`, and `Lazuli::get_invs_by_char_ids()`),
+	run in the event loop's default executor, and every awaiting caller is
+	resolved with its own result. Duplicate keys within a tick share one
+	result. Nothing is cached across ticks. If a bulk fetch fails, every
+	caller of the batch gets its exception, rather than `None` ("not found").
+
+	Use `Lazuli::batch_loader()` rather than this class's constructor.
+	"""
+
+	def __init__(self, lazuli: "Lazuli") -> None:
+		"""Creates a loader dispatching its batches through the given `Lazuli`
+
+		Args:
+
+			lazuli (`Lazuli`): Represents the database to fetch from
+		"""
+		self._lazuli = lazuli
+		self._fetchers: dict[str, Callable[[list], dict]] = {
+			CHARACTER_BY_NAME: functools.partial(lazuli.get_chars_by_names, strict=True),
+			ACCOUNT_BY_ID: functools.partial(lazuli.get_accounts_by_ids, strict=True),
+			INVENTORY_BY_CHARACTER_ID: functools.partial(lazuli.get_invs_by_char_ids, strict=True),
+		}
+		# Requests queued in the current tick, per event loop:
+		# {loop: {kind: {key: future}}}
+		self._pending: dict[
+			"asyncio.AbstractEventLoop", dict[str, dict[Hashable, "asyncio.Future"]]
+		] = {}
+		# Dispatches in progress; the event loop only keeps weak references to tasks
+		self._tasks: set["asyncio.Task"] = set()
+
+	async def load_char(self, char_name: str) -> Optional[Character]:
+		"""Fetch a `Character` by name, batched with the rest of the tick
+
+		Args:
+
+			char_name (`str`): Represents the character name (aka IGN)
+
+		Returns:
+			A `Character` object, or `None` if no such character exists
+		"""
+		return await self._load(CHARACTER_BY_NAME, char_name)
+
+	async def load_account(self, account_id: int) -> Optional[Account]:
+		"""Fetch an `Account` by ID, batched with the rest of the tick
+
+		Args:
+
+			account_id (`int`): Represents the account ID
+
+		Returns:
+			An `Account` object, or `None` if no such account exists
+		"""
+		return await self._load(ACCOUNT_BY_ID, account_id)
+
+	async def load_inv(self, character_id: int) -> Optional[Inventory]:
+		"""Fetch an `Inventory` by character ID, batched with the rest of the tick
+
+		Args:
+
+			character_id (`int`): Represents the character ID
+
+		Returns:
+			An `Inventory` object
+		"""
+		return await self._load(INVENTORY_BY_CHARACTER_ID, character_id)
+
+	async def _load(self, kind: str, key: Hashable) -> Any:
+		import asyncio  # pylint: disable=import-outside-toplevel
+		loop = asyncio.get_running_loop()
+		pending = self._pending.get(loop)
+		if pending is None:
+			# First request of this tick; dispatch once the tick is over
+			pending = self._pending[loop] = {}
+			loop.call_soon(self._dispatch_all, loop)
+		futures = pending.setdefault(kind, {})
+		future = futures.get(key)
+		if future is None:
+			future = futures[key] = loop.create_future()
+		return await asyncio.shield(future)
+
+	def _dispatch_all(self, loop: "asyncio.AbstractEventLoop") -> None:
+		pending = self._pending.pop(loop)
+		for kind, futures in pending.items():
+			task = loop.create_task(self._dispatch(loop, kind, futures))
+			self._tasks.add(task)
+			task.add_done_callback(self._tasks.discard)
+
+	async def _dispatch(
+		self,
+		loop: "asyncio.AbstractEventLoop",
+		kind: str,
+		futures: dict[Hashable, "asyncio.Future"],
+	) -> None:
+		try:
+			results = await loop.run_in_executor(
+				None, self._fetchers[kind], list(futures)
+			)
+		except Exception as e:  # pylint: disable=broad-except
+			for future in futures.values():
+				if not future.done():
+					future.set_exception(e)
+			return
+		for key, future in futures.items():
+			if not future.done():
+				future.set_result(results.get(key))
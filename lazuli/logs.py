@@ -0,0 +1,82 @@
+"""This module holds the logging helpers for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+Every module of the package logs to a child of the `lazuli` logger.
+Successful operations are only logged at `DEBUG` level (along with the
+timing of every query), so nothing is output on success by default; errors
+are logged at `ERROR`/`CRITICAL` level. Configure the `lazuli` logger like
+any other, or use `enable_json_logging()` for one JSON object per line.
+
+	Typical usage example:
+
+	logs.enable_json_logging(logging.DEBUG)
+	lazuli.get_level_ranking()
+	# {"time": "...", "level": "DEBUG", "logger": "lazuli.utility",
+	#  "message": "fetch took 1.52 ms", "operation": "fetch",
+	#  "query": "SELECT `name`, `level` FROM ...", "duration_ms": 1.52, "rows": 5}
+"""
+import datetime
+import json
+import logging
+import sys
+from typing import Any, Optional, TextIO
+
+# Attributes of every `logging.LogRecord`; anything else was passed as `extra`
+_RECORD_ATTRIBUTES = frozenset(
+	logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+	"""`JsonFormatter` object; formats log records as one JSON object per line.
+
+	Each object holds the time, level, logger name and message of the
+	record, followed by any fields passed through `extra` - for queries,
+	`operation`, `query`, `duration_ms`, and `rows`. Values that are not
+	JSON-serialisable are converted with `str`.
+	"""
+
+	def format(self, record: logging.LogRecord) -> str:
+		entry: dict[str, Any] = {
+			"time": datetime.datetime.fromtimestamp(
+				record.created, datetime.timezone.utc
+			).isoformat(),
+			"level": record.levelname,
+			"logger": record.name,
+			"message": record.getMessage(),
+		}
+		for key, value in record.__dict__.items():
+			if key not in _RECORD_ATTRIBUTES:
+				entry[key] = value
+		if record.exc_info:
+			entry["exception"] = self.formatException(record.exc_info)
+		return json.dumps(entry, default=str)
+
+
+def enable_json_logging(
+	level: int=logging.INFO,
+	stream: Optional[TextIO]=None,
+) -> logging.Handler:
+	"""Outputs the package's log records as JSON lines
+
+	Adds a handler with a `JsonFormatter` to the `lazuli` logger. Use
+	`logging.DEBUG` to include successful operations and query timings.
+
+	Args:
+
+		level (`int`): Optional; Lowest level to output. Defaults to `logging.INFO`
+		stream (`TextIO`): Optional; Where to write the records. Defaults to `sys.stderr`
+
+	Returns:
+		The `logging.Handler` added; pass it to `logging.getLogger("lazuli").removeHandler()` to undo
+	"""
+	handler = logging.StreamHandler(stream or sys.stderr)
+	handler.setFormatter(JsonFormatter())
+	logger = logging.getLogger("lazuli")
+	logger.addHandler(handler)
+	logger.setLevel(level)
+	return handler
@@ -0,0 +1,312 @@
+"""This module holds the Prometheus-format metrics for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+Metrics are disabled by default; while disabled, each instrumented call
+site costs a single flag check. Once enabled, the package tracks:
+
+- `lazuli_queries_total`, `lazuli_query_duration_seconds` and
+  `lazuli_query_rows_total`, per operation and query template
+- `lazuli_query_errors_total`, per operation
+- `lazuli_pool_connections` (idle/in use), `lazuli_pool_size`,
+  `lazuli_pool_wait_seconds` and `lazuli_pool_timeouts_total`, per database
+- `lazuli_cache_requests_total` (hit/miss) and `lazuli_cache_hit_ratio`,
+  per cache (e.g. `single_flight`)
+
+Query templates are the SQL text with literals replaced by `?`, and
+`IN (...)` lists collapsed, so that each distinct statement shape is one
+series; past `MAX_TEMPLATES` shapes, further ones are counted as `other`.
+
+	Typical usage example:
+
+	metrics.enable()
+	metrics.start_http_server(9464)  # Serves http://127.0.0.1:9464/metrics
+	# ... or render the metrics yourself:
+	text = metrics.render()
+"""
+import functools
+import re
+import threading
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+	from http.server import ThreadingHTTPServer
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+	0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Maximum number of distinct query templates tracked
+MAX_TEMPLATES = 500
+OTHER_TEMPLATE = "other"
+
+_STRING_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERALS = re.compile(r"(?<![\w`])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_enabled = False
+_lock = threading.Lock()
+
+
+class _Histogram:
+	"""Represents one histogram series: cumulative bucket counts, sum and count"""
+
+	__slots__ = ("buckets", "total", "count")
+
+	def __init__(self) -> None:
+		self.buckets = [0] * len(LATENCY_BUCKETS)
+		self.total = 0.0
+		self.count = 0
+
+	def observe(self, value: float) -> None:
+		for index, bound in enumerate(LATENCY_BUCKETS):
+			if value <= bound:
+				self.buckets[index] += 1
+		self.total += value
+		self.count += 1
+
+
+# Series, keyed by their label values
+_queries: dict[tuple[str, str], int] = {}
+_query_rows: dict[tuple[str, str], int] = {}
+_query_durations: dict[tuple[str, str], _Histogram] = {}
+_query_errors: dict[str, int] = {}
+_pool_waits: dict[str, _Histogram] = {}
+_pool_timeouts: dict[str, int] = {}
+_cache_requests: dict[tuple[str, str], int] = {}
+
+
+def is_enabled() -> bool:
+	"""Returns whether metrics are being collected"""
+	return _enabled
+
+
+def enable() -> None:
+	"""Starts collecting metrics"""
+	global _enabled
+	_enabled = True
+
+
+def disable() -> None:
+	"""Stops collecting metrics; those collected so far are kept"""
+	global _enabled
+	_enabled = False
+
+
+def reset() -> None:
+	"""Discards all metrics collected so far"""
+	with _lock:
+		for series in (
+			_queries, _query_rows, _query_durations, _query_errors,
+			_pool_waits, _pool_timeouts, _cache_requests,
+		):
+			series.clear()
+	query_template.cache_clear()
+
+
+@functools.lru_cache(maxsize=4096)
+def query_template(query: str) -> str:
+	"""Reduces a query to its shape: literals become `?`, and `IN` lists `(...)`
+
+	Args:
+
+		query (`str`): Represents the SQL text of a query
+
+	Returns:
+		A `str`, representing the query template
+	"""
+	template = _STRING_LITERALS.sub("?", query)
+	template = _NUMBER_LITERALS.sub("?", template)
+	template = _PLACEHOLDER_LISTS.sub("(...)", template)
+	return _WHITESPACE.sub(" ", template).strip()
+
+
+def record_query(operation: str, query: Optional[str], duration: float, rows: int) -> None:
+	"""Records a successful query
+
+	Args:
+
+		operation (`str`): Represents the kind of query, e.g. `fetch` or `write`
+		query (`str`): Represents the SQL text of the query
+		duration (`float`): Represents the time taken, in seconds
+		rows (`int`): Represents the number of rows fetched or affected
+	"""
+	if not _enabled:
+		return
+	template = query_template(query) if query else ""
+	with _lock:
+		key = (operation, template)
+		if key not in _queries and len(_queries) >= MAX_TEMPLATES:
+			key = (operation, OTHER_TEMPLATE)
+		_queries[key] = _queries.get(key, 0) + 1
+		_query_rows[key] = _query_rows.get(key, 0) + max(rows, 0)
+		histogram = _query_durations.get(key)
+		if histogram is None:
+			histogram = _query_durations[key] = _Histogram()
+		histogram.observe(duration)
+
+
+def record_error(operation: str) -> None:
+	"""Records a failed query
+
+	Args:
+
+		operation (`str`): Represents the kind of query, e.g. `fetch` or `write`
+	"""
+	if not _enabled:
+		return
+	with _lock:
+		_query_errors[operation] = _query_errors.get(operation, 0) + 1
+
+
+def record_pool_wait(database: str, duration: float, timed_out: bool=False) -> None:
+	"""Records the time taken to check out a pooled connection
+
+	Args:
+
+		database (`str`): Represents the database of the pool, as `host:port/schema`
+		duration (`float`): Represents the time spent waiting, in seconds
+		timed_out (`bool`): Optional; Whether the wait timed out. Defaults to `False`
+	"""
+	if not _enabled:
+		return
+	with _lock:
+		histogram = _pool_waits.get(database)
+		if histogram is None:
+			histogram = _pool_waits[database] = _Histogram()
+		histogram.observe(duration)
+		if timed_out:
+			_pool_timeouts[database] = _pool_timeouts.get(database, 0) + 1
+
+
+def record_cache(cache: str, hit: bool) -> None:
+	"""Records a cache lookup
+
+	Args:
+
+		cache (`str`): Represents the name of the cache, e.g. `single_flight`
+		hit (`bool`): Represents whether the lookup was served by the cache
+	"""
+	if not _enabled:
+		return
+	key = (cache, "hit" if hit else "miss")
+	with _lock:
+		_cache_requests[key] = _cache_requests.get(key, 0) + 1
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+	return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _header(name: str, kind: str, help_text: str) -> list[str]:
+	return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def _histogram_lines(name: str, labels: dict[str, str], histogram: _Histogram) -> Iterable[str]:
+	for bound, count in zip(LATENCY_BUCKETS, histogram.buckets):
+		yield f"{name}_bucket{_labels(**labels, le=repr(bound))} {count}"
+	yield f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}"
+	yield f"{name}_sum{_labels(**labels)} {histogram.total!r}"
+	yield f"{name}_count{_labels(**labels)} {histogram.count}"
+
+
+def render() -> str:
+	"""Renders all metrics in the Prometheus text exposition format (version 0.0.4)
+
+	Returns:
+		A `str`, ready to be served with the content type
+		`text/plain; version=0.0.4`
+	"""
+	import lazuli.utility as utils  # pylint: disable=import-outside-toplevel
+
+	lines: list[str] = []
+	with _lock:
+		lines += _header("lazuli_queries_total", "counter", "Queries executed, per operation and query template.")
+		for (operation, template), count in _queries.items():
+			lines.append(f"lazuli_queries_total{_labels(operation=operation, template=template)} {count}")
+		lines += _header("lazuli_query_rows_total", "counter", "Rows fetched or affected, per operation and query template.")
+		for (operation, template), count in _query_rows.items():
+			lines.append(f"lazuli_query_rows_total{_labels(operation=operation, template=template)} {count}")
+		lines += _header("lazuli_query_duration_seconds", "histogram", "Query latency, per operation and query template.")
+		for (operation, template), histogram in _query_durations.items():
+			lines += _histogram_lines(
+				"lazuli_query_duration_seconds", {"operation": operation, "template": template}, histogram
+			)
+		lines += _header("lazuli_query_errors_total", "counter", "Failed queries, per operation.")
+		for operation, count in _query_errors.items():
+			lines.append(f"lazuli_query_errors_total{_labels(operation=operation)} {count}")
+		lines += _header("lazuli_pool_wait_seconds", "histogram", "Time spent checking out a pooled connection.")
+		for database, histogram in _pool_waits.items():
+			lines += _histogram_lines("lazuli_pool_wait_seconds", {"database": database}, histogram)
+		lines += _header("lazuli_pool_timeouts_total", "counter", "Connection checkouts that timed out.")
+		for database, count in _pool_timeouts.items():
+			lines.append(f"lazuli_pool_timeouts_total{_labels(database=database)} {count}")
+		lines += _header("lazuli_cache_requests_total", "counter", "Cache lookups, per cache and result.")
+		for (cache, result), count in _cache_requests.items():
+			lines.append(f"lazuli_cache_requests_total{_labels(cache=cache, result=result)} {count}")
+		lines += _header("lazuli_cache_hit_ratio", "gauge", "Share of cache lookups served by the cache.")
+		for cache in sorted({cache for cache, _ in _cache_requests}):
+			hits = _cache_requests.get((cache, "hit"), 0)
+			total = hits + _cache_requests.get((cache, "miss"), 0)
+			lines.append(f"lazuli_cache_hit_ratio{_labels(cache=cache)} {hits / total!r}")
+
+	# Pool gauges are read at render time, and cost nothing in between
+	pools = utils.get_pools()
+	lines += _header("lazuli_pool_size", "gauge", "Maximum number of open connections.")
+	for database, pool in pools.items():
+		lines.append(f"lazuli_pool_size{_labels(database=database)} {pool.size}")
+	lines += _header("lazuli_pool_connections", "gauge", "Connections currently open, per state.")
+	for database, pool in pools.items():
+		idle = pool.idle_count
+		lines.append(f"lazuli_pool_connections{_labels(database=database, state='idle')} {idle}")
+		lines.append(f"lazuli_pool_connections{_labels(database=database, state='in_use')} {pool.open_count - idle}")
+	return "\n".join(lines) + "\n"
+
+
+def start_http_server(port: int=9464, host: str="127.0.0.1") -> "ThreadingHTTPServer":
+	"""Serves `render()` at `/metrics`, from a daemon thread
+
+	Also enables metrics collection. Binds to localhost by default; the
+	metrics include query templates, so think twice before exposing them.
+
+	Args:
+
+		port (`int`): Optional; Port to listen on; `0` picks a free one. Defaults to `9464`
+		host (`str`): Optional; Address to listen on. Defaults to `127.0.0.1`
+
+	Returns:
+		The `ThreadingHTTPServer`; use its `server_address` to find the port,
+		and call its `shutdown()` method to stop it
+	"""
+	from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # pylint: disable=import-outside-toplevel
+
+	class MetricsHandler(BaseHTTPRequestHandler):
+		def do_GET(self) -> None:  # pylint: disable=invalid-name
+			if self.path.split("?")[0] != "/metrics":
+				self.send_error(404)
+				return
+			body = render().encode("utf-8")
+			self.send_response(200)
+			self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, *args) -> None:
+			pass  # Scrapes are not worth a line on stderr each
+
+	enable()
+	server = ThreadingHTTPServer((host, port), MetricsHandler)
+	server.daemon_threads = True
+	threading.Thread(
+		target=server.serve_forever, name="lazuli-metrics", daemon=True
+	).start()
+	return server
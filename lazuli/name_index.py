@@ -0,0 +1,268 @@
+"""This module holds the NameIndex class for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+	Typical usage example:
+
+	index = lazuli.name_index()  # Loads all character and account names once
+	index.prefix("KOO")  # ["KOOKIIE", "Kookie", ...]
+	index.fuzzy("KOKIIE", max_distance=1)  # [("KOOKIIE", 1)]
+	index.refresh()  # Pull in names created since the last load
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+import threading
+from typing import Any, Iterable, Optional
+import lazuli.utility as utils
+
+CHARACTER = "character"
+ACCOUNT = "account"
+
+# Maps each kind of name to the table it is loaded from
+_TABLES = {
+	CHARACTER: "characters",
+	ACCOUNT: "accounts",
+}
+
+# Sorts after every character that can appear in a name; used to find the end
+# of a block of keys sharing a prefix
+_MAX_CHAR = "\U0010ffff"
+
+
+class NameIndex:
+	"""`NameIndex` object; in-memory index of character and account names.
+
+	Meant for autocomplete-style lookups (e.g. Discord slash-command
+	autocomplete), where a `LIKE 'abc%'` query per keystroke is not viable.
+	All names are kept in a single sorted array of case-folded keys, with
+	parallel arrays for the original spelling, the kind of name (character
+	or account) and the row ID. Prefix queries are two binary searches;
+	edit-distance queries walk the sorted array like a trie, re-using the
+	DP rows of shared prefixes and skipping whole blocks of keys whose
+	prefix is already too far from the query.
+
+	The index refreshes incrementally: only rows with an `id` higher than
+	the highest one seen so far are fetched. Renamed or deleted names are
+	only picked up by `NameIndex::reload()`.
+	"""
+
+	def __init__(self, database_config: Optional[dict[str, Any]]=None) -> None:
+		"""Creates an empty index; use `NameIndex::refresh()` to fill it
+
+		Args:
+
+			database_config (`dict`): Optional; Represents the protected attributes from a `Lazuli` object.
+			Without it, the index can only be filled through `NameIndex::add()`
+		"""
+		self._database_config = database_config
+		# (keys, names, kinds, ids) - swapped in as a whole so that readers
+		# never see a half-merged index
+		self._entries: tuple[list[str], list[str], list[str], array] = (
+			[], [], [], array("q")
+		)
+		self._max_ids: dict[str, int] = {kind: 0 for kind in _TABLES}
+		self._lock = threading.Lock()  # Serialises writers; readers never block
+		# Held from reading `_max_ids` until the fetched rows are merged, so
+		# that concurrent refreshes do not add the same names twice
+		self._refresh_lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._entries[0])
+
+	@property
+	def max_ids(self) -> dict[str, int]:
+		"""`dict[str, int]`: Represents the highest row ID seen, per kind of name"""
+		return dict(self._max_ids)
+
+	def add(self, kind: str, rows: Iterable[dict[str, Any]]) -> int:
+		"""Merges rows containing `id` and `name` into the index
+
+		Args:
+
+			kind (`str`): Represents the kind of name; `"character"` or `"account"`
+			rows (`Iterable[dict]`): Represents the rows to add
+
+		Returns:
+			An `int`, representing the number of names added
+
+		Raises:
+			ValueError: Unknown kind of name
+		"""
+		if kind not in _TABLES:
+			raise ValueError(f"Unknown kind of name: {kind}")
+		new_entries = []
+		max_id = 0
+		for row in rows:
+			name = row["name"]
+			if not name:
+				continue
+			new_entries.append((name.casefold(), name, kind, row["id"]))
+			max_id = max(max_id, row["id"])
+		if not new_entries:
+			return 0
+		new_entries.sort()
+
+		with self._lock:
+			self._merge(kind, new_entries, max_id)
+		return len(new_entries)
+
+	def _merge(
+		self,
+		kind: str,
+		new_entries: list[tuple[str, str, str, int]],
+		max_id: int,
+	) -> None:
+		keys, names, kinds, ids = self._entries
+		merged = merge(zip(keys, names, kinds, ids), new_entries)
+		new_keys, new_names, new_kinds, new_ids = [], [], [], array("q")
+		for key, name, entry_kind, row_id in merged:
+			new_keys.append(key)
+			new_names.append(name)
+			new_kinds.append(entry_kind)
+			new_ids.append(row_id)
+
+		self._entries = (new_keys, new_names, new_kinds, new_ids)
+		self._max_ids[kind] = max(self._max_ids[kind], max_id)
+
+	def refresh(self) -> int:
+		"""Fetches names with a higher `id` than any seen so far
+
+		Returns:
+			An `int`, representing the number of names added
+
+		Raises:
+			RuntimeError: No database config was provided
+		"""
+		if self._database_config is None:
+			raise RuntimeError("This index is not bound to a database!")
+		with self._refresh_lock:
+			return self._refresh()
+
+	def _refresh(self) -> int:
+		added = 0
+		for kind, table in _TABLES.items():
+			rows = utils.get_db_all_hits(
+				self._database_config,
+				f"SELECT `id`, `name` FROM `{table}` "
+				f"WHERE `id` > {int(self._max_ids[kind])} ORDER BY `id`"
+			)
+			added += self.add(kind, rows or [])
+		return added
+
+	def reload(self) -> int:
+		"""Discards the index and loads every name again
+
+		Use this to pick up renamed or deleted characters and accounts.
+
+		Returns:
+			An `int`, representing the number of names loaded
+		"""
+		if self._database_config is None:
+			raise RuntimeError("This index is not bound to a database!")
+		with self._refresh_lock:
+			with self._lock:
+				self._entries = ([], [], [], array("q"))
+				self._max_ids = {kind: 0 for kind in _TABLES}
+			return self._refresh()
+
+	def prefix(
+		self,
+		prefix: str,
+		limit: int=25,
+		kind: Optional[str]=None,
+	) -> list[str]:
+		"""Fetches names starting with the given prefix (case-insensitive)
+
+		Args:
+
+			prefix (`str`): Represents the text typed so far
+			limit (`int`): Optional; Maximum number of names to return. Defaults to `25` (Discord's autocomplete limit)
+			kind (`str`): Optional; Only return `"character"` or `"account"` names. Defaults to both
+
+		Returns:
+			A `list` of `str`, representing matching names in alphabetical order
+		"""
+		keys, names, kinds, _ = self._entries
+		folded = prefix.casefold()
+		start = bisect_left(keys, folded)
+		end = bisect_right(keys, folded + _MAX_CHAR, start)
+		matches = []
+		for index in range(start, end):
+			if kind is None or kinds[index] == kind:
+				matches.append(names[index])
+				if len(matches) >= limit:
+					break
+		return matches
+
+	def fuzzy(
+		self,
+		query: str,
+		max_distance: int=2,
+		limit: int=25,
+		kind: Optional[str]=None,
+	) -> list[tuple[str, int]]:
+		"""Fetches names within the given edit distance (case-insensitive)
+
+		Uses the Levenshtein distance (insertions, deletions, substitutions).
+
+		Args:
+
+			query (`str`): Represents the (possibly misspelt) name
+			max_distance (`int`): Optional; Maximum edit distance. Defaults to `2`
+			limit (`int`): Optional; Maximum number of names to return. Defaults to `25`
+			kind (`str`): Optional; Only return `"character"` or `"account"` names. Defaults to both
+
+		Returns:
+			A `list` of `tuple`, representing matching names and their
+			edit distance, closest first
+		"""
+		keys, names, kinds, _ = self._entries
+		folded = query.casefold()
+		width = len(folded) + 1
+		# rows[depth] holds the DP row for the first `depth` chars of `current`
+		rows = [list(range(width))]
+		current = ""
+		matches = []
+		index = 0
+		while index < len(keys):
+			key = keys[index]
+			common = 0
+			for a, b in zip(current, key):
+				if a != b:
+					break
+				common += 1
+			del rows[common + 1:]
+
+			pruned = False
+			for depth in range(common, len(key)):
+				char = key[depth]
+				previous = rows[-1]
+				row = [previous[0] + 1]
+				for column in range(1, width):
+					cost = 0 if folded[column - 1] == char else 1
+					row.append(min(
+						row[column - 1] + 1,
+						previous[column] + 1,
+						previous[column - 1] + cost,
+					))
+				rows.append(row)
+				if min(row) > max_distance:
+					# No key sharing this prefix can get any closer
+					pruned = True
+					break
+			current = key[:len(rows) - 1]
+
+			if pruned:
+				index = bisect_right(keys, current + _MAX_CHAR, index)
+				continue
+			distance = rows[-1][-1]
+			if distance <= max_distance and (kind is None or kinds[index] == kind):
+				matches.append((distance, names[index]))
+			index += 1
+
+		matches.sort()
+		return [(name, distance) for distance, name in matches[:limit]]
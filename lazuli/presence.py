@@ -0,0 +1,120 @@
+"""This module holds the OnlineWatcher class for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+	Typical usage example:
+
+	for event in lazuli.watch_online(interval=5):
+		print(f"{event.username} just logged {'in' if event.kind == LOGIN else 'out'}")
+	# ... or, in a Discord bot:
+	async for event in lazuli.watch_online_async(interval=5):
+		await channel.send(f"{event.username} just logged in!")
+"""
+import time
+from typing import Iterable, NamedTuple, Optional
+
+LOGIN = "login"
+LOGOUT = "logout"
+# Polls fetch only the IDs of online accounts; usernames are fetched once per login
+ONLINE_IDS_QUERY = "SELECT `id` FROM `accounts` WHERE `loggedin` > 0"
+
+
+class OnlineEvent(NamedTuple):
+	"""Represents an account logging in or out"""
+	kind: str  # `LOGIN` or `LOGOUT`
+	account_id: int
+	username: Optional[str]
+	time: float  # When the change was seen, in seconds since the epoch
+
+
+class OnlineWatcher:
+	"""`OnlineWatcher` object; turns successive sets of online accounts into events.
+
+	Keeps the previous set of online account IDs in memory, so each poll
+	only needs the IDs of the accounts online now; usernames are fetched
+	once per login, and dropped on logout. The first poll only records who
+	is online. The polling interval adapts to activity: it drops back to
+	`interval` whenever a poll finds changes, and grows by `backoff` after
+	each quiet poll, up to `max_interval`.
+
+	Use `Lazuli::watch_online()` or `Lazuli::watch_online_async()` rather
+	than this class directly.
+	"""
+
+	def __init__(
+		self,
+		interval: float=5.0,
+		max_interval: float=60.0,
+		backoff: float=1.5,
+	) -> None:
+		"""Creates a watcher that has not seen any poll yet
+
+		Args:
+
+			interval (`float`): Optional; Shortest time between polls, in seconds. Defaults to `5`
+			max_interval (`float`): Optional; Longest time between polls, in seconds. Defaults to `60`
+			backoff (`float`): Optional; Factor the interval grows by after a poll without changes. Defaults to `1.5`
+
+		Raises:
+			ValueError: Invalid interval or backoff
+		"""
+		if interval <= 0 or max_interval < interval:
+			raise ValueError("The intervals must satisfy 0 < interval <= max_interval!")
+		if backoff < 1:
+			raise ValueError("The backoff must be at least 1!")
+		self._min_interval = interval
+		self._max_interval = max_interval
+		self._backoff = backoff
+		self._interval = interval
+		self._online: Optional[frozenset[int]] = None
+		self._usernames: dict[int, str] = {}
+
+	@property
+	def interval(self) -> float:
+		"""`float`: Represents the time to wait before the next poll, in seconds"""
+		return self._interval
+
+	@property
+	def online(self) -> frozenset[int]:
+		"""`frozenset[int]`: Represents the IDs of the accounts online as of the last poll"""
+		return self._online or frozenset()
+
+	def missing_usernames(self, online_ids: Iterable[int]) -> list[int]:
+		"""Returns the IDs among `online_ids` whose usernames are not known yet"""
+		return [account_id for account_id in online_ids if account_id not in self._usernames]
+
+	def add_usernames(self, usernames: dict[int, str]) -> None:
+		"""Records the usernames of accounts, by ID"""
+		self._usernames.update(usernames)
+
+	def update(self, online_ids: Iterable[int]) -> list[OnlineEvent]:
+		"""Compares the accounts online now to those of the previous poll
+
+		Args:
+
+			online_ids (`Iterable[int]`): Represents the IDs of the accounts online now
+
+		Returns:
+			A `list` of `OnlineEvent`, logouts first; empty for the first poll
+		"""
+		current = frozenset(online_ids)
+		previous, self._online = self._online, current
+		if previous is None:
+			return []
+		now = time.time()
+		events = [
+			OnlineEvent(LOGOUT, account_id, self._usernames.pop(account_id, None), now)
+			for account_id in sorted(previous - current)
+		]
+		events += [
+			OnlineEvent(LOGIN, account_id, self._usernames.get(account_id), now)
+			for account_id in sorted(current - previous)
+		]
+		if events:
+			self._interval = self._min_interval
+		else:
+			self._interval = min(self._interval * self._backoff, self._max_interval)
+		return events
@@ -0,0 +1,382 @@
+"""This module holds the progress time-series store and sampler for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+The database only holds current values, so progress ("EXP gained today")
+is tracked by sampling: every interval, one projected scan of `characters`
+(`id`, `name`, and the tracked columns) is added to a `ProgressStore` as a
+round. Each character's samples are stored as zigzag varints of the change
+since its previous sample, so an unchanged value takes one byte, and small
+changes two or three. If the store has a path, each round is also appended
+to its file, in the same encoding, and replayed when the store is opened.
+
+	Typical usage example:
+
+	store = ProgressStore(["level", "exp", "meso"], "progress.bin")
+	sampler = lazuli.progress_sampler(store, interval=300)
+	sampler.start()  # Samples every 5 minutes, from a daemon thread
+	store.top_gainers("meso", window=86400)  # [("KOOKIIE", 123456), ...]
+	store.history("KOOKIIE", "level")  # [(1665000000, 199), (1665000300, 200)]
+"""
+from array import array
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional, Sequence, Union
+import lazuli.utility as utils
+
+_logger = logging.getLogger(__name__)
+
+MAGIC = b"LAZPROG\x00"
+
+
+def _zigzag(value: int) -> int:
+	# Maps signed to unsigned integers, small magnitudes to small numbers
+	return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+	return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+	while value >= 0x80:
+		buffer.append(value & 0x7F | 0x80)
+		value >>= 7
+	buffer.append(value)
+
+
+def _read_varint(data: Union[bytes, bytearray], position: int) -> tuple[int, int]:
+	value = shift = 0
+	while True:
+		byte = data[position]
+		position += 1
+		value |= (byte & 0x7F) << shift
+		if byte < 0x80:
+			return value, position
+		shift += 7
+
+
+class ProgressStore:
+	"""`ProgressStore` object; compact local store of sampled character columns.
+
+	Per character, the store holds one `bytearray` of samples; each sample
+	is the number of rounds since the character's previous sample, followed
+	by the change of each column, all as zigzag varints. The latest values
+	are also kept decoded, so adding a round costs one pass over its rows.
+	Queries decode the series they need. Safe to share between threads.
+	"""
+
+	def __init__(self, columns: Sequence[str], path: Optional[str]=None) -> None:
+		"""Creates a store, replaying its file if there is one
+
+		Args:
+
+			columns (`Sequence[str]`): Represents the `characters` columns tracked, e.g. `["level", "exp", "meso"]`
+			path (`str`): Optional; Represents the file each round is appended to. Defaults to an in-memory store
+
+		Raises:
+			ValueError: Invalid column name, or the file tracks other columns
+		"""
+		if not columns:
+			raise ValueError("At least one column is required!")
+		self._columns = [utils.check_column_name(column) for column in columns]
+		self._path = path
+		self._times = array("q")  # Time of each round, in seconds since the epoch
+		self._series: dict[int, bytearray] = {}
+		self._latest: dict[int, tuple[int, list[int]]] = {}  # ID: (round, values)
+		self._names: dict[int, str] = {}
+		self._ids: dict[str, int] = {}  # Case-folded name: ID
+		self._lock = threading.Lock()
+		if path is not None:
+			self._open(path)
+
+	def __len__(self) -> int:
+		return len(self._series)
+
+	@property
+	def columns(self) -> list[str]:
+		"""`list[str]`: Represents the tracked columns, in sample order"""
+		return list(self._columns)
+
+	@property
+	def rounds(self) -> int:
+		"""`int`: Represents the number of rounds sampled"""
+		return len(self._times)
+
+	@property
+	def nbytes(self) -> int:
+		"""`int`: Represents the size of the encoded samples, in bytes"""
+		return sum(len(series) for series in self._series.values())
+
+	def add_round(self, rows: Iterable[Sequence], when: Optional[float]=None) -> int:
+		"""Adds one sample per row, as a new round
+
+		Args:
+
+			rows (`Iterable[Sequence]`): Represents the characters, as `(id, name, *values)` in the order of `ProgressStore::columns`
+			when (`float`): Optional; Represents the time of the round, in seconds since the epoch. Defaults to now
+
+		Returns:
+			An `int`, representing the number of characters sampled
+		"""
+		rows = list(rows)  # Fetch before locking, so queries are not held up by the scan
+		when = int(time.time() if when is None else when)
+		with self._lock:
+			record = bytearray()
+			previous_time = self._times[-1] if self._times else 0
+			_write_varint(record, _zigzag(when - previous_time))
+			body = bytearray()
+			count = 0
+			for row in rows:
+				character_id, name, values = row[0], row[1], [int(value or 0) for value in row[2:]]
+				_write_varint(body, character_id)
+				if character_id not in self._names:
+					encoded = (name or "").encode("utf-8")
+					_write_varint(body, len(encoded))
+					body += encoded
+				_, previous = self._latest.get(character_id, (0, [0] * len(values)))
+				for value, old in zip(values, previous):
+					_write_varint(body, _zigzag(value - old))
+				self._add_sample(character_id, name, values)
+				count += 1
+			self._times.append(when)
+			_write_varint(record, count)
+			record += body
+			if self._path is not None:
+				self._append(record)
+		return count
+
+	def _add_sample(self, character_id: int, name: Optional[str], values: list[int]) -> None:
+		round_index = len(self._times)
+		series = self._series.get(character_id)
+		if series is None:
+			series = self._series[character_id] = bytearray()
+			self._names[character_id] = name or ""
+			self._ids[(name or "").casefold()] = character_id
+			last_round, previous = -1, [0] * len(values)
+		else:
+			last_round, previous = self._latest[character_id]
+		_write_varint(series, round_index - last_round)
+		for value, old in zip(values, previous):
+			_write_varint(series, _zigzag(value - old))
+		self._latest[character_id] = (round_index, values)
+
+	def _append(self, record: bytearray) -> None:
+		# Length-prefixed, so that a round cut short by a crash is detected on replay
+		frame = bytearray()
+		_write_varint(frame, len(record))
+		with open(self._path, "ab") as file:
+			file.write(frame + record)
+
+	def _open(self, path: str) -> None:
+		header = bytearray(MAGIC)
+		_write_varint(header, len(self._columns))
+		for column in self._columns:
+			_write_varint(header, len(column))
+			header += column.encode("ascii")
+		if not os.path.exists(path):
+			with open(path, "wb") as file:
+				file.write(header)
+			return
+		with open(path, "rb") as file:
+			data = file.read()
+		if not data.startswith(header):
+			raise ValueError(f"{path} is not a progress file for columns {self._columns}!")
+		position = len(header)
+		while position < len(data):
+			try:
+				length, start = _read_varint(data, position)
+			except IndexError:
+				break
+			if start + length > len(data):
+				break
+			self._replay(data[start:start + length])
+			position = start + length
+		if position < len(data):
+			_logger.warning("Discarding an incomplete round at the end of %s.", path)
+			with open(path, "r+b") as file:
+				file.truncate(position)
+
+	def _replay(self, record: bytes) -> None:
+		delta, position = _read_varint(record, 0)
+		when = (self._times[-1] if self._times else 0) + _unzigzag(delta)
+		count, position = _read_varint(record, position)
+		for _ in range(count):
+			character_id, position = _read_varint(record, position)
+			name = None
+			if character_id not in self._names:
+				length, position = _read_varint(record, position)
+				name = record[position:position + length].decode("utf-8")
+				position += length
+			_, previous = self._latest.get(character_id, (0, [0] * len(self._columns)))
+			values = []
+			for old in previous:
+				delta, position = _read_varint(record, position)
+				values.append(old + _unzigzag(delta))
+			self._add_sample(character_id, name, values)
+		self._times.append(when)
+
+	def _resolve(self, character: Union[int, str]) -> Optional[int]:
+		if isinstance(character, str):
+			return self._ids.get(character.casefold())
+		return character if character in self._series else None
+
+	def _samples(self, character_id: int) -> Iterable[tuple[int, list[int]]]:
+		# Decodes a series into (round, values) pairs
+		series = self._series[character_id]
+		round_index, values, position = -1, [0] * len(self._columns), 0
+		while position < len(series):
+			delta, position = _read_varint(series, position)
+			round_index += delta
+			for index, value in enumerate(values):
+				delta, position = _read_varint(series, position)
+				values[index] = value + _unzigzag(delta)
+			yield round_index, values
+
+	def history(
+		self,
+		character: Union[int, str],
+		column: str,
+		since: Optional[float]=None,
+	) -> list[tuple[int, int]]:
+		"""Fetches the sampled values of one character's column
+
+		Args:
+
+			character (`int | str`): Represents the character ID, or name
+			column (`str`): Represents the tracked column, e.g. `level`
+			since (`float`): Optional; Only return samples from this time on, in seconds since the epoch. Defaults to all samples
+
+		Returns:
+			A `list` of `tuple`, representing the time and value of each
+			sample; empty for characters never sampled
+
+		Raises:
+			ValueError: Column not tracked
+		"""
+		index = self._column_index(column)
+		with self._lock:
+			character_id = self._resolve(character)
+			if character_id is None:
+				return []
+			return [
+				(self._times[round_index], values[index])
+				for round_index, values in self._samples(character_id)
+				if since is None or self._times[round_index] >= since
+			]
+
+	def top_gainers(
+		self,
+		column: str,
+		window: float,
+		number_of_players: int=5,
+		now: Optional[float]=None,
+	) -> list[tuple[str, int]]:
+		"""Ranks characters by how much a column grew within a time window
+
+		The gain is the latest sample minus the last sample taken at or
+		before the start of the window (or the first sample within it, for
+		characters first seen since). Note that `exp` restarts at each
+		level, so rank `level` alongside it for "EXP gained".
+
+		Args:
+
+			column (`str`): Represents the tracked column, e.g. `meso`
+			window (`float`): Represents the length of the window, in seconds, e.g. `86400` for a day
+			number_of_players (`int`): Optional; Number of players to show. Defaults to `5`
+			now (`float`): Optional; Represents the end of the window, in seconds since the epoch. Defaults to now
+
+		Returns:
+			A `list` of `tuple`, representing player names and their
+			gains, highest first; players without gains are left out
+
+		Raises:
+			ValueError: Column not tracked
+		"""
+		index = self._column_index(column)
+		start = (time.time() if now is None else now) - window
+		gains = []
+		with self._lock:
+			for character_id, (last_round, latest) in self._latest.items():
+				if self._times[last_round] < start:
+					continue  # Not sampled within the window
+				baseline = None
+				for round_index, values in self._samples(character_id):
+					if baseline is not None and self._times[round_index] > start:
+						break
+					baseline = values[index]
+				gain = latest[index] - baseline
+				if gain > 0:
+					gains.append((self._names[character_id], gain))
+		gains.sort(key=lambda entry: entry[1], reverse=True)
+		return gains[:number_of_players]
+
+	def _column_index(self, column: str) -> int:
+		try:
+			return self._columns.index(column)
+		except ValueError:
+			raise ValueError(f"Column {column} is not tracked!") from None
+
+
+class ProgressSampler:
+	"""`ProgressSampler` object; runs a sampling function on an interval, from a daemon thread.
+
+	Use `Lazuli::progress_sampler()` rather than this class's constructor.
+	"""
+
+	def __init__(self, sample: Callable[[], int], interval: float=300.0) -> None:
+		"""Prepares the sampler; use `ProgressSampler::start()` to run it
+
+		Args:
+
+			sample (`Callable`): Represents the function that samples one round, returning the number of characters sampled
+			interval (`float`): Optional; Time between rounds, in seconds. Defaults to `300`
+
+		Raises:
+			ValueError: Non-positive interval
+		"""
+		if interval <= 0:
+			raise ValueError("The interval must be positive!")
+		self._sample = sample
+		self._interval = interval
+		self._stopped = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	@property
+	def running(self) -> bool:
+		"""`bool`: Represents whether the sampler thread is running"""
+		return self._thread is not None and self._thread.is_alive()
+
+	def start(self) -> None:
+		"""Starts sampling: one round now, then one per interval"""
+		if self.running:
+			return
+		self._stopped.clear()
+		self._thread = threading.Thread(target=self._run, name="lazuli-progress", daemon=True)
+		self._thread.start()
+
+	def stop(self, timeout: Optional[float]=None) -> None:
+		"""Stops sampling, after the current round (if any)
+
+		Args:
+
+			timeout (`float`): Optional; Longest time to wait for the current round, in seconds. Defaults to no limit
+		"""
+		self._stopped.set()
+		if self._thread is not None:
+			self._thread.join(timeout)
+
+	def _run(self) -> None:
+		while not self._stopped.is_set():
+			started = time.monotonic()
+			try:
+				count = self._sample()
+				_logger.debug("Sampled the progress of %s characters.", count)
+			except Exception as e:  # pylint: disable=broad-except
+				_logger.error("Unable to sample progress: %s", e)
+			self._stopped.wait(max(0.0, self._interval - (time.monotonic() - started)))
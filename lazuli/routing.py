@@ -0,0 +1,194 @@
+"""This module holds the ReplicaRouter class for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+	Typical usage example:
+
+	lazuli = Lazuli(
+		host="primary.example",
+		replicas=["replica-1.example", {"host": "replica-2.example", "port": 3307}],
+		read_strategy="least_latency",
+		read_your_writes=2.0,
+	)
+	lazuli.get_level_ranking()  # Served by a replica
+	lazuli.get_char_by_name("KOOKIIE").level = 200  # Written to the primary
+"""
+import itertools
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Union
+
+ROUND_ROBIN = "round_robin"
+LEAST_LATENCY = "least_latency"
+READ_STRATEGIES = (ROUND_ROBIN, LEAST_LATENCY)
+
+# Weight of the latest sample in the moving average of a replica's latency
+LATENCY_SMOOTHING = 0.2
+# With `least_latency`, every n-th read goes round-robin instead, so that
+# the latency of replicas that are not currently the fastest stays current
+LATENCY_PROBE_INTERVAL = 16
+# Seconds for which a replica that failed a read is skipped
+REPLICA_RETRY_AFTER = 5.0
+
+
+class _Replica:
+	"""Represents one replica, and what is known about its health"""
+
+	__slots__ = ("config", "latency", "reads", "failures", "down_until")
+
+	def __init__(self, config: dict[str, Any]) -> None:
+		self.config = config
+		self.latency = 0.0  # Untried replicas look fastest, so each is tried once
+		self.reads = 0
+		self.failures = 0
+		self.down_until = 0.0
+
+
+class ReplicaRouter:
+	"""`ReplicaRouter` object; routes reads to replicas, and writes to the primary.
+
+	Stored in the DB config of a `Lazuli` object (under `'router'`), and
+	thereby shared with every `Character`, `Account`, and `Inventory` object
+	created from it. Reads through `utility.get_db_all_hits()` and
+	`utility.count_in_db()` are served by a replica, picked round-robin or by
+	lowest moving-average latency; all writes go to the primary. A replica
+	failing a read is skipped for a few seconds, and the read is retried
+	on the primary.
+
+	Replicas lag behind the primary. With `read_your_writes` set, every read
+	within that many seconds of a write goes to the primary instead, so that
+	e.g. a ranking fetched right after a setter reflects the new value.
+	"""
+
+	def __init__(
+		self,
+		primary: dict[str, Any],
+		replicas: Iterable[Union[str, dict[str, Any]]],
+		strategy: str=ROUND_ROBIN,
+		read_your_writes: float=0.0,
+	) -> None:
+		"""Creates a router for the given primary and replicas
+
+		Args:
+
+			primary (`dict`): Represents the database config attributes of the primary
+			replicas (`Iterable`): Represents the replicas; either a host name, or a `dict` of the config attributes that differ from the primary's
+			strategy (`str`): Optional; `"round_robin"` or `"least_latency"`. Defaults to `"round_robin"`
+			read_your_writes (`float`): Optional; Seconds after a write during which reads go to the primary. Defaults to `0` (disabled)
+
+		Raises:
+			ValueError: Unknown strategy, or no replicas given
+		"""
+		if strategy not in READ_STRATEGIES:
+			raise ValueError(
+				f"Unknown read strategy: {strategy}; expected one of {READ_STRATEGIES}"
+			)
+		base = {key: value for key, value in primary.items() if key != 'router'}
+		self._primary = primary
+		self._replicas = [
+			_Replica({**base, **({'host': replica} if isinstance(replica, str) else replica)})
+			for replica in replicas
+		]
+		if not self._replicas:
+			raise ValueError("At least one replica is required!")
+		self._strategy = strategy
+		self._read_your_writes = read_your_writes
+		self._lock = threading.Lock()
+		self._counter = itertools.count()
+		self._primary_until = 0.0
+		self._primary_reads = 0
+
+	@property
+	def strategy(self) -> str:
+		"""`str`: Represents how replicas are picked for reads"""
+		return self._strategy
+
+	@property
+	def read_your_writes(self) -> float:
+		"""`float`: Represents the seconds after a write during which reads go to the primary"""
+		return self._read_your_writes
+
+	def mark_write(self) -> None:
+		"""Records a write to the primary, for the read-your-writes window"""
+		if self._read_your_writes > 0:
+			self._primary_until = time.monotonic() + self._read_your_writes
+
+	def _pick(self) -> Optional[_Replica]:
+		now = time.monotonic()
+		if now < self._primary_until:
+			return None
+		healthy = [replica for replica in self._replicas if replica.down_until <= now]
+		if not healthy:
+			return None
+		turn = next(self._counter)
+		if self._strategy == LEAST_LATENCY and turn % LATENCY_PROBE_INTERVAL:
+			return min(healthy, key=lambda replica: replica.latency)
+		return healthy[turn % len(healthy)]
+
+	def read_config(self) -> dict[str, Any]:
+		"""Picks the database for a read, without running it
+
+		Returns:
+			A `dict`, representing the DB config of a replica, or of the
+			primary if no replica is available
+		"""
+		replica = self._pick()
+		return self._primary if replica is None else replica.config
+
+	def read(self, function: Callable[..., Any], *args: Any) -> Any:
+		"""Runs a read against a replica, falling back to the primary
+
+		Args:
+
+			function (`Callable`): Represents the read; called with a DB config, followed by `args`
+			*args: Represent the remaining arguments for the function
+
+		Returns:
+			The result of the function
+		"""
+		replica = self._pick()
+		if replica is not None:
+			start = time.perf_counter()
+			try:
+				result = function(replica.config, *args)
+			except Exception:  # pylint: disable=broad-except
+				with self._lock:
+					replica.failures += 1
+					replica.down_until = time.monotonic() + REPLICA_RETRY_AFTER
+			else:
+				elapsed = time.perf_counter() - start
+				with self._lock:
+					replica.reads += 1
+					replica.latency = (
+						elapsed if replica.reads == 1 else
+						replica.latency + LATENCY_SMOOTHING * (elapsed - replica.latency)
+					)
+				return result
+		with self._lock:
+			self._primary_reads += 1
+		return function(self._primary, *args)
+
+	def stats(self) -> dict[str, Any]:
+		"""Returns counters for all reads so far
+
+		Returns:
+			A `dict` with the number of reads served by the primary
+			(`primary_reads`), and per replica (`replicas`, keyed by
+			`host:port`) the number of reads served, failed reads, and the
+			moving-average latency in seconds
+		"""
+		with self._lock:
+			return {
+				"primary_reads": self._primary_reads,
+				"replicas": {
+					f"{replica.config['host']}:{replica.config['port']}": {
+						"reads": replica.reads,
+						"failures": replica.failures,
+						"latency": replica.latency,
+					}
+					for replica in self._replicas
+				},
+			}
@@ -0,0 +1,169 @@
+"""This module holds the SingleFlight class for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+	Typical usage example:
+
+	flight = SingleFlight()
+	# Called concurrently from many threads; `fetch` only runs once at a time:
+	result, shared = flight.do(("SELECT ...", ()), fetch, "SELECT ...")
+"""
+import functools
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Hashable
+import lazuli.metrics as metrics
+
+if TYPE_CHECKING:  # `asyncio` is slow to import; only `do_async` needs it
+	import asyncio
+
+
+class _Call:
+	"""Represents one in-flight call, and the callers waiting on it"""
+
+	__slots__ = ("done", "result", "error", "followers")
+
+	def __init__(self) -> None:
+		self.done = threading.Event()
+		self.result: Any = None
+		self.error: BaseException | None = None
+		self.followers = 0
+
+
+class SingleFlight:
+	"""`SingleFlight` object; coalesces identical concurrent calls.
+
+	While a call for a given key is in flight, further calls with the same
+	key do not run the function again: they wait for the in-flight call,
+	and all receive its result (or exception). Once it completes, the next
+	call for that key runs the function afresh; nothing is cached.
+	Works from threads (`SingleFlight::do()`) and from coroutines
+	(`SingleFlight::do_async()`); both kinds of callers share the same
+	in-flight calls.
+
+	Note that a call which starts after a write may join a read that was
+	issued before it, and thus not see that write.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._calls: dict[Hashable, _Call] = {}
+		# In-flight calls made from coroutines, per event loop
+		self._async_calls: dict["asyncio.AbstractEventLoop", dict[Hashable, tuple]] = {}
+		self._calls_count = 0
+		self._coalesced_count = 0
+
+	def do(
+		self,
+		key: Hashable,
+		function: Callable[..., Any],
+		*args: Any,
+		**kwargs: Any,
+	) -> tuple[Any, bool]:
+		"""Runs the function, unless a call with the same key is in flight
+
+		Args:
+
+			key (`Hashable`): Represents the identity of the call, e.g. query template and parameters
+			function (`Callable`): Represents the function to run
+			*args, **kwargs: Represent the arguments for the function
+
+		Returns:
+			A `tuple` of the result, and a `bool` representing whether the
+			result was shared with other callers (in which case it must not
+			be mutated without copying)
+
+		Raises:
+			Any exception raised by the function, in every caller
+		"""
+		with self._lock:
+			self._calls_count += 1
+			call = self._calls.get(key)
+			if call is not None:
+				call.followers += 1
+				self._coalesced_count += 1
+				leader = False
+			else:
+				call = _Call()
+				self._calls[key] = call
+				leader = True
+		metrics.record_cache("single_flight", hit=not leader)
+
+		if leader:
+			try:
+				call.result = function(*args, **kwargs)
+			except BaseException as e:  # pylint: disable=broad-except
+				call.error = e
+			finally:
+				with self._lock:
+					del self._calls[key]  # No followers can join from here on
+				call.done.set()
+		else:
+			call.done.wait()
+
+		if call.error is not None:
+			raise call.error
+		return call.result, call.followers > 0
+
+	async def do_async(
+		self,
+		key: Hashable,
+		function: Callable[..., Any],
+		*args: Any,
+	) -> tuple[Any, bool]:
+		"""Runs the (blocking) function in the event loop's default executor,
+		unless a call with the same key is in flight
+
+		Identical to `SingleFlight::do()`, but awaitable; the event loop is
+		not blocked while waiting. Coroutines waiting on the same call do not
+		occupy an executor thread each.
+		"""
+		import asyncio  # pylint: disable=import-outside-toplevel
+		loop = asyncio.get_running_loop()
+		with self._lock:
+			pending = self._async_calls.setdefault(loop, {})
+		in_flight = pending.get(key)
+		leader = in_flight is None
+		if leader:
+			work = loop.run_in_executor(None, functools.partial(self.do, key, function, *args))
+			followers = [0]
+			pending[key] = (work, followers)
+			work.add_done_callback(functools.partial(self._forget_async, loop, key))
+		else:
+			work, followers = in_flight
+			followers[0] += 1
+			with self._lock:
+				self._calls_count += 1
+				self._coalesced_count += 1
+			metrics.record_cache("single_flight", hit=True)
+		# Shielded, so that a cancelled caller - even the one that started the
+		# call - leaves it running for the others
+		result, shared = await asyncio.shield(work)
+		return result, not leader or shared or followers[0] > 0
+
+	def _forget_async(self, loop: "asyncio.AbstractEventLoop", key: Hashable, work: "asyncio.Future") -> None:
+		"""Removes a completed call made from coroutines; runs in its event loop"""
+		if not work.cancelled():
+			work.exception()  # Mark as retrieved, in case every caller was cancelled
+		pending = self._async_calls[loop]
+		del pending[key]
+		if not pending:
+			with self._lock:
+				self._async_calls.pop(loop, None)
+
+	def stats(self) -> dict[str, int]:
+		"""Returns counters for all calls so far
+
+		Returns:
+			A `dict` with the total number of `calls`, the number of calls
+			that actually ran the function (`executed`), and the number of
+			calls that shared another call's result instead (`coalesced`)
+		"""
+		with self._lock:
+			return {
+				"calls": self._calls_count,
+				"executed": self._calls_count - self._coalesced_count,
+				"coalesced": self._coalesced_count,
+			}
@@ -0,0 +1,382 @@
+"""This module holds the quantile and distinct-count sketches for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+Sketches summarise a column in one streaming pass, in a fixed amount of
+memory, and answer approximately:
+
+- `KLLSketch`: quantiles and ranks ("what level is the top 1%?"); with the
+  default `k=200`, ranks are off by about 1.5% at most, with high probability
+- `HyperLogLog`: distinct counts ("how many distinct items are owned?");
+  with the default precision of 14, counts are off by about 0.8% (one
+  standard error), in 16 KB
+
+Both kinds merge (e.g. across worlds) into a sketch of the combined data,
+and serialise to `bytes` for storage or transfer.
+
+	Typical usage example:
+
+	sketches = lazuli.build_sketches("characters", quantiles=["level", "meso"])
+	sketches["level"].quantile(0.99)  # Level of the top 1%
+	sketches["meso"].rank(1000000)  # Share of characters with at most 1m mesos
+	data = sketches["level"].to_bytes()  # ... later: KLLSketch.from_bytes(data)
+"""
+import hashlib
+import math
+import random
+import struct
+from typing import Any, Iterable, Optional
+
+_KLL_MAGIC = b"LAZKLL\x00\x00"
+_KLL_HEADER = struct.Struct("<8sIQIdd")  # Magic, k, count, levels, min, max
+_HLL_MAGIC = b"LAZHLL\x00\x00"
+_HLL_HEADER = struct.Struct("<8sB")  # Magic, precision
+
+
+class KLLSketch:
+	"""`KLLSketch` object; mergeable quantile sketch (Karnin, Lang, Liberty).
+
+	Values are kept in a hierarchy of compactors: level `h` holds values
+	that each stand for `2 ** h` original ones. When the sketch is full, a
+	level is sorted and every other value (from a random offset) is promoted
+	to the next level, halving its size. Lower levels get geometrically
+	less space than the top one, so memory stays around `3 * k` values.
+	"""
+
+	def __init__(self, k: int=200) -> None:
+		"""Creates an empty sketch
+
+		Args:
+
+			k (`int`): Optional; Size of the top compactor; higher is more accurate. Defaults to `200`
+
+		Raises:
+			ValueError: `k` too small
+		"""
+		if k < 8:
+			raise ValueError("k must be at least 8!")
+		self._k = k
+		self._compactors: list[list[float]] = [[]]
+		self._size = 0
+		self._max_size = self._capacity(0)
+		self._count = 0
+		self._min = math.inf
+		self._max = -math.inf
+
+	def __len__(self) -> int:
+		return self._count
+
+	@property
+	def min(self) -> float:
+		"""`float`: Represents the smallest value added; `nan` if empty"""
+		return self._min if self._count else math.nan
+
+	@property
+	def max(self) -> float:
+		"""`float`: Represents the largest value added; `nan` if empty"""
+		return self._max if self._count else math.nan
+
+	def _capacity(self, height: int) -> int:
+		depth = len(self._compactors) - height - 1
+		return int(math.ceil(self._k * (2 / 3) ** depth)) + 1
+
+	def _grow(self) -> None:
+		self._compactors.append([])
+		self._max_size = sum(self._capacity(height) for height in range(len(self._compactors)))
+
+	def update(self, value: float) -> None:
+		"""Adds a value to the sketch"""
+		self._compactors[0].append(value)
+		self._size += 1
+		self._count += 1
+		if value < self._min:
+			self._min = value
+		if value > self._max:
+			self._max = value
+		if self._size >= self._max_size:
+			self._compress()
+
+	def extend(self, values: Iterable[float]) -> None:
+		"""Adds many values to the sketch"""
+		for value in values:
+			self.update(value)
+
+	def _compress(self) -> None:
+		for height in range(len(self._compactors)):
+			items = self._compactors[height]
+			if len(items) < self._capacity(height):
+				continue
+			if height + 1 >= len(self._compactors):
+				self._grow()
+			items.sort()
+			kept = [items.pop()] if len(items) % 2 else []
+			self._compactors[height + 1].extend(items[random.getrandbits(1)::2])
+			self._compactors[height] = kept
+			self._size = sum(len(compactor) for compactor in self._compactors)
+			if self._size < self._max_size:
+				break
+
+	def merge(self, other: "KLLSketch") -> "KLLSketch":
+		"""Adds the values summarised by another sketch to this one
+
+		Args:
+
+			other (`KLLSketch`): Represents the sketch to merge in; left unchanged
+
+		Returns:
+			This `KLLSketch`, for chaining
+		"""
+		while len(self._compactors) < len(other._compactors):
+			self._grow()
+		for height, items in enumerate(other._compactors):
+			self._compactors[height].extend(items)
+		self._count += other._count
+		self._min = min(self._min, other._min)
+		self._max = max(self._max, other._max)
+		self._size = sum(len(compactor) for compactor in self._compactors)
+		while self._size >= self._max_size:
+			self._compress()
+		return self
+
+	def _weighted(self) -> list[tuple[float, int]]:
+		weighted = [
+			(value, 1 << height)
+			for height, items in enumerate(self._compactors)
+			for value in items
+		]
+		weighted.sort()
+		return weighted
+
+	def quantile(self, share: float) -> float:
+		"""Estimates the value below which the given share of values lies
+
+		Args:
+
+			share (`float`): Represents the share, between `0` and `1`; e.g. `0.5` for the median, `0.99` for the top 1% threshold
+
+		Returns:
+			A `float`, representing the value; `nan` if the sketch is empty
+
+		Raises:
+			ValueError: Share out of range
+		"""
+		if not 0 <= share <= 1:
+			raise ValueError("The share must be between 0 and 1!")
+		if not self._count:
+			return math.nan
+		if share == 0:
+			return self._min
+		if share == 1:
+			return self._max
+		weighted = self._weighted()
+		target = share * sum(weight for _, weight in weighted)
+		cumulative = 0
+		for value, weight in weighted:
+			cumulative += weight
+			if cumulative >= target:
+				return value
+		return self._max
+
+	def rank(self, value: float) -> float:
+		"""Estimates the share of values less than or equal to the given value
+
+		Returns:
+			A `float` between `0` and `1`; `0` if the sketch is empty
+		"""
+		weighted = self._weighted()
+		total = sum(weight for _, weight in weighted)
+		if not total:
+			return 0.0
+		return sum(weight for item, weight in weighted if item <= value) / total
+
+	def to_bytes(self) -> bytes:
+		"""Serialises the sketch; see `KLLSketch.from_bytes()`"""
+		parts = [_KLL_HEADER.pack(
+			_KLL_MAGIC, self._k, self._count, len(self._compactors), self._min, self._max
+		)]
+		for items in self._compactors:
+			parts.append(struct.pack(f"<I{len(items)}d", len(items), *items))
+		return b"".join(parts)
+
+	@classmethod
+	def from_bytes(cls, data: bytes) -> "KLLSketch":
+		"""Restores a sketch serialised with `KLLSketch::to_bytes()`
+
+		Raises:
+			ValueError: Not a serialised `KLLSketch`
+		"""
+		if data[:len(_KLL_MAGIC)] != _KLL_MAGIC:
+			raise ValueError("Not a serialised KLLSketch!")
+		_, k, count, levels, lowest, highest = _KLL_HEADER.unpack_from(data)
+		sketch = cls(k)
+		sketch._compactors = []
+		position = _KLL_HEADER.size
+		for _ in range(levels):
+			(length,) = struct.unpack_from("<I", data, position)
+			position += 4
+			sketch._compactors.append(list(struct.unpack_from(f"<{length}d", data, position)))
+			position += 8 * length
+		sketch._max_size = sum(sketch._capacity(height) for height in range(levels))
+		sketch._size = sum(len(compactor) for compactor in sketch._compactors)
+		sketch._count, sketch._min, sketch._max = count, lowest, highest
+		return sketch
+
+
+class HyperLogLog:
+	"""`HyperLogLog` object; mergeable distinct-count sketch (Flajolet et al.).
+
+	Each value is hashed to 64 bits; the first `precision` bits pick a
+	register, which keeps the longest run of leading zeros seen in the
+	remaining bits. The harmonic mean of the registers estimates the
+	number of distinct values; small counts use linear counting instead.
+	Values are hashed by their `str` form, so `1` and `"1"` are the same.
+	"""
+
+	def __init__(self, precision: int=14) -> None:
+		"""Creates an empty sketch
+
+		Args:
+
+			precision (`int`): Optional; Uses `2 ** precision` one-byte registers; the error is about `1.04 / sqrt(2 ** precision)`. Defaults to `14`
+
+		Raises:
+			ValueError: Precision out of range
+		"""
+		if not 4 <= precision <= 18:
+			raise ValueError("The precision must be between 4 and 18!")
+		self._precision = precision
+		self._registers = bytearray(1 << precision)
+
+	@property
+	def precision(self) -> int:
+		"""`int`: Represents the precision of the sketch"""
+		return self._precision
+
+	def update(self, value: Any) -> None:
+		"""Adds a value to the sketch"""
+		data = value if isinstance(value, bytes) else str(value).encode("utf-8")
+		hashed = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+		index = hashed >> (64 - self._precision)
+		remaining = hashed & ((1 << (64 - self._precision)) - 1)
+		rank = 64 - self._precision - remaining.bit_length() + 1
+		if rank > self._registers[index]:
+			self._registers[index] = rank
+
+	def extend(self, values: Iterable[Any]) -> None:
+		"""Adds many values to the sketch"""
+		for value in values:
+			self.update(value)
+
+	def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+		"""Adds the values summarised by another sketch to this one
+
+		Args:
+
+			other (`HyperLogLog`): Represents the sketch to merge in; left unchanged
+
+		Returns:
+			This `HyperLogLog`, for chaining
+
+		Raises:
+			ValueError: The sketches have different precisions
+		"""
+		if other._precision != self._precision:
+			raise ValueError("Only sketches of the same precision can be merged!")
+		self._registers = bytearray(map(max, self._registers, other._registers))
+		return self
+
+	def count(self) -> int:
+		"""Estimates the number of distinct values added
+
+		Returns:
+			An `int`, representing the estimate
+		"""
+		registers = len(self._registers)
+		alpha = 0.7213 / (1 + 1.079 / registers)
+		estimate = alpha * registers * registers / sum(2.0 ** -rank for rank in self._registers)
+		zeros = self._registers.count(0)
+		if estimate <= 2.5 * registers and zeros:
+			estimate = registers * math.log(registers / zeros)
+		return int(round(estimate))
+
+	def __len__(self) -> int:
+		return self.count()
+
+	def to_bytes(self) -> bytes:
+		"""Serialises the sketch; see `HyperLogLog.from_bytes()`"""
+		return _HLL_HEADER.pack(_HLL_MAGIC, self._precision) + bytes(self._registers)
+
+	@classmethod
+	def from_bytes(cls, data: bytes) -> "HyperLogLog":
+		"""Restores a sketch serialised with `HyperLogLog::to_bytes()`
+
+		Raises:
+			ValueError: Not a serialised `HyperLogLog`
+		"""
+		if data[:len(_HLL_MAGIC)] != _HLL_MAGIC:
+			raise ValueError("Not a serialised HyperLogLog!")
+		_, precision = _HLL_HEADER.unpack_from(data)
+		sketch = cls(precision)
+		registers = data[_HLL_HEADER.size:]
+		if len(registers) != 1 << precision:
+			raise ValueError("The serialised HyperLogLog is truncated!")
+		sketch._registers = bytearray(registers)
+		return sketch
+
+
+def build_sketches(
+	columns: list[str],
+	rows: Iterable[tuple],
+	quantiles: Iterable[str]=(),
+	distinct: Iterable[str]=(),
+	k: int=200,
+	precision: int=14,
+) -> dict[str, Any]:
+	"""Builds sketches of some columns in one pass over rows
+
+	A column may appear in both `quantiles` and `distinct`; its sketches
+	are then keyed `"<column>"` and `"<column>:distinct"`. `NULL`s are skipped.
+
+	Args:
+
+		columns (`list[str]`): Represents the column names, in the order of each row
+		rows (`Iterable[tuple]`): Represents the rows; consumed once, e.g. from `utility.stream_db_rows()`
+		quantiles (`Iterable[str]`): Optional; Represents the numeric columns to build a `KLLSketch` of
+		distinct (`Iterable[str]`): Optional; Represents the columns to build a `HyperLogLog` of
+		k (`int`): Optional; Passed on to `KLLSketch`. Defaults to `200`
+		precision (`int`): Optional; Passed on to `HyperLogLog`. Defaults to `14`
+
+	Returns:
+		A `dict`, mapping each column (see above) to its sketch
+	"""
+	quantiles, distinct = list(quantiles), list(distinct)
+	sketches: dict[str, Any] = {}
+	updates = []  # (position in the row, sketch)
+	for column in quantiles:
+		sketches[column] = KLLSketch(k)
+		updates.append((columns.index(column), sketches[column]))
+	for column in distinct:
+		key = f"{column}:distinct" if column in quantiles else column
+		sketches[key] = HyperLogLog(precision)
+		updates.append((columns.index(column), sketches[key]))
+	for row in rows:
+		for position, sketch in updates:
+			value = row[position]
+			if value is not None:
+				sketch.update(value)
+	return sketches
+
+
+def merge_sketches(results: Iterable[Optional[dict[str, Any]]]) -> dict[str, Any]:
+	"""Merges several results of `build_sketches()` (e.g. one per world) key by key"""
+	merged: dict[str, Any] = {}
+	for sketches in results:
+		for key, sketch in (sketches or {}).items():
+			if key in merged:
+				merged[key].merge(sketch)
+			else:
+				merged[key] = type(sketch).from_bytes(sketch.to_bytes())  # Leave the inputs unchanged
+	return merged
@@ -0,0 +1,440 @@
+"""This module holds the memory-mapped character snapshot file for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+A snapshot file holds the frequently-read columns of every character
+(see `FIELDS`) as fixed-width binary records, sorted by case-folded name,
+so that the records double as the name index. A `SnapshotReader` maps the
+file into memory and answers lookups and rankings without a database
+connection; each `CharacterRecord` it returns is a zero-copy view over
+its record.
+
+Each export is written to a new, numbered data file next to the snapshot
+path (`characters.snap.1`, `characters.snap.2`, ...), and only then
+published by atomically replacing the small pointer file at the snapshot
+path itself, which names the current data file. Data files are never
+replaced or modified once published, so this works on Windows too, where
+a file that is mapped into memory can be neither replaced nor deleted.
+Readers only ever see a complete data file, and pick up a new one on their
+next lookup after `check_interval` seconds. Older data files are deleted
+by later exports, once no reader maps them (right away, on POSIX systems).
+Only one process should export to a given path at a time.
+
+	Typical usage example:
+
+	# In a cron job or background thread, every minute:
+	lazuli.export_snapshot("characters.snap")
+	# In the bot process:
+	reader = SnapshotReader("characters.snap")
+	reader.get_char_by_name("KOOKIIE").level  # 200
+	reader.get_ranking("meso", 5)  # [("KOOKIIE", 2147483647), ...]
+"""
+from bisect import bisect_left
+import heapq
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Iterable, Iterator, Optional
+import lazuli.jobs as jobs
+
+MAGIC = b"LAZSNAP\x00"
+VERSION = 1
+# Magic, version, name width (bytes), record count, export time (seconds since the epoch)
+_HEADER = struct.Struct("<8sHHId")
+# Start of the pointer file, followed by the name of the current data file
+POINTER_MAGIC = b"LAZSNAP->"
+# Attempts at publishing the pointer file, while readers briefly hold it open (Windows)
+_PUBLISH_ATTEMPTS = 50
+
+# Record fields, in order, with their `struct` formats; the name is inserted
+# after `accountid`, with the width stored in the header
+FIELDS = (
+	("id", "i"),
+	("accountid", "i"),
+	("level", "H"),
+	("job", "H"),
+	("meso", "q"),
+	("fame", "i"),
+	("reborns", "i"),
+	("gm", "b"),
+)
+_NAME_FIELD = 2  # Position of the name among the record fields
+SNAPSHOT_QUERY = (
+	"SELECT `id`, `accountid`, `name`, `level`, `job`, `meso`, `fame`, `reborns`, `gm` "
+	"FROM `characters`"
+)
+# Position of each field in an unpacked record
+_POSITIONS = {
+	column: position + (position >= _NAME_FIELD)
+	for position, (column, _) in enumerate(FIELDS)
+}
+
+
+def _record_struct(name_width: int) -> struct.Struct:
+	codes = [code for _, code in FIELDS]
+	codes.insert(_NAME_FIELD, f"{name_width}s")
+	return struct.Struct("<" + "".join(codes))
+
+
+class CharacterRecord:
+	"""`CharacterRecord` object; read-only view of one character in a snapshot.
+
+	Mirrors the read-only side of `Character` for the snapshotted columns.
+	Fields are decoded from the mapped file on access; nothing is copied
+	until then. Views stay valid after the reader moves to a newer file.
+	"""
+
+	__slots__ = ("_view", "_offsets")
+
+	def __init__(self, view: memoryview, offsets: dict[str, tuple[int, str]]) -> None:
+		self._view = view
+		self._offsets = offsets
+
+	def _field(self, column: str) -> Any:
+		offset, code = self._offsets[column]
+		return struct.unpack_from("<" + code, self._view, offset)[0]
+
+	@property
+	def character_id(self) -> int:
+		"""`int`: Represents the character ID"""
+		return self._field("id")
+
+	@property
+	def account_id(self) -> int:
+		"""`int`: Represents the account ID of the character"""
+		return self._field("accountid")
+
+	@property
+	def name(self) -> str:
+		"""`str`: Represents the character name"""
+		return self._field("name").rstrip(b"\x00").decode("utf-8")
+
+	@property
+	def level(self) -> int:
+		"""`int`: Represents the character level"""
+		return self._field("level")
+
+	@property
+	def job(self) -> int:
+		"""`int`: Represents the Job ID of the character"""
+		return self._field("job")
+
+	@property
+	def meso(self) -> int:
+		"""`int`: Represents the mesos held by the character"""
+		return self._field("meso")
+
+	@property
+	def fame(self) -> int:
+		"""`int`: Represents the fame of the character"""
+		return self._field("fame")
+
+	@property
+	def rebirths(self) -> int:
+		"""`int`: Represents the number of rebirths of the character"""
+		return self._field("reborns")
+
+	@property
+	def gm(self) -> int:
+		"""`int`: Represents the GM level of the character"""
+		return self._field("gm")
+
+	def get_job_name(self) -> str:
+		"""Returns the job name of the character, e.g. `Hero`"""
+		return jobs.JOBS_BY_ID.get(self.job, "Unknown")
+
+	def get_stat_by_column(self, column: str) -> Any:
+		"""Returns a snapshotted column, by its name in the `characters` table
+
+		Raises:
+			KeyError: Column not in the snapshot
+		"""
+		if column == "name":
+			return self.name
+		return self._field(column)
+
+	def __repr__(self) -> str:
+		return f"CharacterRecord(name={self.name!r}, id={self.character_id})"
+
+
+def _read_pointer(path: str) -> str:
+	# Returns the path of the current data file of a snapshot
+	with open(path, "rb") as file:
+		pointer = file.read(len(POINTER_MAGIC) + 4096)
+	name = pointer[len(POINTER_MAGIC):].decode("utf-8", "replace")
+	if not pointer.startswith(POINTER_MAGIC) or not name or os.path.basename(name) != name:
+		raise ValueError(f"{path} is not a snapshot file!")
+	return os.path.join(os.path.dirname(path), name)
+
+
+def _generations(path: str) -> dict[int, str]:
+	# Maps the number of each data file of a snapshot to its path
+	directory = os.path.dirname(os.path.abspath(path))
+	prefix = os.path.basename(path) + "."
+	return {
+		int(name[len(prefix):]): os.path.join(directory, name)
+		for name in os.listdir(directory)
+		if name.startswith(prefix) and name[len(prefix):].isdigit()
+	}
+
+
+class _Mapping:
+	"""One mapped snapshot data file; kept alive by the views made from it"""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		with open(path, "rb") as file:
+			self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		if len(self.buffer) < _HEADER.size:
+			raise ValueError(f"{path} is not a snapshot file!")
+		magic, version, name_width, count, self.exported_at = _HEADER.unpack_from(self.buffer)
+		if magic != MAGIC or version != VERSION:
+			raise ValueError(f"{path} is not a version {VERSION} snapshot file!")
+		self.record = _record_struct(name_width)
+		if _HEADER.size + count * self.record.size != len(self.buffer):
+			raise ValueError(f"{path} is truncated!")
+		self.count = count
+		self.records = memoryview(self.buffer)[_HEADER.size:]
+		self.offsets: dict[str, tuple[int, str]] = {}
+		offset = 0
+		for column, code in [*FIELDS[:_NAME_FIELD], ("name", f"{name_width}s"), *FIELDS[_NAME_FIELD:]]:
+			self.offsets[column] = (offset, code)
+			offset += struct.calcsize("<" + code)
+		self.keys = _NameKeys(self)
+
+	def view(self, index: int) -> CharacterRecord:
+		size = self.record.size
+		return CharacterRecord(self.records[index * size:(index + 1) * size], self.offsets)
+
+
+class _NameKeys:
+	"""Sequence of the case-folded names of a mapping, for `bisect`"""
+
+	def __init__(self, mapping: _Mapping) -> None:
+		self._records = mapping.records
+		self._size = mapping.record.size
+		self._offset, code = mapping.offsets["name"]
+		self._width = int(code[:-1])
+		self._count = mapping.count
+
+	def __len__(self) -> int:
+		return self._count
+
+	def __getitem__(self, index: int) -> str:
+		start = index * self._size + self._offset
+		name = bytes(self._records[start:start + self._width]).rstrip(b"\x00")
+		return name.decode("utf-8").casefold()
+
+
+class SnapshotReader:
+	"""`SnapshotReader` object; serves character reads from a snapshot file.
+
+	Lookups by name are binary searches over the mapped records; rankings
+	scan every record. Neither touches the database. The
+	reader checks at most every `check_interval` seconds whether the pointer
+	file names a new data file, and maps it if so. Safe to share between
+	threads.
+	"""
+
+	def __init__(self, path: str, check_interval: float=1.0) -> None:
+		"""Maps a snapshot file into memory
+
+		Args:
+
+			path (`str`): Represents the path of the snapshot file
+			check_interval (`float`): Optional; Minimum time between checks for a newer file, in seconds. Defaults to `1`
+
+		Raises:
+			FileNotFoundError: No snapshot file at the path
+			ValueError: Not a snapshot file, or a truncated one
+		"""
+		self._path = path
+		self._check_interval = check_interval
+		self._mapping = _Mapping(_read_pointer(path))
+		self._checked_at = time.monotonic()
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return self._current().count
+
+	@property
+	def exported_at(self) -> float:
+		"""`float`: Represents when the snapshot was exported, in seconds since the epoch"""
+		return self._current().exported_at
+
+	@property
+	def age(self) -> float:
+		"""`float`: Represents the time since the snapshot was exported, in seconds"""
+		return time.time() - self.exported_at
+
+	def reload(self) -> bool:
+		"""Maps the current data file, if a new one was published
+
+		Returns:
+			A `bool`, representing whether a new file was mapped
+		"""
+		with self._lock:
+			self._checked_at = time.monotonic()
+			try:
+				data_path = _read_pointer(self._path)
+				if data_path == self._mapping.path:
+					return False
+				mapping = _Mapping(data_path)
+			except (OSError, ValueError):
+				return False  # Keep serving the last snapshot; retried on the next check
+			# The previous mapping is unmapped once no view refers to it
+			self._mapping = mapping
+			return True
+
+	def _current(self) -> _Mapping:
+		if time.monotonic() - self._checked_at >= self._check_interval:
+			self.reload()
+		return self._mapping
+
+	def get_char_by_name(self, char_name: str) -> Optional[CharacterRecord]:
+		"""Looks up a character by name, case-insensitively
+
+		Args:
+
+			char_name (`str`): Represents the character name
+
+		Returns:
+			A `CharacterRecord` object, or `None` if there is no such character in the snapshot
+		"""
+		mapping = self._current()
+		key = char_name.casefold()
+		index = bisect_left(mapping.keys, key)
+		if index < mapping.count and mapping.keys[index] == key:
+			return mapping.view(index)
+		return None
+
+	def get_chars_by_names(self, char_names: Iterable[str]) -> dict[str, CharacterRecord]:
+		"""Looks up many characters by name
+
+		Args:
+
+			char_names (`Iterable[str]`): Represents the character names
+
+		Returns:
+			A `dict`, mapping each name found to its `CharacterRecord`
+		"""
+		found = {}
+		for char_name in char_names:
+			record = self.get_char_by_name(char_name)
+			if record is not None:
+				found[char_name] = record
+		return found
+
+	def __iter__(self) -> Iterator[CharacterRecord]:
+		mapping = self._current()
+		return (mapping.view(index) for index in range(mapping.count))
+
+	def get_ranking(
+		self,
+		column: str,
+		number_of_players: int=5,
+		show_gm: bool=False,
+		job_ids: Optional[Iterable[int]]=None,
+	) -> list[tuple[str, Any]]:
+		"""Ranks the characters in the snapshot, like `Lazuli::get_ranking()`
+
+		Args:
+
+			column (`str`): Represents the column to rank by, e.g. `level`; any of `FIELDS`
+			number_of_players (`int`): Optional; Number of players to show. Defaults to `5`
+			show_gm (`bool`): Optional; Whether to add GMs (Game Masters) to the list of rankings
+			job_ids (`Iterable[int]`): Optional; Only rank characters with these Job IDs. Defaults to all jobs
+
+		Returns:
+			A `list` of `tuple`, representing player names and their
+			corresponding values
+
+		Raises:
+			KeyError: Column not in the snapshot
+		"""
+		index = _POSITIONS[column]
+		gm_index, job_index = _POSITIONS["gm"], _POSITIONS["job"]
+		mapping = self._current()
+		job_filter = None if job_ids is None else frozenset(job_ids)
+		candidates = (
+			row for row in mapping.record.iter_unpack(mapping.records)
+			if (show_gm or row[gm_index] < 1)
+			and (job_filter is None or row[job_index] in job_filter)
+		)
+		top = heapq.nlargest(number_of_players, candidates, key=lambda row: row[index])
+		return [
+			(row[_NAME_FIELD].rstrip(b"\x00").decode("utf-8"), row[index]) for row in top
+		]
+
+
+def write_snapshot(path: str, rows: Iterable[tuple]) -> int:
+	"""Writes a snapshot, replacing any previous one atomically
+
+	The records are written to a new numbered data file next to `path`,
+	flushed to disk, and then published by atomically replacing the pointer
+	file at `path` (see the module docstring). Data files older than the
+	one just replaced are deleted, unless still mapped by a reader on
+	Windows; those are retried by the next export.
+
+	Args:
+
+		path (`str`): Represents the path of the snapshot (pointer) file
+		rows (`Iterable[tuple]`): Represents the characters, as rows of `SNAPSHOT_QUERY`
+
+	Returns:
+		An `int`, representing the number of characters written
+	"""
+	records = []
+	name_width = 1
+	for row in rows:
+		name = (row[_NAME_FIELD] or "").encode("utf-8")
+		name_width = max(name_width, len(name))
+		values = [0 if value is None else value for value in row]
+		values[_NAME_FIELD] = name
+		records.append((name.decode("utf-8").casefold(), values))
+	records.sort(key=lambda record: record[0])
+	record = _record_struct(name_width)
+
+	generations = _generations(path)
+	generation = max(generations, default=0) + 1
+	data_path = f"{os.path.abspath(path)}.{generation}"
+	pointer_path = f"{os.path.abspath(path)}.pointer"
+	try:
+		with open(data_path, "xb") as file:
+			file.write(_HEADER.pack(MAGIC, VERSION, name_width, len(records), time.time()))
+			for _, values in records:
+				file.write(record.pack(*values))
+			file.flush()
+			os.fsync(file.fileno())
+		with open(pointer_path, "wb") as file:
+			file.write(POINTER_MAGIC + os.path.basename(data_path).encode("utf-8"))
+			file.flush()
+			os.fsync(file.fileno())
+		for attempt in range(_PUBLISH_ATTEMPTS):
+			try:
+				os.replace(pointer_path, path)
+				break
+			except PermissionError:  # Windows: a reader is reading the pointer file
+				if attempt == _PUBLISH_ATTEMPTS - 1:
+					raise
+				time.sleep(0.01)
+	except BaseException:
+		for leftover in (data_path, pointer_path):
+			if os.path.exists(leftover):
+				os.unlink(leftover)
+		raise
+
+	# Keep the data file just replaced, for readers that read the pointer
+	# before it was replaced, but have not mapped the data file yet
+	for old_generation, old_path in generations.items():
+		if old_generation < generation - 1:
+			try:
+				os.unlink(old_path)
+			except OSError:  # Windows: still mapped by a reader
+				pass
+	return len(records)
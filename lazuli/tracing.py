@@ -0,0 +1,249 @@
+"""This module holds the tracing spans for the lazuli package.
+
+Copyright 2022 TEAM SPIRIT. All rights reserved.
+Use of this source code is governed by a AGPL-style license that can be found
+in the LICENSE file.
+Refer to `database.py` or the project wiki on GitHub for usage examples.
+
+Tracing is disabled by default; while disabled, each instrumented call
+site costs a single flag check. Once configured, public methods (e.g.
+`Lazuli.get_char_by_name`) open a span, each query they run opens a child
+span (`query`, with the `operation`, query `template`, and `rows`), and
+each query opens `connect`, `execute`, and `fetch` spans below that.
+Finished spans are handed to the configured exporter. Sampling is decided
+once per trace (i.e. at the outermost span), so a sampled trace is always
+complete.
+
+	Typical usage example:
+
+	tracing.configure(tracing.JsonLinesExporter("traces.jsonl"), sample_rate=0.01)
+	# ... or, in tests:
+	exporter = tracing.InMemoryExporter()
+	tracing.configure(exporter)
+	lazuli.get_char_by_name("KOOKIIE")
+	[span.name for span in exporter.spans]
+	# ["connect", "execute", "fetch", "query", ..., "Lazuli.get_char_by_name"]
+"""
+import contextvars
+import functools
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, Protocol, Union
+from lazuli.metrics import query_template
+
+
+class Exporter(Protocol):
+	"""Receives every finished span of a sampled trace"""
+
+	def export(self, span: "Span") -> None:
+		...
+
+
+class Span:
+	"""`Span` object; represents one timed operation within a trace.
+
+	Attributes:
+
+		name (`str`): Represents the operation, e.g. `Lazuli.get_char_by_name` or `query`
+		trace_id (`str`): Represents the trace; shared by all spans below the outermost one
+		span_id (`str`): Represents this span
+		parent_id (`str`): Represents the enclosing span; `None` for the outermost one
+		start (`float`): Represents the start time, in seconds since the epoch
+		duration (`float`): Represents the time taken, in seconds; `None` while running
+		attributes (`dict`): Represents details of the operation, e.g. `rows`
+		error (`str`): Represents the exception raised by the operation, if any
+	"""
+
+	__slots__ = (
+		"name", "trace_id", "span_id", "parent_id", "start", "duration",
+		"attributes", "error", "_started", "_token",
+	)
+
+	def __init__(self, name: str, parent: Optional["Span"], attributes: dict[str, Any]) -> None:
+		self.name = name
+		self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+		self.span_id = f"{random.getrandbits(64):016x}"
+		self.parent_id = parent.span_id if parent else None
+		self.attributes = attributes
+		self.duration: Optional[float] = None
+		self.error: Optional[str] = None
+		self.start = time.time()
+		self._started = time.perf_counter()
+		self._token: Optional[contextvars.Token] = None
+
+	def set(self, **attributes: Any) -> None:
+		"""Adds attributes to the span, e.g. `span.set(rows=5)`"""
+		self.attributes.update(attributes)
+
+	def to_dict(self) -> dict[str, Any]:
+		"""Returns the span as a JSON-serialisable `dict`"""
+		return {
+			"name": self.name,
+			"trace_id": self.trace_id,
+			"span_id": self.span_id,
+			"parent_id": self.parent_id,
+			"start": self.start,
+			"duration_ms": None if self.duration is None else round(self.duration * 1000, 3),
+			"attributes": self.attributes,
+			"error": self.error,
+		}
+
+	def __enter__(self) -> "Span":
+		self._token = _current.set(self)
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback) -> None:
+		self.duration = time.perf_counter() - self._started
+		if exc_value is not None:
+			self.error = repr(exc_value)
+		_current.reset(self._token)
+		exporter = _exporter
+		if exporter is not None:
+			try:
+				exporter.export(self)
+			except Exception:  # pylint: disable=broad-except
+				pass  # A broken exporter must not break the traced operation
+
+
+class _NoopSpan:
+	"""Stands in for a span when tracing is disabled or the trace is not sampled"""
+
+	__slots__ = ()
+
+	def set(self, **attributes: Any) -> None:
+		pass
+
+	def __enter__(self) -> "_NoopSpan":
+		return self
+
+	def __exit__(self, *exc_info: Any) -> None:
+		pass
+
+
+class _UnsampledSpan(_NoopSpan):
+	"""Marks the remainder of an unsampled trace, so that nested spans are skipped too"""
+
+	__slots__ = ("_token",)
+
+	def __enter__(self) -> "_UnsampledSpan":
+		self._token = _current.set(self)
+		return self
+
+	def __exit__(self, *exc_info: Any) -> None:
+		_current.reset(self._token)
+
+
+class InMemoryExporter:
+	"""`InMemoryExporter` object; collects finished spans in a list (for tests)"""
+
+	def __init__(self) -> None:
+		self.spans: list[Span] = []
+		self._lock = threading.Lock()
+
+	def export(self, span: Span) -> None:
+		with self._lock:
+			self.spans.append(span)
+
+	def clear(self) -> None:
+		"""Discards the spans collected so far"""
+		with self._lock:
+			self.spans.clear()
+
+
+class JsonLinesExporter:
+	"""`JsonLinesExporter` object; appends each finished span to a file, as a JSON object per line"""
+
+	def __init__(self, path: str) -> None:
+		"""Opens (or creates) the file to append spans to
+
+		Args:
+
+			path (`str`): Represents the path of the file
+		"""
+		self._file = open(path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+		self._lock = threading.Lock()
+
+	def export(self, span: Span) -> None:
+		line = json.dumps(span.to_dict(), default=str) + "\n"
+		with self._lock:
+			self._file.write(line)
+			self._file.flush()
+
+	def close(self) -> None:
+		"""Closes the file"""
+		with self._lock:
+			self._file.close()
+
+
+_NOOP = _NoopSpan()
+_current: contextvars.ContextVar[Union[Span, _UnsampledSpan, None]] = contextvars.ContextVar(
+	"lazuli_span", default=None
+)
+_exporter: Optional[Exporter] = None
+_sample_rate = 1.0
+
+
+def configure(exporter: Optional[Exporter], sample_rate: float=1.0) -> None:
+	"""Enables tracing, or disables it if no exporter is given
+
+	Args:
+
+		exporter (`Exporter`): Represents where finished spans go, e.g. `InMemoryExporter()` or `JsonLinesExporter(path)`. `None` disables tracing
+		sample_rate (`float`): Optional; Share of traces recorded, between `0` and `1`. Defaults to `1` (all)
+
+	Raises:
+		ValueError: Sample rate out of range
+	"""
+	global _exporter, _sample_rate
+	if not 0 <= sample_rate <= 1:
+		raise ValueError("The sample rate must be between 0 and 1!")
+	_sample_rate = sample_rate
+	_exporter = exporter
+
+
+def is_enabled() -> bool:
+	"""Returns whether tracing is enabled"""
+	return _exporter is not None
+
+
+def span(name: str, **attributes: Any) -> Union[Span, _NoopSpan]:
+	"""Opens a span for a `with` block, nested in the current one (if any)
+
+	A `query` attribute is recorded as its `template` (see
+	`metrics.query_template()`), so that no values end up in traces.
+
+	Args:
+
+		name (`str`): Represents the operation
+		**attributes: Represent details of the operation
+
+	Returns:
+		A context manager, yielding the `Span` (or a stand-in with the same
+		`set()` method, if the span is not recorded)
+	"""
+	if _exporter is None:
+		return _NOOP
+	parent = _current.get()
+	if isinstance(parent, _UnsampledSpan):
+		return _NOOP
+	if parent is None and _sample_rate < 1 and random.random() >= _sample_rate:
+		return _UnsampledSpan()
+	query = attributes.pop("query", None)
+	if query is not None:
+		attributes["template"] = query_template(query)
+	return Span(name, parent, attributes)
+
+
+def traced(method: Callable) -> Callable:
+	"""Decorator; runs each call of the method in a span named after it, e.g. `Lazuli.get_char_by_name`"""
+	name = method.__qualname__
+
+	@functools.wraps(method)
+	def wrapper(*args, **kwargs):
+		if _exporter is None:
+			return method(*args, **kwargs)
+		with span(name):
+			return method(*args, **kwargs)
+	return wrapper
@@ -5,8 +5,22 @@ Use of this source code is governed by a AGPL-style license that can be found
 in the LICENSE file.
 Refer to `database.py` or the project wiki on GitHub for usage examples.
 """
-from typing import Any
-import mysql.connector as con
+import atexit
+import functools
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+from lazuli.exceptions import ConcurrentUpdateError, PoolExhaustedError
+import lazuli.metrics as metrics
+import lazuli.tracing as tracing
+
+_logger = logging.getLogger(__name__)
 
 # CONSTANTS -------------------------------------------------------------------
 # Dictionary that maps inventory tabs' names to
@@ -23,6 +37,68 @@ MAP_INV_TYPES = {
 	'cash': 5,
 }
 
+# Largest number of values placed in a single `IN (...)` list by bulk methods
+BULK_CHUNK_SIZE = 1000
+
+# Inclusive bounds enforced by bulk adders, mirroring the `Character` setters
+CHARACTER_STAT_LIMITS = {
+	'level': (1, 275),
+	'exp': (-9223372036854775808, 9223372036854775807),
+	'meso': (0, 10000000000),
+	'fame': (-32768, 32767),
+	'str': (-32768, 32767),
+	'dex': (-32768, 32767),
+	'int': (-32768, 32767),
+	'luk': (-32768, 32767),
+	'ap': (-32768, 32767),
+	'maxhp': (1, 500000),
+	'maxmp': (1, 500000),
+	'buddyCapacity': (20, 100),
+	'reborns': (0, 2147483647),
+	'ambition': (0, 2147483647),
+	'insight': (0, 2147483647),
+	'willpower': (0, 2147483647),
+	'diligence': (0, 2147483647),
+	'empathy': (0, 2147483647),
+	'charm': (0, 2147483647),
+	'innerExp': (0, 2147483647),
+}
+
+# Inclusive bounds enforced by bulk adders, mirroring the `Account` setters
+ACCOUNT_STAT_LIMITS = {
+	'nxCash': (-2147483648, 2147483647),
+	'mPoints': (-2147483648, 2147483647),
+	'vpoints': (-2147483648, 2147483647),
+	'realcash': (-2147483648, 2147483647),
+	'chrslot': (0, 52),
+}
+
+# Adds to a column while keeping it within bounds; see `clamped_add_params()`
+CLAMPED_ADD = "GREATEST(LEAST(`{column}`, %s), %s) + %s"
+
+# Comparison operators accepted in filter keys, e.g. `{"level >=": 200}`
+FILTER_OPERATORS = ("=", "!=", "<>", "<", "<=", ">", ">=")
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Rows fetched from the server at a time by `stream_db_rows()`
+STREAM_BATCH_SIZE = 10000
+
+# Default maximum number of open connections per database (see `ConnectionPool`)
+DEFAULT_POOL_SIZE = 5
+
+# Default seconds to wait for a pooled connection before raising `PoolExhaustedError`
+DEFAULT_POOL_TIMEOUT = 30.0
+
+# Whether pools record where each checked-out connection was acquired; see
+# `enable_leak_detection()`. Also enabled by `LAZULI_DEBUG_CONNECTIONS=1`
+_leak_detection = os.environ.get("LAZULI_DEBUG_CONNECTIONS", "") not in ("", "0")
+_leak_report_registered = False
+
+# `mysql.connector` (and protobuf, which it pulls in) is slow to import, so it
+# is only imported on first connection; see `get_connector()`
+_connector: Optional[ModuleType] = None
+
 
 # UTILITY FUNCTIONS -----------------------------------------------------------
 def get_key(dictionary: dict, val: Any) -> Any:
@@ -53,26 +129,496 @@ def get_key(dictionary: dict, val: Any) -> Any:
 		for key, value in dictionary.items():
 			if val == value:
 				return key
-		print("No corresponding key found")
+		_logger.warning("No corresponding key found")
 		return False
 	except Exception as e:
-		print(
-			f"Unexpected error encountered whilst attempting "
-			f"to perform dictionary search:\n{e}"
+		_logger.error(
+			"Unexpected error encountered whilst attempting "
+			"to perform dictionary search: %s", e
 		)
 		return False
 
 
-def get_db_all_hits(config: dict[str, str], query: str) -> list:
+def get_connector() -> ModuleType:
+	"""Imports `mysql.connector` on first use, and returns it
+
+	Keeps `import lazuli` fast for tools that never touch the database,
+	e.g. CLI tools and serverless workers paying for every cold start.
+
+	Returns:
+		The `mysql.connector` module
+	"""
+	global _connector
+	if _connector is None:
+		import mysql.connector  # pylint: disable=import-outside-toplevel
+		_connector = mysql.connector
+	return _connector
+
+
+def connect(config: dict[str, Any]) -> Any:
+	"""Opens a new connection using the provided DB config
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+
+	Returns:
+		A MySQL Connector connection object
+	"""
+	return get_connector().connect(
+		host=config['host'],
+		user=config['user'],
+		password=config['password'],
+		database=config['schema'],
+		port=config['port'],
+		charset=config['charset']
+	)
+
+
+class ConnectionPool:
+	"""`ConnectionPool` object; thread-safe pool of connections to one database
+
+	Connections are handed out to one thread at a time, and returned to the
+	pool for re-use afterwards, so that threads never share a connection and
+	no connection is opened per query. At most `size` connections are open at
+	any time; further callers wait for one to be returned.
+	Pooled connections use autocommit, so that each read sees fresh data;
+	multi-statement writes open an explicit transaction.
+	Use `utility.connection(config)` rather than this class directly.
+
+	With leak detection enabled (see `enable_leak_detection()`), the pool
+	records when and where each connection was checked out, until it is
+	returned; see `ConnectionPool::checked_out()`.
+	"""
+
+	def __init__(
+		self,
+		config: dict[str, Any],
+		size: int=DEFAULT_POOL_SIZE,
+		timeout: Optional[float]=DEFAULT_POOL_TIMEOUT,
+	) -> None:
+		"""Creates an empty pool; connections are opened on demand
+
+		Args:
+
+			config (`dict`): Represents the database config attributes
+			size (`int`): Optional; Maximum number of open connections. Defaults to `DEFAULT_POOL_SIZE`
+			timeout (`float`): Optional; Seconds to wait for a connection when the pool is exhausted; `None` waits forever. Defaults to `DEFAULT_POOL_TIMEOUT`
+		"""
+		self._config = config
+		self._size = size
+		self._timeout = timeout
+		self._label = f"{config.get('host')}:{config.get('port')}/{config.get('schema')}"
+		self._idle: list[Any] = []  # LIFO; the most recently used is likeliest alive
+		self._open = 0
+		self._condition = threading.Condition()
+		# Leak detection only: {id(connection): (time acquired, stack)}
+		self._checked_out: dict[int, tuple[float, list[traceback.FrameSummary]]] = {}
+
+	@property
+	def size(self) -> int:
+		"""`int`: Represents the maximum number of open connections"""
+		return self._size
+
+	@property
+	def open_count(self) -> int:
+		"""`int`: Represents the number of currently open connections"""
+		return self._open
+
+	@property
+	def idle_count(self) -> int:
+		"""`int`: Represents the number of open connections not in use"""
+		return len(self._idle)
+
+	def acquire(self, timeout: Optional[float]=None) -> Any:
+		"""Checks out a connection, opening one if none are idle
+
+		The wait is bounded by default, since a thread that already holds
+		every connection (e.g. `pool_size=1`, with a write inside a
+		`snapshot()`, or a query while iterating over `stream_db_rows()`)
+		would otherwise wait on itself forever.
+
+		Args:
+
+			timeout (`float`): Optional; Seconds to wait for a connection when the pool is exhausted. Defaults to the pool's timeout
+
+		Returns:
+			A MySQL Connector connection object, for use by the calling thread only
+
+		Raises:
+			PoolExhaustedError: No connection was returned to the pool in time (a `TimeoutError`)
+		"""
+		timeout = self._timeout if timeout is None else timeout
+		start = time.perf_counter()
+		with self._condition:
+			while not self._idle and self._open >= self._size:
+				remaining = None if timeout is None else timeout - (time.perf_counter() - start)
+				if remaining is not None and remaining <= 0 or not self._condition.wait(remaining):
+					metrics.record_pool_wait(self._label, time.perf_counter() - start, timed_out=True)
+					raise PoolExhaustedError(self._label, self._size, timeout)
+			if self._idle:
+				database = self._idle.pop()
+			else:
+				database = None
+				self._open += 1  # Reserve a slot; connect outside of the lock
+		metrics.record_pool_wait(self._label, time.perf_counter() - start)
+
+		try:
+			if database is None:
+				database = connect(self._config)
+				database.autocommit = True
+			elif not database.is_connected():
+				database.reconnect()
+				database.autocommit = True
+		except Exception:
+			self._discard()
+			raise
+		if _leak_detection:
+			stack = traceback.extract_stack()[:-1]
+			with self._condition:
+				self._checked_out[id(database)] = (time.monotonic(), stack)
+		return database
+
+	def release(self, database: Any) -> None:
+		"""Returns a connection to the pool; broken connections are closed
+
+		Args:
+
+			database (`Any`): Represents the connection obtained from `ConnectionPool::acquire()`
+		"""
+		if self._checked_out:
+			with self._condition:
+				self._checked_out.pop(id(database), None)
+		try:
+			healthy = database.is_connected()
+		except Exception:  # pylint: disable=broad-except
+			healthy = False
+		if not healthy:
+			self._discard()
+			return
+		with self._condition:
+			self._idle.append(database)
+			self._condition.notify()
+
+	def checked_out(self) -> list[tuple[float, str]]:
+		"""Lists the connections currently checked out, if leak detection is enabled
+
+		Returns:
+			A `list` of `tuple`, representing how many seconds ago each
+			connection was checked out, and the stack trace of where it was
+			checked out; oldest first
+		"""
+		now = time.monotonic()
+		with self._condition:
+			leases = sorted(self._checked_out.values(), key=lambda lease: lease[0])
+		return [(now - acquired, "".join(traceback.format_list(stack))) for acquired, stack in leases]
+
+	def close(self) -> None:
+		"""Closes all idle connections"""
+		with self._condition:
+			idle, self._idle = self._idle, []
+			self._open -= len(idle)
+			self._condition.notify_all()
+		for database in idle:
+			try:
+				database.close()
+			except Exception:  # pylint: disable=broad-except
+				pass
+
+	def _discard(self) -> None:
+		with self._condition:
+			self._open -= 1
+			self._condition.notify()
+
+
+_pools: dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+# (database key, pool size) pairs already warned about by `get_pool()`
+_pool_size_warnings: set[tuple] = set()
+# Connections pinned by `snapshot()`, per thread: {database key: connection}
+_snapshots = threading.local()
+
+
+def _database_key(config: dict[str, Any]) -> tuple:
+	return (
+		config['host'], config['port'], config['user'], config['password'],
+		config['schema'], config['charset'],
+	)
+
+
+def get_pool(config: dict[str, Any]) -> ConnectionPool:
+	"""Fetches the connection pool for the database described by the config
+
+	Pools are shared by every config pointing at the same database
+	(i.e. by a `Lazuli` object and all `Character`, `Account`, and
+	`Inventory` objects created from it).
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+
+	Returns:
+		A `ConnectionPool` object
+	"""
+	key = _database_key(config)
+	pool = _pools.get(key)
+	if pool is None:
+		with _pools_lock:
+			pool = _pools.get(key)
+			if pool is None:
+				pool = ConnectionPool(
+					config,
+					config.get('pool_size', DEFAULT_POOL_SIZE),
+					config.get('pool_timeout', DEFAULT_POOL_TIMEOUT),
+				)
+				_pools[key] = pool
+	size = config.get('pool_size', DEFAULT_POOL_SIZE)
+	if size != pool.size and (key, size) not in _pool_size_warnings:
+		_pool_size_warnings.add((key, size))
+		_logger.warning(
+			"A pool of %s connections to %s:%s/%s already exists; ignoring pool_size=%s",
+			pool.size, config['host'], config['port'], config['schema'], size,
+		)
+	return pool
+
+
+def enable_leak_detection(enabled: bool=True) -> None:
+	"""Turns leak detection for pooled connections on or off (debug use)
+
+	While enabled, every pool records the stack trace of where each
+	connection was checked out, until it is returned; connections still
+	checked out are reported by `report_leaks()`, on demand, and once more
+	at interpreter shutdown. Costs a stack capture per checkout.
+	Can also be enabled by setting the `LAZULI_DEBUG_CONNECTIONS`
+	environment variable to `1`.
+
+	Args:
+
+		enabled (`bool`): Optional; Whether to enable leak detection. Defaults to `True`
+	"""
+	global _leak_detection, _leak_report_registered
+	_leak_detection = enabled
+	if enabled and not _leak_report_registered:
+		atexit.register(report_leaks)
+		_leak_report_registered = True
+
+
+def report_leaks(min_age: float=0.0) -> list[dict[str, Any]]:
+	"""Reports the connections that are checked out and have not been returned
+
+	Each one is logged as a warning, with the stack trace of where it was
+	checked out. Only tracked while leak detection is enabled (see
+	`enable_leak_detection()`).
+
+	Args:
+
+		min_age (`float`): Optional; Only report connections checked out at least this many seconds ago. Defaults to `0`
+
+	Returns:
+		A `list` of `dict`, each with the `database` (`host:port/schema`),
+		the `age` in seconds, and the `stack` of a checked-out connection
+	"""
+	leaks = []
+	for database, pool in get_pools().items():
+		for age, stack in pool.checked_out():
+			if age >= min_age:
+				leaks.append({"database": database, "age": age, "stack": stack})
+	for leak in leaks:
+		_logger.warning(
+			"Connection to %s checked out %.1f s ago and not returned; acquired at:\n%s",
+			leak["database"], leak["age"], leak["stack"], extra={"age": leak["age"]},
+		)
+	return leaks
+
+
+if _leak_detection:  # Enabled through the environment
+	enable_leak_detection()
+
+
+def get_pools() -> dict[str, ConnectionPool]:
+	"""Fetches every connection pool created so far
+
+	Returns:
+		A `dict`, mapping each database (as `host:port/schema`, followed by
+		`#n` if several pools point at it, e.g. with different users) to its
+		`ConnectionPool`
+	"""
+	with _pools_lock:
+		pools = list(_pools.items())
+	labelled: dict[str, ConnectionPool] = {}
+	for (host, port, _, _, schema, _), pool in pools:
+		label = f"{host}:{port}/{schema}"
+		if label in labelled:
+			label = f"{label}#{sum(key.startswith(label) for key in labelled)}"
+		labelled[label] = pool
+	return labelled
+
+
+@contextmanager
+def connection(config: dict[str, Any]) -> Iterator[Any]:
+	"""Checks out a pooled connection for the duration of a `with` block
+
+	Every connection used by the package is checked out through this
+	function (or `read_connection()`, which delegates to it), and is
+	returned to the pool when the block exits, even on error.
+	Any open transaction is rolled back if the block raises an exception.
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+
+	Returns:
+		A context manager, yielding a MySQL Connector connection object
+	"""
+	pool = get_pool(config)
+	with tracing.span("connect"):
+		database = pool.acquire()
+	try:
+		yield database
+	except Exception:
+		if database.in_transaction:
+			database.rollback()
+		raise
+	finally:
+		pool.release(database)
+
+
+def _pinned_connections() -> dict[tuple, Any]:
+	pinned = getattr(_snapshots, 'connections', None)
+	if pinned is None:
+		pinned = _snapshots.connections = {}
+	return pinned
+
+
+def in_snapshot(config: dict[str, Any]) -> bool:
+	"""Checks whether the current thread is inside a `snapshot()` of the database
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+
+	Returns:
+		A `bool` representing whether reads are served by a pinned snapshot
+	"""
+	return _database_key(config) in _pinned_connections()
+
+
+@contextmanager
+def snapshot(config: dict[str, Any]) -> Iterator[Any]:
+	"""Pins one connection, in a consistent-snapshot transaction, for a `with` block
+
+	Every read of the database made by the current thread inside the block
+	(through `get_db_all_hits()` or `count_in_db()`) runs over the pinned
+	connection, in a single read-only `REPEATABLE READ` transaction started
+	`WITH CONSISTENT SNAPSHOT`; all of them see the database as it was when
+	the block was entered. Writes are unaffected, and go through their own
+	connections as usual. Nested blocks re-use the outer snapshot.
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+
+	Returns:
+		A context manager, yielding the pinned MySQL Connector connection object
+	"""
+	key = _database_key(config)
+	pinned = _pinned_connections()
+	if key in pinned:
+		yield pinned[key]
+		return
+	router = config.get('router')
+	read_config = router.read_config() if router is not None else config
+	with connection(read_config) as database:
+		database.start_transaction(
+			consistent_snapshot=True,
+			isolation_level="REPEATABLE READ",
+			readonly=True,
+		)
+		pinned[key] = database
+		try:
+			yield database
+		finally:
+			del pinned[key]
+			database.rollback()  # Read-only; ends the snapshot
+
+
+@contextmanager
+def read_connection(config: dict[str, Any]) -> Iterator[Any]:
+	"""Checks out a connection for reads; the pinned one inside a `snapshot()`
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+
+	Returns:
+		A context manager, yielding a MySQL Connector connection object
+	"""
+	database = _pinned_connections().get(_database_key(config))
+	if database is not None:
+		yield database
+		return
+	with connection(config) as database:
+		yield database
+
+
+def synchronized(method: Callable) -> Callable:
+	"""Decorator; runs a method while holding the instance's `_lock`
+
+	Used on the setters and adders of `Character` and `Account`, so that
+	the database write and the in-memory update (or read-modify-write, for
+	adders) happen atomically when an instance is shared between threads.
+	The lock must be re-entrant, as adders call setters.
+	"""
+	@functools.wraps(method)
+	def wrapper(self, *args, **kwargs):
+		with self._lock:
+			return method(self, *args, **kwargs)
+	return wrapper
+
+
+def retry_on_conflict(method: Callable) -> Callable:
+	"""Decorator; re-runs a read-modify-write method on `ConcurrentUpdateError`
+
+	Meant for adders, stacked below `synchronized`. Before each retry, the
+	conflicting column is refreshed in memory with the value found in the
+	database (via the instance's `_refresh_column`), so the method
+	recomputes the new value from it. The number of retries is taken from
+	the `cas_retries` entry of the instance's DB config (`0` by default);
+	the error is re-raised once they are used up.
+	"""
+	@functools.wraps(method)
+	def wrapper(self, *args, **kwargs):
+		retries = self._database_config.get('cas_retries', 0)
+		while True:
+			try:
+				return method(self, *args, **kwargs)
+			except ConcurrentUpdateError as e:
+				if retries <= 0:
+					raise
+				retries -= 1
+				self._refresh_column(e.column, e.actual)
+	return wrapper
+
+
+def get_db_all_hits(
+	config: dict[str, str],
+	query: str,
+	params: Optional[Sequence[Any]]=None,
+	primary: bool=False,
+) -> list:
 	"""Generic function for fetching all matching data from the DB
 
 	Generic top level function for fetching all matching data from DB,
-	using the provided DB config and query
+	using the provided DB config and query. If the config holds a replica
+	router (see `routing.py`), the query is served by a replica, unless
+	`primary` is set.
 
 	Args:
 
 		config (`dict`): Represents the database config attributes
 		query (`str`): Represents the SQL query to execute
+		params (`Sequence`): Optional; Represents the values for the `%s` placeholders in the query
+		primary (`bool`): Optional; Read from the primary, for reads that must not lag behind writes. Defaults to `False`
 
 	Returns:
 		A `list` of objects, representing the result of the provided SQL query,
@@ -85,28 +631,116 @@ def get_db_all_hits(config: dict[str, str], query: str) -> list:
 		Generic error as a final catch-all
 	"""
 	try:
-		database = con.connect(
-			host=config['host'],
-			user=config['user'],
-			password=config['password'],
-			database=config['schema'],
-			port=config['port'],
-			charset=config['charset']
+		router = config.get('router')
+		if router is not None and not primary and not in_snapshot(config):
+			return router.read(_fetch_all, query, params)
+		return _fetch_all(config, query, params)
+
+	except Exception as e:
+		metrics.record_error("fetch")
+		_logger.critical(
+			"Error encountered whilst attempting to connect to the database! %s", e,
+			extra={"query": query},
 		)
-		cursor = database.cursor(dictionary=True)
-		cursor.execute(query)
-		data = cursor.fetchall()
-		database.disconnect()
 
-		return data
 
-	except Exception as e:
-		print(
-			f"CRITICAL: Error encountered whilst attempting "
-			f"to connect to the database! \n{e}"
+def _fetch_all(config: dict[str, Any], query: str, params: Optional[Sequence[Any]]) -> list:
+	start = time.perf_counter()
+	with tracing.span("query", operation="fetch", query=query) as span:
+		with read_connection(config) as database:
+			with tracing.span("execute"):
+				cursor = database.cursor(dictionary=True)
+				cursor.execute(query, params)
+			with tracing.span("fetch"):
+				data = cursor.fetchall()
+		span.set(rows=len(data))
+	_record_query("fetch", query, start, len(data))
+	return data
+
+
+def _record_query(operation: str, query: Optional[str], start: float, rows: int) -> None:
+	# Logs the timing of a successful query (at DEBUG level only), and
+	# records it in the metrics (if enabled)
+	if metrics.is_enabled():
+		metrics.record_query(operation, query, time.perf_counter() - start, rows)
+	if _logger.isEnabledFor(logging.DEBUG):
+		duration_ms = round((time.perf_counter() - start) * 1000, 2)
+		_logger.debug(
+			"%s took %.2f ms", operation, duration_ms,
+			extra={"operation": operation, "query": query, "duration_ms": duration_ms, "rows": rows},
 		)
 
 
+def _mark_write(config: dict[str, Any]) -> None:
+	# Starts the read-your-writes window of the config's replica router, if any
+	router = config.get('router')
+	if router is not None:
+		router.mark_write()
+
+
+def stream_db_rows(
+	config: dict[str, str],
+	query: str,
+	params: Optional[Sequence[Any]]=None,
+	batch_size: int=STREAM_BATCH_SIZE,
+) -> Iterator[tuple]:
+	"""Streams the rows of a query, without holding them all in memory
+
+	Rows are fetched from the server in batches of `batch_size`, over an
+	unbuffered cursor, and yielded as plain `tuple`s (in the order of the
+	selected columns). The connection is held until the rows are exhausted;
+	if iteration stops early, the remaining rows are drained first.
+	Served by a replica if the config holds a replica router, and by the
+	pinned connection inside a `snapshot()`.
+
+	Unlike `get_db_all_hits()`, errors are raised (after being logged), so
+	that a partial result is never mistaken for a complete one.
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+		query (`str`): Represents the SQL query to execute
+		params (`Sequence`): Optional; Represents the values for the `%s` placeholders in the query
+		batch_size (`int`): Optional; Number of rows fetched from the server at a time. Defaults to `STREAM_BATCH_SIZE`
+
+	Returns:
+		An iterator of `tuple`, representing the rows
+
+	Raises:
+		SQL Error 2003: Can't connect to DB
+		WinError 10060: No response from DB
+		Generic error as a final catch-all
+	"""
+	router = config.get('router')
+	if router is not None and not in_snapshot(config):
+		config = router.read_config()
+	start = time.perf_counter()
+	rows = 0
+	try:
+		with read_connection(config) as database:
+			cursor = database.cursor()
+			# No span may stay open across a `yield`: it would leak into the caller
+			with tracing.span("execute", operation="stream", query=query):
+				cursor.execute(query, params)
+			exhausted = False
+			try:
+				while True:
+					batch = cursor.fetchmany(batch_size)
+					if not batch:
+						exhausted = True
+						break
+					rows += len(batch)
+					yield from batch
+			finally:
+				if not exhausted:
+					cursor.fetchall()  # Unread rows would break the next query on this connection
+	except Exception as e:
+		metrics.record_error("stream")
+		_logger.error("Unable to stream rows from the database: %s", e, extra={"query": query})
+		raise
+	_record_query("stream", query, start, rows)
+
+
 def get_db_first_hit(config: dict[str, str], query: str) -> Any:
 	"""Generic function for fetching the first result from DB
 
@@ -141,12 +775,14 @@ def get_stat_by_column(data: dict[str, Any], column: str) -> Any:
 	try:
 		return data[column]
 	except Exception as e:
-		print(
-			f"ERROR: Unable to extract the given column for table users.\n{e}"
-		)
+		_logger.error("Unable to extract the given column for table users: %s", e)
 
 
-def write_to_db(config: dict[str, str], query: str) -> bool:
+def write_to_db(
+	config: dict[str, str],
+	query: str,
+	params: Optional[Sequence[Any]]=None,
+) -> bool:
 	"""Performs write operations to DB using the provided DB config and query
 
 	### CAN ONLY BE SET WHEN SERVER IS OFF!
@@ -155,6 +791,7 @@ def write_to_db(config: dict[str, str], query: str) -> bool:
 
 		config (`dict`): Represents the database config attributes
 		query (`str`): Represents the SQL query to execute
+		params (`Sequence`): Optional; Represents the values for the `%s` placeholders in the query
 
 	Returns:
 		A `bool` representing whether the operation was successful
@@ -165,25 +802,382 @@ def write_to_db(config: dict[str, str], query: str) -> bool:
 		List index out of range: Wrong column name
 	"""
 	try:
-		database = con.connect(
-			host=config['host'],
-			user=config['user'],
-			password=config['password'],
-			database=config['schema'],
-			port=config['port'],
-			charset=config['charset']
-		)
-
-		cursor = database.cursor(dictionary=True)
-		cursor.execute(query)
-		database.commit()
-		database.disconnect()
+		start = time.perf_counter()
+		with tracing.span("query", operation="write", query=query) as span:
+			with connection(config) as database:
+				with tracing.span("execute"):
+					cursor = database.cursor(dictionary=True)
+					cursor.execute(query, params)
+			span.set(rows=cursor.rowcount)
+		_record_query("write", query, start, cursor.rowcount)
+		_mark_write(config)
 		return True
 	except Exception as e:
-		print(f"ERROR: Unable to set stats in database.\n{e}")
+		metrics.record_error("write")
+		_logger.error("Unable to set stats in database: %s", e, extra={"query": query})
 		return False
 
 
+def compare_and_set(
+	config: dict[str, str],
+	table: str,
+	column: str,
+	row_id: int,
+	expected: Any,
+	value: Any,
+) -> bool:
+	"""Updates a column of a row, only if it still holds the value last read
+
+	Runs `UPDATE ... WHERE id = <row_id> AND <column> <=> <expected>` on the
+	primary. If no row was updated, the current value is read back: if it
+	already equals the new value, the update counts as successful;
+	otherwise, a `ConcurrentUpdateError` is raised.
+
+	### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+		table (`str`): Represents the table to update, e.g. `characters`
+		column (`str`): Represents the column to update
+		row_id (`int`): Represents the `id` of the row to update
+		expected (`Any`): Represents the value last read from the column
+		value (`Any`): Represents the value to be set
+
+	Returns:
+		A `bool` representing whether the operation was successful
+
+	Raises:
+		ConcurrentUpdateError: The column no longer holds the expected value
+		ValueError: Invalid table or column name
+	"""
+	check_column_name(table)
+	check_column_name(column)
+	try:
+		start = time.perf_counter()
+		with tracing.span("query", operation="compare_and_set", table=table, column=column) as span, \
+				connection(config) as database:
+			cursor = database.cursor()
+			with tracing.span("execute"):
+				cursor.execute(
+					f"UPDATE `{table}` SET `{column}` = %s "
+					f"WHERE `id` = %s AND `{column}` <=> %s",
+					(value, row_id, expected),
+				)
+			updated = cursor.rowcount > 0
+			span.set(rows=cursor.rowcount)
+			if not updated:
+				# Either the value changed, or it already was the new value
+				with tracing.span("fetch"):
+					cursor.execute(f"SELECT `{column}` FROM `{table}` WHERE `id` = %s", (row_id,))
+					row = cursor.fetchone()
+				actual = row[0] if row else None
+	except Exception as e:
+		metrics.record_error("compare_and_set")
+		_logger.error("Unable to set stats in database: %s", e, extra={"table": table, "column": column})
+		return False
+	if not updated and (row is None or actual != value):
+		_logger.debug(
+			"Concurrent update of %s.%s detected", table, column,
+			extra={"table": table, "column": column, "row_id": row_id},
+		)
+		raise ConcurrentUpdateError(table, column, row_id, expected, actual)
+	_record_query("compare_and_set", f"{table}.{column}", start, int(updated))
+	_mark_write(config)
+	return True
+
+
+def write_batch_to_db(
+	config: dict[str, str],
+	statements: Iterable[tuple[str, Sequence[Any]]],
+) -> Optional[int]:
+	"""Performs several write operations to DB in a single transaction
+
+	Either every statement takes effect, or (on failure) none of them do.
+
+	### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+		statements (`Iterable[tuple]`): Represents `(query, params)` pairs to execute, in order
+
+	Returns:
+		An `int`, representing the total number of rows affected.
+		Defaults to `None` if the operation fails.
+
+	Raises:
+		SQL Error 2003: Can't connect to DB
+		WinError 10060: No response from DB
+		Generic error as a final catch-all
+	"""
+	try:
+		with connection(config) as database:
+			database.start_transaction()
+			cursor = database.cursor()
+			affected = 0
+			for query, params in statements:
+				start = time.perf_counter()
+				with tracing.span("query", operation="batch_write", query=query) as span:
+					with tracing.span("execute"):
+						cursor.execute(query, params)
+					span.set(rows=cursor.rowcount)
+				_record_query("batch_write", query, start, cursor.rowcount)
+				affected += max(cursor.rowcount, 0)
+			database.commit()
+		_mark_write(config)
+		return affected
+	except Exception as e:
+		metrics.record_error("batch_write")
+		_logger.error("Unable to perform batch write; rolled back: %s", e)
+		return None
+
+
+def write_many_to_db(
+	config: dict[str, str],
+	query: str,
+	param_rows: Sequence[Sequence[Any]],
+) -> Optional[int]:
+	"""Executes one query for many rows of values in a single transaction
+
+	Uses `executemany`, in batches of `BULK_CHUNK_SIZE` rows.
+
+	### CAN ONLY BE SET WHEN SERVER IS OFF!
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+		query (`str`): Represents the SQL query to execute
+		param_rows (`Sequence`): Represents the values for the `%s` placeholders, one sequence per execution
+
+	Returns:
+		An `int`, representing the total number of rows affected.
+		Defaults to `None` if the operation fails.
+
+	Raises:
+		SQL Error 2003: Can't connect to DB
+		WinError 10060: No response from DB
+		Generic error as a final catch-all
+	"""
+	try:
+		with connection(config) as database:
+			database.start_transaction()
+			cursor = database.cursor()
+			affected = 0
+			for batch in chunk(param_rows, BULK_CHUNK_SIZE):
+				start = time.perf_counter()
+				with tracing.span("query", operation="write_many", query=query) as span:
+					with tracing.span("execute"):
+						cursor.executemany(query, batch)
+					span.set(rows=cursor.rowcount)
+				_record_query("write_many", query, start, cursor.rowcount)
+				affected += max(cursor.rowcount, 0)
+			database.commit()
+		_mark_write(config)
+		return affected
+	except Exception as e:
+		metrics.record_error("write_many")
+		_logger.error("Unable to perform batch write; rolled back: %s", e, extra={"query": query})
+		return None
+
+
+def count_in_db(
+	config: dict[str, str],
+	statements: Iterable[tuple[str, Sequence[Any]]],
+	primary: bool=False,
+) -> Optional[int]:
+	"""Sums the results of several `SELECT COUNT(*)` queries over one connection
+
+	Args:
+
+		config (`dict`): Represents the database config attributes
+		statements (`Iterable[tuple]`): Represents `(query, params)` pairs, each selecting a single count
+		primary (`bool`): Optional; Count on the primary rather than a replica. Defaults to `False`
+
+	Returns:
+		An `int`, representing the sum of all counts.
+		Defaults to `None` if the operation fails.
+
+	Raises:
+		SQL Error 2003: Can't connect to DB
+		WinError 10060: No response from DB
+		Generic error as a final catch-all
+	"""
+	try:
+		router = config.get('router')
+		if router is not None and not primary and not in_snapshot(config):
+			return router.read(_count, list(statements))
+		return _count(config, statements)
+	except Exception as e:
+		metrics.record_error("count")
+		_logger.critical("Error encountered whilst attempting to connect to the database! %s", e)
+		return None
+
+
+def _count(config: dict[str, Any], statements: Iterable[tuple[str, Sequence[Any]]]) -> int:
+	with read_connection(config) as database:
+		cursor = database.cursor()
+		total = 0
+		for query, params in statements:
+			start = time.perf_counter()
+			with tracing.span("query", operation="count", query=query):
+				with tracing.span("execute"):
+					cursor.execute(query, params)
+				with tracing.span("fetch"):
+					total += cursor.fetchone()[0]
+			_record_query("count", query, start, 1)
+	return total
+
+
+def chunk(values: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+	"""Splits a sequence into consecutive slices of at most `size` items
+
+	Args:
+
+		values (`Sequence`): Represents the values to split
+		size (`int`): Represents the maximum length of each slice
+
+	Returns:
+		An iterator of slices, in order
+	"""
+	for start in range(0, len(values), size):
+		yield values[start:start + size]
+
+
+def check_column_name(column: str) -> str:
+	"""Ensures a column name is a plain identifier, safe to quote in SQL
+
+	Args:
+
+		column (`str`): Represents the column name in DB
+
+	Returns:
+		A `str`, representing the column name unchanged
+
+	Raises:
+		ValueError: Column name contains characters other than letters, digits, or underscores
+	"""
+	if not _IDENTIFIER.match(column):
+		raise ValueError(f"Invalid column name: {column}")
+	return column
+
+
+def clamped_add_params(amount: int, lower: int, upper: int) -> list[int]:
+	"""Computes the values for the placeholders of `CLAMPED_ADD`
+
+	`column + amount` is clamped to `[lower, upper]` as
+	`GREATEST(LEAST(column, upper - amount), lower) + amount` (adding), or
+	`GREATEST(LEAST(column, upper), lower - amount) + amount` (subtracting).
+	Unlike clamping the sum, no intermediate value leaves the bounds, so
+	columns spanning their whole SQL type (e.g. `exp`) cannot overflow.
+
+	Args:
+
+		amount (`int`): Represents the amount to be added (may be negative)
+		lower (`int`): Represents the smallest value allowed
+		upper (`int`): Represents the largest value allowed
+
+	Returns:
+		A `list` of the upper bound, lower bound, and amount placeholders
+	"""
+	amount = max(lower - upper, min(upper - lower, int(amount)))
+	return [upper - max(amount, 0), lower - min(amount, 0), amount]
+
+
+def build_where_clause(
+	filters: Optional[dict[str, Any]],
+) -> tuple[str, list[Any]]:
+	"""Builds a parameterised `WHERE` clause from a dictionary of filters
+
+	Keys are column names, optionally followed by a comparison operator
+	(e.g. `"level >="`); the operator defaults to `=`. List, tuple, and set
+	values are matched with `IN (...)`. All filters are joined with `AND`.
+
+	Args:
+
+		filters (`dict`): Represents the filters, e.g. `{"level >=": 200, "job": [110, 111, 112]}`
+
+	Returns:
+		A `tuple` of the clause (empty if there are no filters) and
+		the values for its placeholders
+
+	Raises:
+		ValueError: Invalid column name, operator, or empty `IN (...)` list
+	"""
+	if not filters:
+		return "", []
+	conditions = []
+	params = []
+	for key, value in filters.items():
+		column, _, operator = key.strip().partition(" ")
+		operator = operator.strip() or "="
+		check_column_name(column)
+		if isinstance(value, (list, tuple, set, frozenset)):
+			if operator not in ("=", "!=", "<>"):
+				raise ValueError(f"Operator {operator} cannot be used with a list!")
+			if not value:
+				raise ValueError(f"Empty list of values for column {column}!")
+			placeholders = ", ".join(["%s"] * len(value))
+			negation = "" if operator == "=" else "NOT "
+			conditions.append(f"`{column}` {negation}IN ({placeholders})")
+			params.extend(value)
+		else:
+			if operator not in FILTER_OPERATORS:
+				raise ValueError(f"Invalid operator: {operator}")
+			conditions.append(f"`{column}` {operator} %s")
+			params.append(value)
+	return "WHERE " + " AND ".join(conditions), params
+
+
+def build_chunked_statements(
+	query: str,
+	params: Sequence[Any],
+	filters: Optional[dict[str, Any]],
+	chunk_size: int=BULK_CHUNK_SIZE,
+) -> list[tuple[str, list[Any]]]:
+	"""Appends filters to a query, splitting long `IN (...)` lists into chunks
+
+	The longest `IN (...)` list in the filters is split into slices of
+	`chunk_size` values, producing one statement per slice; all other
+	filters are repeated in every statement. Negated lists (`!=` or `<>`,
+	i.e. `NOT IN (...)`) are never split, since every statement would then
+	match the rows excluded by the other slices; they are repeated whole.
+	Duplicates are dropped from the list before it is split (strings
+	case-insensitively, as the DB's collation compares them), so that no
+	row is matched by two statements.
+
+	Args:
+
+		query (`str`): Represents the SQL query, up to (excluding) the `WHERE` clause
+		params (`Sequence`): Represents the values for the placeholders in `query`
+		filters (`dict`): Represents the filters; see `build_where_clause()`
+		chunk_size (`int`): Optional; Maximum number of values per `IN (...)` list
+
+	Returns:
+		A `list` of `(query, params)` pairs, suitable for `write_batch_to_db()`
+	"""
+	filters = dict(filters or {})
+	list_keys = [
+		key for key, value in filters.items()
+		if isinstance(value, (list, tuple, set, frozenset))
+		and (key.strip().partition(" ")[2].strip() or "=") == "="
+	]
+	if not list_keys:
+		where, where_params = build_where_clause(filters)
+		return [(f"{query} {where}".strip(), [*params, *where_params])]
+
+	longest = max(list_keys, key=lambda key: len(filters[key]))
+	unique_values: dict[Any, Any] = {}  # Folded value -> first spelling of it
+	for value in filters[longest]:
+		unique_values.setdefault(value.casefold() if isinstance(value, str) else value, value)
+	statements = []
+	for values_chunk in chunk(list(unique_values.values()), chunk_size):
+		filters[longest] = values_chunk
+		where, where_params = build_where_clause(filters)
+		statements.append((f"{query} {where}", [*params, *where_params]))
+	return statements
+
+
 def get_inv_type_by_name(inv_string: str) -> int:
 	"""`int`: Encode an inventory type using its common name"""
 	inv_type = MAP_INV_TYPES.get(inv_string)
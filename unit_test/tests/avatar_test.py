@@ -0,0 +1,52 @@
+"""This is a unit test for checking bulk avatar URL generation
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import pytest
+from lazuli.avatar import AvatarCache, build_avatar_url
+from lazuli.database import Lazuli
+
+URL = "https://maplestory.io/api/GMS/216/Character/2001/20000,30000,1002140,1302000/stand1/1"
+
+
+def test_build_avatar_url():
+	assert build_avatar_url(1, 20000, 30000, [1002140, 1302000]) == URL
+
+
+def test_avatar_cache():
+	cache = AvatarCache(max_size=2)
+	outfit = (1, 20000, 30000, (1002140, 1302000))
+	assert cache.get_url(outfit) == URL and cache.get_url(outfit) == URL
+	assert (cache.hits, cache.misses) == (1, 1)
+	cache.get_url((1, 20000, 30000, ()))
+	cache.get_url(outfit)  # Most recent again; the bare outfit is evicted next
+	cache.get_url((2, 20000, 30000, ()))
+	assert len(cache) == 2 and cache.get_url(outfit) == URL and cache.hits == 3
+	with pytest.raises(ValueError):
+		AvatarCache(max_size=0)
+
+
+def test_get_avatar_urls(fake_db):
+	outfits = {
+		"KOOKIIE": [(1, 20000, 30000, 1002140), (1, 20000, 30000, 1302000)],
+		"tester": [(0, 20001, 30001, None)],  # Nothing equipped
+	}
+	fake_db.serve(lambda query, params: [
+		{'name': name, 'skincolor': skin, 'face': face, 'hair': hair, 'itemid': item_id}
+		for name, rows in outfits.items() if name.lower() in [param.lower() for param in params[1:]]
+		for skin, face, hair, item_id in rows
+	])
+	lazuli = Lazuli(host="avatar-test-1")
+	urls = lazuli.get_avatar_urls(["kookiie", "tester", "nobody"])
+	assert urls == {
+		"kookiie": URL,
+		"tester": "https://maplestory.io/api/GMS/216/Character/2000/20001,30001/stand1/1",
+	}
+	assert len(fake_db.queries) == 1 and fake_db.queries[0][1] == [-1, "kookiie", "tester", "nobody"]
+
+	lazuli.get_avatar_urls(["KOOKIIE"])
+	assert lazuli._avatar_cache.hits == 1, "An unchanged outfit should reuse its URL!"
+	outfits["KOOKIIE"].pop()  # Unequips the weapon
+	assert lazuli.get_avatar_urls(["KOOKIIE"])["KOOKIIE"].endswith("/20000,30000,1002140/stand1/1")
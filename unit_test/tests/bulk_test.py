@@ -0,0 +1,63 @@
+"""This is a unit test for checking bulk account bans
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import re
+import pytest
+from lazuli.database import Lazuli
+import lazuli.utility as utils
+
+
+@pytest.fixture
+def accounts(fake_db):
+	"""Returns the rows of the `accounts` table, which queries read and write"""
+	accounts = [
+		{'id': 1, 'name': "tester0x00", 'banned': 0, 'banreason': None},
+		{'id': 2, 'name': "tester0x01", 'banned': 1, 'banreason': "Botting"},
+		{'id': 3, 'name': "tester0x02", 'banned': 1, 'banreason': "Lorem Ipsum"},
+	]
+
+	def answer(query, params):
+		params = list(params)
+		if query.startswith("UPDATE"):
+			banned, reason = params[:2]
+			params = params[2:]
+		ids = params[:len(re.findall(r"%s", (re.search(r"`id` IN \(([^)]*)\)", query) or [""])[0]))]
+		names = params[len(ids):-2]
+		matched = [
+			account for account in accounts
+			if (account['id'] in ids or account['name'] in names)
+			and not (account['banned'] == params[-2] and account['banreason'] == params[-1])
+		]
+		if not query.startswith("UPDATE"):
+			return [{'id': account['id']} for account in matched]
+		for account in matched:
+			account['banned'], account['banreason'] = banned, reason
+		return len(matched)
+
+	fake_db.serve(answer)
+	return accounts
+
+
+def test_ban_accounts_counts_match(accounts, fake_db, monkeypatch):
+	monkeypatch.setattr(utils, "BULK_CHUNK_SIZE", 1)  # Account 1 matches in two chunks: by ID and by name
+	lazuli = Lazuli(host="bulk-test-1")
+	targets = [1, 2, 3, "tester0x00"]
+	assert lazuli.ban_accounts(targets, "Lorem Ipsum", dry_run=True) == 2, "Already banned for the reason, or counted twice!"
+	assert "WHERE (`id` IN (%s) OR `name` IN (%s))" in fake_db.statements[0]
+	assert accounts[0]['banned'] == 0, "Dry run should not change anything!"
+	assert lazuli.ban_accounts(targets, "Lorem Ipsum") == 2
+	assert [account['banreason'] for account in accounts] == ["Lorem Ipsum"] * 3
+	assert lazuli.ban_accounts(targets, "Lorem Ipsum", dry_run=True) == 0
+	assert lazuli.ban_accounts([], "Lorem Ipsum") == 0
+
+
+def test_dry_runs_read_from_the_primary(fake_db):
+	fake_db.serve(lambda query, params: [(1,)] if "COUNT(*)" in query else [{'id': 1}])
+	lazuli = Lazuli(host="bulk-test-2", replicas=["bulk-test-2-replica"])
+	assert lazuli.unstuck_all({"id": [1, 1]}, dry_run=True) == 1, "Duplicate IDs were counted twice!"
+	assert lazuli.ban_accounts([1], "Lorem Ipsum", dry_run=True) == 1
+	hosts = {connection.config['host'] for connection, call, _ in fake_db.calls if call == "execute"}
+	assert hosts == {"bulk-test-2"}, f"Dry runs read from a replica! Hosts: {hosts}"
@@ -0,0 +1,77 @@
+"""This is a unit test for checking compare-and-set updates
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import itertools
+import pytest
+from lazuli.character import Character
+from lazuli.exceptions import ConcurrentUpdateError
+
+CHAR_STATS = {
+	'id': 1, 'accountid': 1, 'name': "tester0x00", 'level': 10, 'exp': 0,
+	'str': 4, 'dex': 4, 'luk': 4, 'int': 4, 'maxhp': 50, 'maxmp': 50,
+	'meso': 1000, 'job': 0, 'skincolor': 0, 'gender': 0, 'fame': 0,
+	'hair': 30000, 'face': 20000, 'ap': 0, 'map': 100000000, 'buddyCapacity': 20,
+}
+ACCOUNT_INFO = {
+	'id': 1, 'name': "tester0x00", 'loggedin': 0, 'banned': 0, 'banreason': "",
+	'nxCash': 0, 'mPoints': 0, 'vpoints': 0, 'realcash': 0, 'chrslot': 6,
+}
+
+
+# Connection pools are shared per host; each test gets a fresh one
+HOSTS = (f"cas-test-{index}" for index in itertools.count())
+
+
+@pytest.fixture
+def row(fake_db):
+	"""Returns the row in the 'database', which connections read and write"""
+	data = dict(CHAR_STATS)
+
+	def answer(query, params):
+		if not query.startswith("UPDATE"):
+			return [(data[query.split("`")[1]],)]
+		column = query.split("`")[3]
+		value, _, expected = params
+		changed = int(data[column] == expected and data[column] != value)
+		if data[column] == expected:
+			data[column] = value
+		return changed
+
+	fake_db.serve(answer)
+	return data
+
+
+def make_char(cas_retries):
+	config = {
+		'host': next(HOSTS), 'user': "root", 'password': "", 'schema': "kms_316",
+		'port': 3306, 'charset': "euckr", 'compare_and_set': True, 'cas_retries': cas_retries,
+	}
+	return Character(dict(CHAR_STATS), config, dict(ACCOUNT_INFO))
+
+
+def test_unchanged_value_is_set(row):
+	char = make_char(0)
+	char.meso = 5000
+	assert row['meso'] == char.meso == 5000
+	char.meso = 5000  # No-op updates are not conflicts
+	assert row['meso'] == 5000
+
+
+def test_conflict_is_raised(row):
+	char = make_char(0)
+	row['meso'] = 2000  # Changed by the game server after the character was read
+	with pytest.raises(ConcurrentUpdateError) as error:
+		char.add_mesos(500)
+	assert (error.value.expected, error.value.actual) == (1000, 2000)
+	assert row['meso'] == 2000 and char.meso == 1000, "Conflicting update was written!"
+
+
+def test_conflict_is_retried(row):
+	char = make_char(1)
+	row['meso'] = 2000
+	char.add_mesos(500)
+	assert row['meso'] == char.meso == 2500, \
+		f"Retry test failed! Expected: 2500; Encountered: {row['meso']} (DB), {char.meso} (memory)"
@@ -0,0 +1,71 @@
+"""This is a unit test for checking multi-world queries
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required; the rankings of each world are replaced with fixed
+ones.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import threading
+import pytest
+from lazuli.cluster import LazuliCluster
+from lazuli.database import Lazuli
+
+RANKINGS = {
+	"Scania": [("KOOKIIE", 900), ("tester0x00", 500), ("tester0x01", 100)],
+	"Bera": [("Brandon", 800), ("Hinogi", 500)],
+	"Broa": [],
+}
+
+
+@pytest.fixture
+def cluster():
+	"""Returns a cluster of worlds with fixed rankings, which must be queried at once"""
+	barrier = threading.Barrier(len(RANKINGS), timeout=5)
+	worlds = {}
+	for world, ranking in RANKINGS.items():
+		database = Lazuli(schema=world)
+
+		def get_ranking(column, number_of_players=5, show_gm=False, job_ids=None, ranking=ranking):
+			barrier.wait()  # Times out unless every world is queried concurrently
+			return ranking[:number_of_players]
+
+		database.get_ranking = get_ranking
+		worlds[world] = database
+	with LazuliCluster(worlds) as cluster_object:
+		yield cluster_object
+
+
+@pytest.mark.parametrize("number_of_players, expected", [
+	(1, [("KOOKIIE", 900, "Scania")]),
+	(3, [("KOOKIIE", 900, "Scania"), ("Brandon", 800, "Bera"), ("tester0x00", 500, "Scania")]),
+	(10, [
+		("KOOKIIE", 900, "Scania"), ("Brandon", 800, "Bera"), ("tester0x00", 500, "Scania"),
+		("Hinogi", 500, "Bera"), ("tester0x01", 100, "Scania"),
+	]),
+])
+def test_merged_ranking(cluster, number_of_players, expected):
+	ranking = cluster.get_meso_ranking(number_of_players)
+	assert ranking == expected, \
+		f"Merged ranking test failed! Expected: {expected}; Encountered: {ranking}"
+
+
+def test_worlds(cluster):
+	assert cluster.worlds == list(RANKINGS)
+	assert cluster["Bera"]._database_config['schema'] == "Bera"
+
+
+def test_map_raises_once_every_world_is_done():
+	finished = []
+	release = threading.Event()
+
+	def query(database):
+		if database is cluster_object["Scania"]:
+			raise RuntimeError("Scania is down")
+		release.wait(5)
+		finished.append(database)
+
+	with LazuliCluster({world: {"schema": world} for world in RANKINGS}) as cluster_object:
+		threading.Timer(0.05, release.set).start()
+		with pytest.raises(RuntimeError, match="Scania is down"):
+			cluster_object.map(query)
+		assert len(finished) == 2, "map() raised before every world was done!"
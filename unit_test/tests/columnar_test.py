@@ -0,0 +1,69 @@
+"""This is a unit test for checking columnar character snapshots
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import pytest
+from lazuli.columnar import CharacterColumns
+from lazuli.database import Lazuli
+import lazuli.utility as utils
+
+# job, level, meso
+ROWS = [
+	(112, 200, 1000),
+	(112, 180, 0),
+	(232, 250, 5000000000),  # Beyond 32 bits
+	(232, 150, 20),
+	(0, 10, 5),
+]
+
+
+@pytest.fixture
+def queries(fake_db):
+	"""Returns the list that every connection records its queries to"""
+	fake_db.serve(ROWS)
+	return fake_db.queries
+
+
+def test_load_character_columns(queries):
+	lazuli = Lazuli(host="columnar-test-1")
+	table = lazuli.load_character_columns(["level", "meso"], {"gm <": 1}, use_numpy=False)
+	assert queries == [("SELECT `job`, `level`, `meso` FROM `characters` WHERE `gm` < %s", [1])], \
+		f"Unexpected query: {queries}"
+	assert len(table) == len(ROWS) and table.columns == ["job", "level", "meso"]
+	assert table["level"].typecode == "h", f"Level held as {table['level'].typecode}!"
+	assert list(table["meso"]) == [row[2] for row in ROWS]
+
+
+def test_stream_drains_when_stopped_early(queries):
+	config = Lazuli(host="columnar-test-2")._database_config
+	rows = utils.stream_db_rows(config, "SELECT 1", batch_size=2)
+	assert next(rows) == ROWS[0]
+	rows.close()  # The connection goes back to the pool with no unread rows
+	assert list(utils.stream_db_rows(config, "SELECT 1")) == ROWS
+
+
+def test_group_by_job():
+	table = CharacterColumns.from_rows(["job", "level", "meso"], ROWS, use_numpy=False)
+	assert table.group_by_job("level") == {"Beginner": 10, "Hero": 190, "Bishop": 200}
+	assert table.group_by_job("level", "max") == {"Beginner": 10, "Hero": 200, "Bishop": 250}
+	assert table.group_by("job", "meso", "count") == {0: 1, 112: 2, 232: 2}
+	with pytest.raises(ValueError):
+		table.group_by("job", "meso", "median")
+
+
+def test_widening_and_nulls():
+	table = CharacterColumns.from_rows(["level", "gm"], [(1, 0), (70000, None)], use_numpy=False)
+	assert table["level"].typecode == "q" and list(table["level"]) == [1, 70000]
+	assert table["gm"].typecode == "d" and table["gm"][1] != table["gm"][1], "NULL was not loaded as nan!"
+	with pytest.raises(ValueError):
+		CharacterColumns.from_rows(["name"], [("KOOKIIE",)], use_numpy=False)
+
+
+def test_statistics():
+	table = CharacterColumns.from_rows(["job", "meso"], [(0, 0), (0, 0), (0, 0), (0, 100)], use_numpy=False)
+	assert table.gini("meso") == pytest.approx(0.75), f"Gini: {table.gini('meso')}"
+	summary = table.describe("meso")
+	assert summary["count"] == 4 and summary["mean"] == 25 and summary["p50"] == 0 and summary["max"] == 100
+	assert [count for _, _, count in table.histogram("meso", bins=4)] == [3, 0, 0, 1]
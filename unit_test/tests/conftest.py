@@ -0,0 +1,126 @@
+"""Shared fixtures for the unit tests
+
+NOTE: PLACE THIS FILE IN THE ROOT OF THE REPOSITORY, ALONG WITH THE UNIT TEST FILES!
+Tests that do not require a database replace MySQL Connector connections
+with `FakeConnection`s, through the `fake_db` fixture. Every fake connection
+of a test answers queries from the same `FakeDatabase`, which records every
+query and call, and serves either fixed rows or rows computed by a function
+of the query (e.g. from an in-memory table).
+Note that connection pools are shared per host; give each test's `Lazuli`
+object a host of its own, so that it does not re-use another test's fakes.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import threading
+from typing import Any, Callable, Optional, Sequence, Union
+import pytest
+import lazuli.utility as utils
+
+# Rows (served to every query), a rowcount (for writes), or a function of
+# `(query, params)` returning either
+Answer = Union[Sequence[Any], int, Callable[[str, Optional[Sequence[Any]]], Union[Sequence[Any], int]]]
+
+
+class FakeDatabase:
+	"""Answers the queries of every `FakeConnection` of a test, and records them"""
+
+	def __init__(self) -> None:
+		self.queries: list[tuple[str, Optional[Sequence[Any]]]] = []  # (query, params), in order
+		self.calls: list[tuple["FakeConnection", str, Any]] = []  # (connection, call, query or arguments)
+		self.connections: list["FakeConnection"] = []  # Every connection opened, in order
+		self._lock = threading.Lock()  # Connections may be used from several threads
+		self._answer: Callable[[str, Optional[Sequence[Any]]], Union[Sequence[Any], int]]
+		self.serve([])
+
+	@property
+	def statements(self) -> list[str]:
+		"""`list[str]`: Represents the queries run so far, without their parameters"""
+		return [query for query, _ in self.queries]
+
+	def serve(self, answer: Answer) -> "FakeDatabase":
+		"""Sets what every query returns from now on; see `Answer`"""
+		self._answer = answer if callable(answer) else lambda query, params: answer
+		return self
+
+	def connect(self, config: dict[str, Any]) -> "FakeConnection":
+		"""Stands in for `utility.connect()`"""
+		connection = FakeConnection(self, config)
+		with self._lock:
+			self.connections.append(connection)
+		return connection
+
+	def record(self, connection: "FakeConnection", call: str, detail: Any=None) -> None:
+		with self._lock:
+			self.calls.append((connection, call, detail))
+
+	def execute(self, connection: "FakeConnection", query: str, params: Optional[Sequence[Any]]) -> Union[list[Any], int]:
+		with self._lock:
+			self.queries.append((query, params))
+			self.calls.append((connection, "execute", query))
+		result = self._answer(query, params)
+		return result if isinstance(result, int) else list(result)
+
+
+class FakeConnection:
+	"""Stands in for a MySQL Connector connection; see `FakeDatabase`"""
+	autocommit = True
+	in_transaction = False
+
+	def __init__(self, database: FakeDatabase, config: dict[str, Any]) -> None:
+		self.database = database
+		self.config = config  # Of the host that the connection was opened to
+
+	def is_connected(self) -> bool:
+		return True
+
+	def start_transaction(self, **kwargs: Any) -> None:
+		self.in_transaction = True
+		self.database.record(self, "start_transaction", kwargs)
+
+	def commit(self) -> None:
+		self.in_transaction = False
+		self.database.record(self, "commit")
+
+	def rollback(self) -> None:
+		self.in_transaction = False
+		self.database.record(self, "rollback")
+
+	def close(self) -> None:
+		self.database.record(self, "close")
+
+	def cursor(self, dictionary: bool=False) -> "FakeCursor":
+		return FakeCursor(self)
+
+
+class FakeCursor:
+	"""Stands in for a MySQL Connector cursor; serves the rows of its last query"""
+
+	def __init__(self, connection: FakeConnection) -> None:
+		self._connection = connection
+		self._rows: list[Any] = []
+		self.rowcount = -1
+
+	def execute(self, query: str, params: Optional[Sequence[Any]]=None) -> None:
+		result = self._connection.database.execute(self._connection, query, params)
+		if isinstance(result, int):
+			self._rows, self.rowcount = [], result
+		else:
+			self._rows, self.rowcount = result, len(result)
+
+	def fetchone(self) -> Any:
+		return self._rows.pop(0) if self._rows else None
+
+	def fetchmany(self, size: int) -> list[Any]:
+		rows, self._rows = self._rows[:size], self._rows[size:]
+		return rows
+
+	def fetchall(self) -> list[Any]:
+		rows, self._rows = self._rows, []
+		return rows
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> FakeDatabase:
+	"""Returns the fake database that every connection opened by the test uses"""
+	database = FakeDatabase()
+	monkeypatch.setattr(utils, "connect", database.connect)
+	return database
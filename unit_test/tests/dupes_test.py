@@ -0,0 +1,84 @@
+"""This is a unit test for checking the duplicate-item scanner
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import pytest
+from lazuli.database import Lazuli
+from lazuli.dupes import Thresholds, scan_sorted_rows
+
+# (itemid, characterid, quantity) rows of `inventoryitems`
+ITEMS = [
+	(1002140, 1, 1), (1002140, 1, 1), (1002140, 1, 1), (1002140, 2, 1), (1002140, 3, 1),
+	(2000000, 1, 100), (2000000, 2, 100),
+	(4000000, 2, 300), (4000000, 2, 300), (4000000, 3, 50),
+]
+NAMES = {1: "KOOKIIE", 2: "tester", 3: "newbie"}
+
+
+def test_thresholds():
+	thresholds = Thresholds({1002140: 5}, None)
+	assert thresholds(1002140) == 5 and thresholds(2000000) is None
+	assert thresholds.item_ids == [1002140] and thresholds.lowest == 5
+	assert Thresholds({1002140: 5}, 3).item_ids is None
+	assert Thresholds({1002140: 5}, 3).lowest == 3
+	with pytest.raises(ValueError):
+		Thresholds(None, None)
+	with pytest.raises(ValueError):
+		Thresholds({1002140: 0}, None)
+
+
+def test_scan_sorted_rows():
+	findings = scan_sorted_rows(sorted(ITEMS), Thresholds({1002140: 5}, 500), top_owners=2)
+	assert [finding.item_id for finding in findings] == [4000000, 1002140]  # 650/500, then 5/5
+	equip = findings[1]
+	assert (equip.quantity, equip.rows, equip.owners) == (5, 5, 3)
+	assert [(owner.character_id, owner.quantity, owner.rows) for owner in equip.top_owners] == [(1, 3, 3), (2, 1, 1)]
+	assert findings[0].severity == 1.3
+
+	findings = scan_sorted_rows(sorted(ITEMS), Thresholds(None, 500), owner_threshold=100)
+	assert [owner.character_id for owner in findings[0].top_owners] == [2], "Owners below the owner threshold were listed!"
+	assert scan_sorted_rows([], Thresholds(None, 1)) == []
+
+
+def answer(query, params):
+	"""Serves the `scan_for_dupes` queries from `ITEMS` and `NAMES`"""
+	params = list(params or [])
+	if "FROM `characters`" in query:
+		return [{'id': id_, 'name': NAMES[id_]} for id_ in params]
+	items = [row for row in ITEMS if "`itemid` IN" not in query or row[0] in params]
+	if "ORDER BY" in query:  # Streamed scan
+		return sorted(items)
+	minimum = params[-1]
+	groups = {}
+	if "GROUP BY `itemid`, `characterid`" in query:
+		for item_id, character_id, quantity in items:
+			total, stacks = groups.get((item_id, character_id), (0, 0))
+			groups[item_id, character_id] = (total + quantity, stacks + 1)
+		return [(*key, total, stacks) for key, (total, stacks) in groups.items() if total >= minimum]
+	for item_id, character_id, quantity in items:
+		groups.setdefault(item_id, []).append((character_id, quantity))
+	return [
+		{
+			'itemid': item_id, 'total': sum(quantity for _, quantity in rows),
+			'stacks': len(rows), 'owners': len({character_id for character_id, _ in rows}),
+		}
+		for item_id, rows in groups.items()
+		if sum(quantity for _, quantity in rows) >= minimum
+	]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_scan_for_dupes(fake_db, streaming):
+	fake_db.serve(answer)
+	lazuli = Lazuli(host=f"dupes-test-{int(streaming)}")
+	findings = lazuli.scan_for_dupes({1002140: 5}, default_threshold=500, top_owners=1, streaming=streaming)
+	assert [(finding.item_id, finding.quantity, finding.owners) for finding in findings] == [(4000000, 650, 2), (1002140, 5, 3)]
+	assert findings[0].top_owners == [(2, 600, 2, "tester")]
+	assert findings[1].top_owners == [(1, 3, 3, "KOOKIIE")]
+	assert "FROM `characters`" in fake_db.statements[-1]
+
+	fake_db.queries.clear()
+	assert lazuli.scan_for_dupes({2000000: 1000}, streaming=streaming) == []
+	assert "`itemid` IN" in fake_db.statements[0], "Only the items given should be scanned!"
@@ -0,0 +1,71 @@
+"""This is a unit test for checking the economy report
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+from decimal import Decimal
+import re
+import pytest
+from lazuli.database import Lazuli
+from lazuli.economy import split_ranges
+
+CHARACTERS = {id_: id_ * 1000 for id_ in range(1, 26)}  # ID -> mesos
+ACCOUNTS = {id_: id_ * 10 for id_ in range(5, 11)}  # ID -> NX
+ITEMS = {id_: (2 if id_ % 2 else -1, id_) for id_ in range(100, 131)}  # ID -> (inventorytype, quantity)
+
+
+def test_split_ranges():
+	assert split_ranges(1, 25, 10) == [(1, 11), (11, 21), (21, 26)]
+	assert split_ranges(7, 7, 10) == [(7, 8)]
+
+
+def answer(query, params, failing=None):
+	"""Serves the `economy_report` queries from the tables above"""
+	table = re.search(r"FROM `(\w+)`", query).group(1)
+	keys = {"characters": CHARACTERS, "accounts": ACCOUNTS, "inventoryitems": ITEMS}[table]
+	if table == failing:
+		raise RuntimeError("Lost connection")
+	if "MIN(" in query:
+		return [{'low': min(keys), 'high': max(keys)}]
+	low, high = params
+	ids = [id_ for id_ in keys if low <= id_ < high]
+	if table == "characters":
+		return [{'characters': len(ids), 'meso': Decimal(sum(CHARACTERS[id_] for id_ in ids))}]
+	if table == "accounts":
+		return [{
+			'accounts': len(ids), 'nx': Decimal(sum(ACCOUNTS[id_] for id_ in ids)),
+			'maple_points': None, 'vote_points': Decimal(0), 'donation_points': Decimal(len(ids)),
+		}]
+	tabs = {}
+	for id_ in ids:
+		stacks, quantity = tabs.get(ITEMS[id_][0], (0, 0))
+		tabs[ITEMS[id_][0]] = (stacks + 1, quantity + ITEMS[id_][1])
+	return [
+		{'inventorytype': tab, 'stacks': stacks, 'quantity': Decimal(quantity)}
+		for tab, (stacks, quantity) in tabs.items()
+	]
+
+
+def test_economy_report(fake_db):
+	fake_db.serve(answer)
+	report = Lazuli(host="economy-test-1").economy_report(concurrency=3, range_size=10)
+	assert report.totals == {
+		'characters': 25, 'meso': sum(CHARACTERS.values()),
+		'accounts': 6, 'nx': sum(ACCOUNTS.values()), 'maple_points': 0, 'vote_points': 0, 'donation_points': 6,
+	}
+	assert report.items_by_tab == {
+		'use': {'stacks': 15, 'quantity': sum(id_ for id_ in ITEMS if id_ % 2)},
+		'equipped': {'stacks': 16, 'quantity': sum(id_ for id_ in ITEMS if not id_ % 2)},
+	}
+	assert report.ranges == 3 + 1 + 4 and len(fake_db.queries) == 3 + report.ranges
+	assert set(report.timings) == {"characters", "accounts", "inventoryitems"}
+	assert report.elapsed >= max(report.timings.values()) / 3
+	assert "WHERE `inventoryitemid` >= %s AND `inventoryitemid` < %s GROUP BY `inventorytype`" in "\n".join(fake_db.statements)
+
+
+def test_economy_report_failure(fake_db):
+	fake_db.serve(lambda query, params: answer(query, params, failing="accounts"))
+	assert Lazuli(host="economy-test-2").economy_report() is None, "Partial totals should not be reported!"
+	with pytest.raises(ValueError):
+		Lazuli(host="economy-test-2").economy_report(concurrency=0)
@@ -45,3 +45,38 @@ def test_level_ranking(azure, expected_1st, expected_2nd):
 		f"Level Ranking test failed! Player: {azure.get_level_ranking()[1]}; Type: {type(azure.get_level_ranking()[1][0])}"
 
 # Other general methods omitted for being the exact same logic in the engine
+
+
+# Bulk mutation testing -------------------------------------------------------------------------------
+@pytest.mark.parametrize("names, delta", [(["tester0x00", "tester0x01"], 314159)])
+def test_bulk_meso_changes(azure, names, delta):
+	before = [azure.get_char_by_name(name).meso for name in names]
+	affected = azure.add_mesos_bulk(delta, {"name": names})
+	assert affected == len(names), \
+		f"Bulk meso test failed! Rows affected: {affected}; Type: {type(affected)}"
+	after = [azure.get_char_by_name(name).meso for name in names]
+	assert after == [meso + delta for meso in before], \
+		f"Bulk meso test failed! Before: {before}; After: {after}"
+	azure.add_char_stat_by_name("meso", {name: -delta for name in names})  # reset to baseline
+	assert [azure.get_char_by_name(name).meso for name in names] == before
+
+
+@pytest.mark.parametrize("expected", [1])
+def test_unstuck_all_dry_run(azure, expected):
+	assert azure.unstuck_all({"name": ["tester0x00", "tester0x01"]}, dry_run=True) == expected, \
+		f"Bulk unstuck (dry run) test failed! Count: {azure.unstuck_all(dry_run=True)}"
+	assert azure.get_online_count() == expected  # dry run should not change anything
+
+
+@pytest.mark.parametrize("targets, expected", [([90001, "tester0x01"], 2)])
+def test_ban_accounts_dry_run(azure, targets, expected):
+	assert azure.ban_accounts(targets, "Lorem Ipsum", dry_run=True) == expected, \
+		f"Bulk ban (dry run) test failed! Count: {azure.ban_accounts(targets, 'Lorem Ipsum', dry_run=True)}"
+	assert azure.get_account_by_username("tester0x01").banned == 0  # dry run should not change anything
+
+
+@pytest.mark.parametrize("branch, expected", [("Hero", [])])
+def test_branch_ranking(azure, branch, expected):
+	# Tester characters are Beginners, so they should not be ranked as Heroes
+	assert [name for name, _ in azure.get_ranking_by_branch(branch, number_of_players=100)
+		if name.startswith("tester")] == expected
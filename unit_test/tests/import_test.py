@@ -0,0 +1,75 @@
+"""This is an import-time benchmark for the lazuli package
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required.
+Imports `lazuli.database` in a fresh interpreter with `-X importtime`, and
+checks that the DB driver, YAML parser and `asyncio` are not imported
+eagerly, and that the cumulative import time stays within the regression
+budget (measured at 50-60 ms, plus some headroom for noisy machines).
+Set the `LAZULI_IMPORT_BUDGET_MS` environment variable to override the budget.
+Run this file directly to print the slowest imports.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import os
+import subprocess
+import sys
+import pytest
+
+IMPORT_BUDGET_MS = float(os.environ.get("LAZULI_IMPORT_BUDGET_MS", 75))
+# Only needed on first use; see `utility.get_connector()`, `jobs.py`, and the
+# coroutines of `database.py`, `loader.py` and `singleflight.py`
+LAZY_MODULES = ["mysql.connector", "google.protobuf", "ruamel.yaml", "asyncio"]
+
+
+def measure_import(module="lazuli.database"):
+	"""Returns {module name: cumulative import time in microseconds}"""
+	result = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+		capture_output=True, text=True, check=True,
+	)
+	timings = {}
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "cumulative" in line:
+			continue
+		_, cumulative, name = line[len("import time:"):].split("|")
+		timings[name.strip()] = int(cumulative)
+	return timings
+
+
+def loaded_modules(module="lazuli.database"):
+	"""Returns the names of all modules in `sys.modules` after the import"""
+	result = subprocess.run(
+		[sys.executable, "-c", f"import sys, lazuli, {module}; print(' '.join(sys.modules))"],
+		capture_output=True, text=True, check=True,
+	)
+	return set(result.stdout.split())
+
+
+@pytest.fixture(scope="module")
+def timings():
+	"""Returns the import timings of lazuli.database"""
+	return measure_import()
+
+
+@pytest.fixture(scope="module")
+def modules():
+	"""Returns the modules loaded by `import lazuli` and `import lazuli.database`"""
+	return loaded_modules()
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_not_imported_eagerly(modules, module):
+	assert module not in modules, \
+		f"Import test failed! {module} was imported by `import lazuli.database`"
+
+
+def test_import_time_budget(timings):
+	elapsed_ms = timings["lazuli.database"] / 1000
+	assert elapsed_ms <= IMPORT_BUDGET_MS, \
+		f"Import time test failed! Took {elapsed_ms:.1f} ms; Budget: {IMPORT_BUDGET_MS} ms"
+
+
+if __name__ == "__main__":
+	slowest = sorted(measure_import().items(), key=lambda item: item[1], reverse=True)
+	for name, cumulative in slowest[:20]:
+		print(f"{cumulative / 1000:8.1f} ms  {name}")
@@ -0,0 +1,45 @@
+"""This is a unit test for checking the compiled job table
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required.
+Re-compiling the YAML file requires `ruamel.yaml` (see contributor_requirements.txt).
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import pytest
+import lazuli.jobs as jobs
+
+
+@pytest.mark.parametrize("job_id, expected", [(0, "Beginner"), (112, "Hero"), (2218, "Evan"), (910, "Super GM")])
+def test_job_names(job_id, expected):
+	assert jobs.JOBS_BY_ID[job_id] == expected, \
+		f"Job name test failed! Expected: {expected}; Encountered: {jobs.JOBS_BY_ID[job_id]}"
+	assert jobs.JOBS[str(job_id)] == expected, \
+		f"Job name (str key) test failed! Expected: {expected}; Encountered: {jobs.JOBS[str(job_id)]}"
+
+
+@pytest.mark.parametrize("branch, expected", [
+	("Hero", {100, 110, 111, 112}),
+	("Blade Master", {400, 430, 431, 432, 433, 434}),
+	("Pathfinder", {301, 330, 331, 332}),
+	("Demon Avenger", {3101, 3120, 3121, 3122}),
+	("Pink Bean", {13100}),
+])
+def test_job_branches(branch, expected):
+	assert jobs.get_branch_job_ids(branch) == expected, \
+		f"Job branch test failed! Expected: {expected}; Encountered: {jobs.get_branch_job_ids(branch)}"
+
+
+@pytest.mark.parametrize("first_job, expected", [
+	(200, ("Fire Poison Archmage", "Ice Lightning Archmage", "Bishop")),
+	(1100, ("Dawn Warrior",)),
+])
+def test_job_tree(first_job, expected):
+	assert jobs.JOB_TREE[first_job] == expected, \
+		f"Job tree test failed! Expected: {expected}; Encountered: {jobs.JOB_TREE[first_job]}"
+
+
+def test_job_table_is_up_to_date():
+	pytest.importorskip("ruamel.yaml")
+	compiled = jobs.compile_job_table(jobs.parse_yaml_file(jobs.YAML_FILE_NAME))
+	assert compiled == (jobs.JOBS_BY_ID, jobs.JOB_BRANCHES, jobs.JOB_TREE), \
+		"Job table is out of date! Run `python -m lazuli.jobs` to re-compile it"
@@ -0,0 +1,104 @@
+"""This is a unit test for checking automatic batching of fetches
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required; the bulk fetchers of `Lazuli` are replaced with ones
+that record their calls.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import asyncio
+import pytest
+from lazuli.database import Lazuli
+from lazuli.loader import BatchLoader
+
+
+class RecordingLazuli:
+	"""Stands in for `Lazuli`; records every bulk fetch"""
+
+	def __init__(self):
+		self.calls = []
+
+	def get_chars_by_names(self, names, strict=False):
+		self.calls.append(("characters", sorted(names)))
+		return {name: f"Character({name})" for name in names if name != "nobody"}
+
+	def get_accounts_by_ids(self, account_ids, strict=False):
+		self.calls.append(("accounts", sorted(account_ids)))
+		return {account_id: f"Account({account_id})" for account_id in account_ids}
+
+	def get_invs_by_char_ids(self, char_ids, strict=False):
+		self.calls.append(("inventories", sorted(char_ids)))
+		raise RuntimeError("Unable to fetch inventory items")
+
+
+@pytest.fixture
+def lazuli():
+	"""Returns a stand-in for a Lazuli instance"""
+	return RecordingLazuli()
+
+
+def test_same_tick_is_batched(lazuli):
+	loader = BatchLoader(lazuli)
+
+	async def main():
+		return await asyncio.gather(
+			loader.load_char("tester0x00"),
+			loader.load_char("tester0x01"),
+			loader.load_char("tester0x00"),
+			loader.load_char("nobody"),
+			loader.load_account(90001),
+		)
+
+	results = asyncio.run(main())
+	assert results == [
+		"Character(tester0x00)", "Character(tester0x01)", "Character(tester0x00)", None, "Account(90001)",
+	], f"Batch loader test failed! Results: {results}"
+	assert sorted(lazuli.calls) == [
+		("accounts", [90001]),
+		("characters", ["nobody", "tester0x00", "tester0x01"]),
+	], f"Batch loader test failed! Calls: {lazuli.calls}"
+
+
+def test_separate_ticks_are_not_batched(lazuli):
+	loader = BatchLoader(lazuli)
+
+	async def main():
+		await loader.load_char("tester0x00")
+		await loader.load_char("tester0x01")
+
+	asyncio.run(main())
+	assert lazuli.calls == [("characters", ["tester0x00"]), ("characters", ["tester0x01"])], \
+		f"Batch loader test failed! Calls: {lazuli.calls}"
+
+
+def test_errors_reach_every_caller(lazuli):
+	loader = BatchLoader(lazuli)
+
+	async def main():
+		return await asyncio.gather(
+			loader.load_inv(900001), loader.load_inv(900002), return_exceptions=True,
+		)
+
+	results = asyncio.run(main())
+	assert all(isinstance(result, RuntimeError) for result in results), \
+		f"Batch loader error test failed! Results: {results}"
+	assert lazuli.calls == [("inventories", [900001, 900002])]
+
+
+def test_failed_queries_are_not_reported_as_missing(fake_db):
+	def answer(query, params):
+		raise RuntimeError("Lost connection to MySQL server during query")
+
+	fake_db.serve(answer)
+	lazuli = Lazuli(host="loader-test-1")
+	assert lazuli.get_chars_by_names(["tester0x00"]) == {}, "Errors should be logged, not raised, by default!"
+	loader = lazuli.batch_loader()
+
+	async def main():
+		return await asyncio.gather(
+			loader.load_char("tester0x00"), loader.load_account(90001), return_exceptions=True,
+		)
+
+	results = asyncio.run(main())
+	assert all(isinstance(result, RuntimeError) for result in results), \
+		f"Failed fetches were reported as not found! Results: {results}"
+	assert not loader._tasks, "Finished dispatches were kept!"
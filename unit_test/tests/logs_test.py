@@ -0,0 +1,47 @@
+"""This is a unit test for checking the structured (JSON) logging
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import io
+import json
+import logging
+import pytest
+from lazuli import logs
+import lazuli.utility as utils
+
+
+CONFIG = {
+	'host': "logs-test", 'user': "root", 'password': "", 'schema': "kms_316",
+	'port': 3306, 'charset': "euckr",
+}
+
+
+@pytest.fixture
+def stream(fake_db):
+	"""Returns the stream that JSON log records are written to"""
+	fake_db.serve([{"name": "tester0x00"}, {"name": "tester0x01"}])
+	output = io.StringIO()
+	logger = logging.getLogger("lazuli")
+	level = logger.level
+	handler = logs.enable_json_logging(logging.DEBUG, output)
+	yield output
+	logger.removeHandler(handler)
+	logger.setLevel(level)
+
+
+def test_query_timing_fields(stream):
+	utils.get_db_all_hits(CONFIG, "SELECT `name` FROM `characters`")
+	record = json.loads(stream.getvalue().splitlines()[-1])
+	assert record["level"] == "DEBUG" and record["logger"] == "lazuli.utility"
+	assert record["operation"] == "fetch" and record["rows"] == 2, f"Unexpected log record: {record}"
+	assert record["query"] == "SELECT `name` FROM `characters`"
+	assert isinstance(record["duration_ms"], float)
+
+
+def test_silent_on_success_by_default(fake_db, caplog):
+	fake_db.serve(2)
+	caplog.set_level(logging.INFO, logger="lazuli")
+	assert utils.write_to_db(CONFIG, "UPDATE `characters` SET `level` = 200")
+	assert not caplog.records, f"Successful write was logged: {caplog.records}"
@@ -0,0 +1,66 @@
+"""This is a unit test for checking the Prometheus-format metrics
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+from urllib.request import urlopen
+import pytest
+from lazuli import metrics
+from lazuli.singleflight import SingleFlight
+
+
+@pytest.fixture
+def enabled():
+	"""Enables metrics for the duration of a test, starting from scratch"""
+	metrics.reset()
+	metrics.enable()
+	yield
+	metrics.disable()
+	metrics.reset()
+
+
+@pytest.mark.parametrize("query, expected", [
+	("SELECT * FROM `characters` WHERE `name` = 'KOOKIIE'", "SELECT * FROM `characters` WHERE `name` = ?"),
+	("SELECT * FROM `kms_316` WHERE `id` > 42 LIMIT %s", "SELECT * FROM `kms_316` WHERE `id` > ? LIMIT %s"),
+	("SELECT * FROM `accounts` WHERE `id` IN (%s, %s, %s)", "SELECT * FROM `accounts` WHERE `id` IN (...)"),
+])
+def test_query_template(query, expected):
+	assert metrics.query_template(query) == expected, \
+		f"Query template test failed! Expected: {expected}; Encountered: {metrics.query_template(query)}"
+
+
+def test_disabled_records_nothing():
+	metrics.reset()
+	metrics.record_query("fetch", "SELECT 1", 0.01, 1)
+	assert "lazuli_queries_total{" not in metrics.render()
+
+
+def test_render(enabled):
+	metrics.record_query("fetch", "SELECT * FROM `characters` WHERE `name` = 'a'", 0.002, 1)
+	metrics.record_query("fetch", "SELECT * FROM `characters` WHERE `name` = 'b'", 0.2, 1)
+	metrics.record_error("write")
+	flight = SingleFlight()
+	flight.do("key", lambda: None)
+	text = metrics.render()
+	labels = 'operation="fetch",template="SELECT * FROM `characters` WHERE `name` = ?"'
+	for line in [
+		f"lazuli_queries_total{{{labels}}} 2",
+		f"lazuli_query_rows_total{{{labels}}} 2",
+		f'lazuli_query_duration_seconds_bucket{{{labels},le="0.0025"}} 1',
+		f'lazuli_query_duration_seconds_bucket{{{labels},le="+Inf"}} 2',
+		'lazuli_query_errors_total{operation="write"} 1',
+		'lazuli_cache_requests_total{cache="single_flight",result="miss"} 1',
+		'lazuli_cache_hit_ratio{cache="single_flight"} 0.0',
+	]:
+		assert line in text.splitlines(), f"Metrics test failed! Missing: {line}\n{text}"
+
+
+def test_http_server(enabled):
+	server = metrics.start_http_server(port=0)
+	try:
+		with urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+			assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+			assert b"# TYPE lazuli_queries_total counter" in response.read()
+	finally:
+		server.shutdown()
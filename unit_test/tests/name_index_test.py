@@ -0,0 +1,108 @@
+"""This is a unit test for checking the in-memory name index
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required; the index is filled with hand-made rows instead.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import re
+import threading
+import time
+import pytest
+from lazuli.database import Lazuli
+from lazuli.name_index import NameIndex, CHARACTER, ACCOUNT
+
+
+@pytest.fixture
+def index():
+	"""Returns a NameIndex instance filled with tester names"""
+	name_index = NameIndex()
+	name_index.add(CHARACTER, [
+		{"id": 900001, "name": "tester0x00"},
+		{"id": 900002, "name": "tester0x01"},
+		{"id": 900003, "name": "KOOKIIE"},
+		{"id": 900004, "name": "Brandon"},
+	])
+	name_index.add(ACCOUNT, [
+		{"id": 90001, "name": "tester0x00"},
+		{"id": 90002, "name": "kookie"},
+	])
+	return name_index
+
+
+@pytest.mark.parametrize("prefix, expected", [
+	("test", ["tester0x00", "tester0x00", "tester0x01"]),
+	("koo", ["kookie", "KOOKIIE"]),
+	("x", []),
+])
+def test_prefix(index, prefix, expected):
+	assert index.prefix(prefix) == expected, \
+		f"Prefix test failed! Expected: {expected}; Encountered: {index.prefix(prefix)}"
+
+
+@pytest.mark.parametrize("prefix, kind, expected", [
+	("test", ACCOUNT, ["tester0x00"]),
+	("koo", CHARACTER, ["KOOKIIE"]),
+])
+def test_prefix_by_kind(index, prefix, kind, expected):
+	assert index.prefix(prefix, kind=kind) == expected, \
+		f"Prefix (by kind) test failed! Expected: {expected}; Encountered: {index.prefix(prefix, kind=kind)}"
+
+
+@pytest.mark.parametrize("query, max_distance, expected", [
+	("kokiie", 1, [("KOOKIIE", 1)]),
+	("brandom", 1, [("Brandon", 1)]),
+	("kookie", 0, [("kookie", 0)]),
+	("zzzzzz", 2, []),
+])
+def test_fuzzy(index, query, max_distance, expected):
+	assert index.fuzzy(query, max_distance) == expected, \
+		f"Fuzzy test failed! Expected: {expected}; Encountered: {index.fuzzy(query, max_distance)}"
+
+
+def test_fuzzy_matches_brute_force(index):
+	def levenshtein(a, b):
+		previous = list(range(len(b) + 1))
+		for i, char_a in enumerate(a, 1):
+			current = [i]
+			for j, char_b in enumerate(b, 1):
+				current.append(min(current[j - 1] + 1, previous[j] + 1, previous[j - 1] + (char_a != char_b)))
+			previous = current
+		return previous[-1]
+
+	names = ["tester0x00", "tester0x00", "tester0x01", "KOOKIIE", "Brandon", "kookie"]
+	for query in ["tester0x1", "kookiie", "bran", "tster0x00"]:
+		expected = sorted(
+			(levenshtein(query.casefold(), name.casefold()), name) for name in names
+			if levenshtein(query.casefold(), name.casefold()) <= 2
+		)
+		expected = [(name, distance) for distance, name in expected]
+		assert index.fuzzy(query, 2) == expected, \
+			f"Fuzzy (brute force) test failed for {query}! Expected: {expected}; Encountered: {index.fuzzy(query, 2)}"
+
+
+def test_incremental_add(index):
+	assert index.max_ids == {CHARACTER: 900004, ACCOUNT: 90002}, \
+		f"Max ID test failed! Encountered: {index.max_ids}"
+	assert index.add(CHARACTER, [{"id": 900005, "name": "tester0x02"}]) == 1
+	assert index.prefix("tester0x0") == ["tester0x00", "tester0x00", "tester0x01", "tester0x02"], \
+		f"Incremental add test failed! Encountered: {index.prefix('tester0x0')}"
+	assert index.max_ids[CHARACTER] == 900005
+
+
+def test_concurrent_refreshes_add_each_name_once(fake_db):
+	rows = [{"id": 1, "name": "tester0x00"}, {"id": 2, "name": "tester0x01"}]  # Served as characters and accounts
+
+	def answer(query, params):
+		time.sleep(0.05)  # Keeps the first refresh in flight while the second one starts
+		after = int(re.search(r"`id` > (\d+)", query).group(1))
+		return [row for row in rows if row["id"] > after]
+
+	fake_db.serve(answer)
+	index = NameIndex(Lazuli(host="name-index-test-1")._database_config)
+	threads = [threading.Thread(target=index.refresh) for _ in range(2)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	assert index.prefix("tester") == ["tester0x00", "tester0x00", "tester0x01", "tester0x01"], \
+		f"Names were added twice! Encountered: {index.prefix('tester')}"
@@ -0,0 +1,85 @@
+"""This is a unit test for checking login/logout events
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import asyncio
+import pytest
+from lazuli.database import Lazuli
+from lazuli.presence import LOGIN, LOGOUT, OnlineWatcher
+import lazuli.database as database
+
+USERNAMES = {1: "kookiie", 2: "tester", 3: "admin"}
+
+
+# Polls allowed per test, so that a test that never sees its events fails instead of hanging
+MAX_POLLS = 10
+
+
+@pytest.fixture
+def accounts(fake_db, monkeypatch):
+	"""Returns the set of online account IDs, and the list of changes to
+	apply to the set, one per wait between polls"""
+	online, changes = {1}, []
+	fake_db.serve(lambda query, params: (
+		[{'id': id, 'name': USERNAMES[id]} for id in params] if params  # Usernames
+		else [{'id': id} for id in sorted(online)]
+	))
+	waits = iter(range(MAX_POLLS))
+
+	def next_poll():
+		if next(waits, None) is None:
+			raise RuntimeError("Poll limit reached without the expected events!")
+		if changes:
+			changes.pop(0)(online)
+
+	async def next_poll_async(seconds):
+		next_poll()
+
+	monkeypatch.setattr(database.time, "sleep", lambda seconds: next_poll())
+	monkeypatch.setattr(asyncio, "sleep", next_poll_async)  # Imported by `watch_online_async` when called
+	return online, changes
+
+
+def test_watcher_diffs_and_backs_off():
+	watcher = OnlineWatcher(interval=1, max_interval=3, backoff=2)
+	assert watcher.update([1, 2]) == [], "The first poll produced events!"
+	assert watcher.update([1, 2]) == [] and watcher.interval == 2
+	assert watcher.update([1, 2]) == [] and watcher.interval == 3
+
+	watcher.add_usernames({3: "admin"})
+	events = watcher.update([1, 3])
+	assert [(event.kind, event.account_id, event.username) for event in events] == [
+		(LOGOUT, 2, None), (LOGIN, 3, "admin"),
+	]
+	assert watcher.interval == 1, "Interval did not reset after activity!"
+	assert watcher.missing_usernames([1, 3]) == [1]
+	with pytest.raises(ValueError):
+		OnlineWatcher(interval=10, max_interval=5)
+
+
+def test_watch_online(accounts, fake_db):
+	_, changes = accounts
+	changes += [lambda online: online.update({2, 3}), lambda online: online.discard(1)]
+	events = Lazuli(host="presence-test-1", coalesce_reads=False).watch_online()
+	first = next(events)  # Baseline poll of {1}, then a poll seeing two logins
+	second = next(events)
+	assert [(first.kind, first.username), (second.kind, second.username)] == [
+		(LOGIN, "tester"), (LOGIN, "admin"),
+	]
+	assert next(events)[:3] == (LOGOUT, 1, "kookiie")
+	assert sum("`name`" in query for query in fake_db.statements) == 2, \
+		f"Usernames were fetched more than once per login: {fake_db.statements}"
+
+
+def test_watch_online_async(accounts):
+	_, changes = accounts
+	changes.append(lambda online: online.add(2))
+
+	async def first_event():
+		async for event in Lazuli(host="presence-test-2").watch_online_async():
+			return event
+
+	event = asyncio.run(first_event())
+	assert (event.kind, event.account_id, event.username) == (LOGIN, 2, "tester")
@@ -0,0 +1,66 @@
+"""This is a unit test for checking the progress time-series store
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import pytest
+from lazuli.database import Lazuli
+from lazuli.progress import ProgressStore, _read_varint, _unzigzag, _write_varint, _zigzag
+
+DAY = 86400
+
+
+def test_zigzag_varints():
+	for value in (0, 1, -1, 63, -64, 64, 300, -300, 2 ** 40, -(2 ** 62)):
+		buffer = bytearray()
+		_write_varint(buffer, _zigzag(value))
+		decoded, position = _read_varint(buffer, 0)
+		assert _unzigzag(decoded) == value and position == len(buffer), f"Round trip failed for {value}"
+	buffer = bytearray()
+	_write_varint(buffer, _zigzag(-1))
+	assert len(buffer) == 1, "Small changes should take one byte!"
+
+
+def fill(store):
+	store.add_round([(1, "KOOKIIE", 199, 1000), (2, "tester", 10, 50)], when=0)
+	store.add_round([(1, "KOOKIIE", 200, 5000), (2, "tester", 11, 40)], when=DAY)
+	store.add_round([(1, "KOOKIIE", 200, 6000), (3, "newbie", 1, 900)], when=2 * DAY)
+
+
+def test_history_and_gainers():
+	store = ProgressStore(["level", "meso"])
+	fill(store)
+	assert store.history("kookiie", "level") == [(0, 199), (DAY, 200), (2 * DAY, 200)]
+	assert store.history(2, "meso", since=DAY) == [(DAY, 40)]
+	assert store.history("nobody", "meso") == []
+	# Characters first seen within the window gain from their first sample on
+	assert store.top_gainers("meso", window=DAY, now=2 * DAY) == [("KOOKIIE", 1000)]
+	assert store.top_gainers("level", window=DAY, now=DAY) == [("KOOKIIE", 1), ("tester", 1)]
+	assert store.top_gainers("meso", window=2 * DAY, now=2 * DAY, number_of_players=1) == [("KOOKIIE", 5000)]
+	assert store.nbytes < 3 * 3 * 4, f"Samples take {store.nbytes} bytes"
+	with pytest.raises(ValueError):
+		store.history(1, "fame")
+
+
+def test_file_is_replayed(tmp_path):
+	path = str(tmp_path / "progress.bin")
+	fill(ProgressStore(["level", "meso"], path))
+	with open(path, "ab") as file:
+		file.write(b"\x40\x01")  # A round cut short by a crash
+
+	store = ProgressStore(["level", "meso"], path)
+	assert store.rounds == 3 and len(store) == 3
+	assert store.history("tester", "meso") == [(0, 50), (DAY, 40)]
+	store.add_round([(2, "tester", 12, 45)], when=3 * DAY)
+	assert ProgressStore(["level", "meso"], path).history(2, "level")[-1] == (3 * DAY, 12)
+	with pytest.raises(ValueError):
+		ProgressStore(["level"], path)
+
+
+def test_sample_progress(fake_db):
+	fake_db.serve([(1, "KOOKIIE", 200, 1000)])
+	store = ProgressStore(["level", "meso"])
+	assert Lazuli(host="progress-test-1").sample_progress(store, active_only=True) == 1
+	assert fake_db.statements[0].startswith("SELECT `id`, `name`, `level`, `meso` FROM `characters` WHERE `accountid` IN")
+	assert store.history(1, "meso")[0][1] == 1000
@@ -0,0 +1,69 @@
+"""This is a unit test for checking change-tracking character refreshes
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import pytest
+from lazuli.character import Character
+from lazuli.database import Lazuli
+
+CHAR_STATS = {
+	'id': 1, 'accountid': 1, 'name': "tester0x00", 'level': 10, 'exp': 0,
+	'str': 4, 'dex': 4, 'luk': 4, 'int': 4, 'maxhp': 50, 'maxmp': 50,
+	'meso': 1000, 'job': 0, 'skincolor': 0, 'gender': 0, 'fame': 0,
+	'hair': 30000, 'face': 20000, 'ap': 0, 'map': 100000000, 'buddyCapacity': 20,
+}
+ACCOUNT_INFO = {
+	'id': 1, 'name': "tester0x00", 'loggedin': 0, 'banned': 0, 'banreason': "",
+	'nxCash': 0, 'mPoints': 0, 'vpoints': 0, 'realcash': 0, 'chrslot': 6,
+}
+
+
+@pytest.fixture
+def rows(fake_db):
+	"""Returns the rows of the `characters` table, which queries read"""
+	rows = [
+		dict(CHAR_STATS),
+		dict(CHAR_STATS, id=2, name="tester0x01"),
+		dict(CHAR_STATS, id=3, name="tester0x02"),
+	]
+	fake_db.serve(lambda query, params: [dict(row) for row in rows if row['id'] in params])
+	return rows
+
+
+def make_chars(lazuli, rows):
+	return [Character(dict(row), lazuli._database_config, dict(ACCOUNT_INFO)) for row in rows]
+
+
+def test_refresh_reports_changes(rows, fake_db):
+	character = make_chars(Lazuli(host="refresh-test-1"), rows[:1])[0]
+	assert character.refresh() == {}, "Unchanged character reported changes!"
+
+	rows[0].update(level=11, meso=500)
+	assert character.refresh() == {"level": (10, 11), "meso": (1000, 500)}
+	assert (character.level, character.meso) == (11, 500), "Changes were not applied!"
+	assert len(fake_db.queries) == 2
+
+
+def test_refresh_many_uses_one_query(rows, fake_db):
+	lazuli = Lazuli(host="refresh-test-2")
+	characters = make_chars(lazuli, rows)
+	rows[1]['level'] = 200
+	del rows[2]  # Deleted characters are left as they are
+
+	assert lazuli.refresh_many(characters) == {2: {"level": (10, 200)}}
+	assert len(fake_db.queries) == 1, f"Expected one query, got: {fake_db.statements}"
+	assert [character.level for character in characters] == [10, 200, 10]
+	assert lazuli.refresh_many([]) == {}
+
+
+def test_refresh_reads_from_the_primary(rows, fake_db):
+	lazuli = Lazuli(host="refresh-test-3", replicas=["refresh-test-3-replica"])
+	characters = make_chars(lazuli, rows)
+	rows[0]['level'] = 200
+	assert characters[0].refresh() == {"level": (10, 200)}
+	rows[1]['level'] = 200
+	assert lazuli.refresh_many(characters) == {2: {"level": (10, 200)}}
+	hosts = {connection.config['host'] for connection, call, _ in fake_db.calls if call == "execute"}
+	assert hosts == {"refresh-test-3"}, f"Refreshes read from a replica! Hosts: {hosts}"
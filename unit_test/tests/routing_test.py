@@ -0,0 +1,67 @@
+"""This is a unit test for checking the routing of reads to replicas
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required; reads are replaced with functions that record which
+host they were sent to.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import pytest
+import lazuli.routing as routing
+import lazuli.utility as utils
+
+PRIMARY = {
+	'host': "primary", 'user': "root", 'password': "", 'schema': "kms_316",
+	'port': 3306, 'charset': "euckr", 'pool_size': 5,
+}
+
+
+def read_host(config):
+	return config['host']
+
+
+def test_round_robin():
+	router = routing.ReplicaRouter(PRIMARY, ["replica-1", {'host': "replica-2", 'port': 3307}])
+	hosts = [router.read(read_host) for _ in range(4)]
+	assert hosts == ["replica-1", "replica-2", "replica-1", "replica-2"], \
+		f"Round-robin test failed! Hosts: {hosts}"
+	assert router.stats()['replicas']["replica-2:3307"]['reads'] == 2
+
+
+def test_least_latency(monkeypatch):
+	router = routing.ReplicaRouter(PRIMARY, ["slow", "fast"], strategy=routing.LEAST_LATENCY)
+	clock = [0.0]
+	monkeypatch.setattr(routing.time, "perf_counter", lambda: clock[0])
+
+	def timed_read(config):
+		clock[0] += 1.0 if config['host'] == "slow" else 0.1
+		return config['host']
+
+	hosts = [router.read(timed_read) for _ in range(routing.LATENCY_PROBE_INTERVAL)]
+	assert hosts.count("fast") == routing.LATENCY_PROBE_INTERVAL - 1, \
+		f"Least-latency test failed! Hosts: {hosts}"
+
+
+def test_failed_replica_falls_back_to_primary():
+	router = routing.ReplicaRouter(PRIMARY, ["broken"])
+
+	def flaky_read(config):
+		if config['host'] == "broken":
+			raise ConnectionError("Can't connect to MySQL server")
+		return config['host']
+
+	assert router.read(flaky_read) == "primary"
+	assert router.read(read_host) == "primary", "Failed replica was not skipped!"
+	assert router.stats()['replicas']["broken:3306"]['failures'] == 1
+
+
+def test_read_your_writes():
+	router = routing.ReplicaRouter(PRIMARY, ["replica-1"], read_your_writes=60)
+	assert router.read(read_host) == "replica-1"
+	utils._mark_write({**PRIMARY, 'router': router})
+	assert router.read(read_host) == "primary", "Read after a write was not sent to the primary!"
+
+
+@pytest.mark.parametrize("strategy, replicas", [("fastest", ["replica-1"]), (routing.ROUND_ROBIN, [])])
+def test_invalid_arguments(strategy, replicas):
+	with pytest.raises(ValueError):
+		routing.ReplicaRouter(PRIMARY, replicas, strategy=strategy)
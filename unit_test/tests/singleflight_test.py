@@ -0,0 +1,102 @@
+"""This is a unit test for checking request coalescing (single-flight)
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import pytest
+from lazuli.singleflight import SingleFlight
+
+CALLERS = 20
+
+
+def test_threads_share_one_call():
+	flight = SingleFlight()
+	executions = []
+	started = threading.Barrier(CALLERS)
+
+	def slow_query(query):
+		executions.append(query)
+		time.sleep(0.2)
+		return [{"name": "Streamer", "level": 275}]
+
+	def caller(_):
+		started.wait()
+		return flight.do(("SELECT", ()), slow_query, "SELECT")
+
+	with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+		results = list(executor.map(caller, range(CALLERS)))
+
+	assert len(executions) == 1, f"Single-flight test failed! Executions: {len(executions)}"
+	assert all(result == [{"name": "Streamer", "level": 275}] and shared for result, shared in results)
+	assert flight.stats() == {"calls": CALLERS, "executed": 1, "coalesced": CALLERS - 1}, \
+		f"Single-flight counter test failed! Stats: {flight.stats()}"
+
+
+def test_sequential_calls_are_not_cached():
+	flight = SingleFlight()
+	assert flight.do("key", lambda: 1) == (1, False)
+	assert flight.do("key", lambda: 2) == (2, False)
+
+
+def test_errors_reach_every_caller():
+	flight = SingleFlight()
+	started = threading.Barrier(2)
+
+	def failing_query():
+		time.sleep(0.1)
+		raise RuntimeError("No such players found!")
+
+	def caller(_):
+		started.wait()
+		with pytest.raises(RuntimeError):
+			flight.do("key", failing_query)
+
+	with ThreadPoolExecutor(max_workers=2) as executor:
+		list(executor.map(caller, range(2)))
+
+
+def test_coroutines_share_one_call():
+	flight = SingleFlight()
+	executions = []
+
+	def slow_query():
+		executions.append(1)
+		time.sleep(0.1)
+		return 42
+
+	async def main():
+		return await asyncio.gather(*(flight.do_async("key", slow_query) for _ in range(CALLERS)))
+
+	results = asyncio.run(main())
+	assert len(executions) == 1, f"Single-flight (async) test failed! Executions: {len(executions)}"
+	assert results == [(42, True)] * CALLERS
+	assert flight.stats()["coalesced"] == CALLERS - 1
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+	flight = SingleFlight()
+	executions = []
+
+	def slow_query():
+		executions.append(1)
+		time.sleep(0.2)
+		return 42
+
+	async def main():
+		leader = asyncio.create_task(flight.do_async("key", slow_query))
+		await asyncio.sleep(0.05)
+		follower = asyncio.create_task(flight.do_async("key", slow_query))
+		await asyncio.sleep(0.05)
+		leader.cancel()
+		with pytest.raises(asyncio.CancelledError):
+			await leader
+		return await follower
+
+	assert asyncio.run(main()) == (42, True), "The follower did not receive the leader's result!"
+	assert len(executions) == 1
+	assert not flight._async_calls, "The completed call was not forgotten!"
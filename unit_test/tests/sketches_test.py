@@ -0,0 +1,74 @@
+"""This is a unit test for checking quantile and distinct-count sketches
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import random
+import pytest
+from lazuli.database import Lazuli
+from lazuli.sketches import HyperLogLog, KLLSketch, build_sketches, merge_sketches
+
+
+def test_kll_quantiles():
+	random.seed(7)  # Compaction offsets are random; keep the test deterministic
+	values = list(range(100000))
+	random.Random(42).shuffle(values)
+	sketch = KLLSketch()
+	sketch.extend(values)
+	assert len(sketch) == 100000 and sketch.min == 0 and sketch.max == 99999
+	for share in (0.01, 0.5, 0.9, 0.99):
+		estimate = sketch.quantile(share)
+		assert abs(estimate - share * 100000) < 3000, f"Quantile {share}: {estimate}"
+	assert abs(sketch.rank(25000) - 0.25) < 0.03
+	assert len(sketch.to_bytes()) < 100000 * 8 / 20, "The sketch is not compact!"
+
+
+def test_kll_merge_and_serialisation():
+	random.seed(7)
+	low, high = KLLSketch(), KLLSketch()
+	low.extend(range(0, 50000))
+	high.extend(range(50000, 100000))
+	merged = KLLSketch.from_bytes(low.to_bytes()).merge(high)
+	assert len(merged) == 100000 and len(low) == 50000, "Merge changed its input!"
+	assert abs(merged.quantile(0.5) - 50000) < 3000, f"Median: {merged.quantile(0.5)}"
+	assert KLLSketch().quantile(0.5) != KLLSketch().quantile(0.5), "Empty sketch should give nan!"
+	with pytest.raises(ValueError):
+		KLLSketch.from_bytes(b"nonsense")
+
+
+def test_hyperloglog():
+	sketch = HyperLogLog()
+	sketch.extend(range(50000))
+	sketch.extend(range(50000))  # Duplicates do not count
+	assert abs(sketch.count() - 50000) < 50000 * 0.03, f"Count: {sketch.count()}"
+	small = HyperLogLog()
+	small.extend(["a", "b", "c"])
+	assert small.count() == 3
+
+	other = HyperLogLog()
+	other.extend(range(25000, 75000))
+	merged = HyperLogLog.from_bytes(sketch.to_bytes()).merge(other)
+	assert abs(merged.count() - 75000) < 75000 * 0.03, f"Merged count: {merged.count()}"
+	with pytest.raises(ValueError):
+		merged.merge(HyperLogLog(precision=10))
+
+
+def test_build_and_merge_sketches():
+	rows = [(level, level % 7) for level in range(1, 201)]
+	world = build_sketches(["level", "job"], rows, quantiles=["level", "job"], distinct=["job"])
+	assert set(world) == {"level", "job", "job:distinct"}
+	assert world["job:distinct"].count() == 7
+	merged = merge_sketches([world, world, None])
+	assert len(merged["level"]) == 400 and len(world["level"]) == 200
+
+
+def test_lazuli_build_sketches(fake_db):
+	fake_db.serve([(2000000,), (2000000,), (2000001,)])
+	result = Lazuli(host="sketches-test-1").build_sketches(
+		"inventoryitems", distinct=["itemid"], filters={"inventorytype": -1}
+	)
+	assert fake_db.queries == [("SELECT `itemid` FROM `inventoryitems` WHERE `inventorytype` = %s", [-1])]
+	assert result["itemid"].count() == 2
+	with pytest.raises(ValueError):
+		Lazuli(host="sketches-test-1").build_sketches("characters")
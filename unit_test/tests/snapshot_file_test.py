@@ -0,0 +1,104 @@
+"""This is a unit test for checking memory-mapped character snapshot files
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import os
+import pytest
+from lazuli.database import Lazuli
+from lazuli.snapshot_file import SnapshotReader, write_snapshot
+
+# id, accountid, name, level, job, meso, fame, reborns, gm
+ROWS = [
+	(1, 1, "KOOKIIE", 200, 112, 2147483647, 30, 5, 0),
+	(2, 1, "Kookie", 120, 232, 5000000000, -2, 0, 0),
+	(3, 2, "Admin", 250, 900, 999, 0, 9, 6),
+	(4, 3, "ミク", 180, 112, 50, 7, 1, 0),
+]
+
+
+def test_export_and_lookup(fake_db, tmp_path):
+	fake_db.serve(ROWS)
+	path = str(tmp_path / "characters.snap")
+	assert Lazuli(host="snapshot-file-test-1").export_snapshot(path) == len(ROWS)
+
+	reader = SnapshotReader(path)
+	assert len(reader) == len(ROWS)
+	character = reader.get_char_by_name("kookiie")
+	assert character.name == "KOOKIIE" and character.character_id == 1, f"Wrong character: {character}"
+	assert (character.level, character.job, character.meso) == (200, 112, 2147483647)
+	assert character.get_job_name() == "Hero" and character.rebirths == 5
+	assert reader.get_char_by_name("Kookie").meso == 5000000000
+	assert reader.get_char_by_name("ミク").fame == 7
+	assert reader.get_char_by_name("KOOKII") is None
+	assert sorted(reader.get_chars_by_names(["Admin", "nobody"])) == ["Admin"]
+
+
+def test_ranking(tmp_path):
+	path = str(tmp_path / "characters.snap")
+	write_snapshot(path, ROWS)
+	reader = SnapshotReader(path)
+	assert reader.get_ranking("level", 2) == [("KOOKIIE", 200), ("ミク", 180)]
+	assert reader.get_ranking("level", 1, show_gm=True) == [("Admin", 250)]
+	assert reader.get_ranking("meso", 5, job_ids=[232]) == [("Kookie", 5000000000)]
+	assert reader.get_ranking("level", job_ids=[]) == []
+
+
+def test_lazuli_ranking_without_jobs(fake_db):
+	# Same as `SnapshotReader::get_ranking()`; no `IN ()` query is sent
+	assert Lazuli(host="snapshot-file-test-2").get_ranking("level", job_ids=[]) == []
+	assert not fake_db.queries
+
+
+def test_atomic_swap(tmp_path):
+	path = str(tmp_path / "characters.snap")
+	write_snapshot(path, ROWS)
+	reader = SnapshotReader(path, check_interval=0)
+	old = reader.get_char_by_name("KOOKIIE")
+
+	write_snapshot(path, [(1, 1, "KOOKIIE", 201, 112, 0, 30, 5, 0)])
+	assert reader.get_char_by_name("KOOKIIE").level == 201, "New snapshot was not picked up!"
+	assert len(reader) == 1 and reader.get_char_by_name("Admin") is None
+	assert old.level == 200, "View of the previous snapshot changed!"
+	assert sorted(os.listdir(tmp_path)) == ["characters.snap", "characters.snap.1", "characters.snap.2"]
+
+	write_snapshot(path, ROWS)
+	assert reader.get_char_by_name("Admin") is not None
+	assert sorted(os.listdir(tmp_path)) == ["characters.snap", "characters.snap.2", "characters.snap.3"], \
+		"Older data files were not cleaned up!"
+
+
+def test_mapped_files_are_never_replaced(monkeypatch, tmp_path):
+	# Windows can neither replace nor delete a file that is mapped into memory
+	path = str(tmp_path / "characters.snap")
+	write_snapshot(path, ROWS)
+	reader = SnapshotReader(path, check_interval=0)
+	mapped = {os.path.abspath(f"{path}.1")}
+	replace, unlink = os.replace, os.unlink
+
+	def windows_replace(source, target):
+		assert os.path.abspath(target) == os.path.abspath(path), f"Replaced {target}, not the pointer file!"
+		replace(source, target)
+
+	def windows_unlink(target):
+		if os.path.abspath(target) in mapped:
+			raise PermissionError(f"{target} is mapped")
+		unlink(target)
+
+	monkeypatch.setattr(os, "replace", windows_replace)
+	monkeypatch.setattr(os, "unlink", windows_unlink)
+	for level in (201, 202):
+		write_snapshot(path, [(1, 1, "KOOKIIE", level, 112, 0, 30, 5, 0)])
+		assert reader.get_char_by_name("KOOKIIE").level == level
+	assert os.path.exists(f"{path}.1"), "A mapped data file was deleted!"
+	mapped.clear()
+	write_snapshot(path, ROWS)
+	assert not os.path.exists(f"{path}.1"), "The unmapped data file was not cleaned up later!"
+
+
+def test_rejects_other_files(tmp_path):
+	path = tmp_path / "characters.snap"
+	path.write_bytes(b"not a snapshot file at all")
+	with pytest.raises(ValueError):
+		SnapshotReader(str(path))
@@ -0,0 +1,43 @@
+"""This is a unit test for checking snapshot-consistent reads
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import threading
+import pytest
+from lazuli.database import Lazuli
+import lazuli.utility as utils
+
+
+@pytest.fixture
+def log(fake_db):
+	"""Returns the list that every connection records its calls to"""
+	fake_db.serve([{"id": 1}])
+	return fake_db.calls
+
+
+def test_reads_share_one_snapshot(log):
+	lazuli = Lazuli(host="snapshot-test-1")
+	with lazuli.snapshot() as pinned:
+		assert utils.in_snapshot(lazuli._database_config)
+		lazuli.get_db_all_hits("SELECT 1")
+		with lazuli.snapshot() as nested:
+			assert nested is pinned, "Nested snapshot did not re-use the outer one!"
+			lazuli.get_db_all_hits("SELECT 2")
+	assert not utils.in_snapshot(lazuli._database_config)
+
+	assert {connection for connection, _, _ in log} == {pinned}, "Reads used more than one connection!"
+	assert [call for _, call, _ in log] == ["start_transaction", "execute", "execute", "rollback"]
+	assert log[0][2] == {"consistent_snapshot": True, "isolation_level": "REPEATABLE READ", "readonly": True}
+
+
+def test_snapshot_is_per_thread(log):
+	lazuli = Lazuli(host="snapshot-test-2")
+	with lazuli.snapshot() as pinned:
+		other = threading.Thread(target=lazuli.get_db_all_hits, args=("SELECT 1",))
+		other.start()
+		other.join()
+	connection, call, query = log[1]
+	assert connection is not pinned and call == "execute" and query == "SELECT 1", \
+		f"Read from another thread used the snapshot! Calls: {log}"
@@ -0,0 +1,132 @@
+"""This is a stress test for checking thread safety
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Kindly set up the DB for use; refer to the AzureMS repository on how to set up
+an Azure-based DB. Then, use the script in the unit_test/SQLScripts folder of this
+project to create a tester account. Once it's been successfully run, you can
+use this script to test the functionality of Lazuli's APIs.
+Runs many threads of mixed reads and writes against one shared `Lazuli` object
+and one shared `Character` object, and checks that no updates are lost.
+The connection pool tests at the bottom do not require a database; see
+`fake_db` in conftest.py.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+from lazuli.database import Lazuli
+from lazuli.exceptions import PoolExhaustedError
+import lazuli.utility as utils
+
+THREADS = 16
+ITERATIONS = 25
+
+
+@pytest.fixture
+def azure():
+	"""Returns a database instance"""
+	# Import DB
+	try:
+		database_object = Lazuli()  # Use defaults - these should be the same as Azure v316 repository defaults
+	except Exception as e:
+		raise SystemExit(f"Error has occurred whist attempting to load DB: \n{e}")
+	return database_object
+
+
+def test_no_lost_updates(azure):
+	char = azure.get_char_by_name("tester0x00")
+	before = char.meso
+
+	def worker(index):
+		for _ in range(ITERATIONS):
+			if index % 2:
+				char.add_mesos(1)  # writes to a shared instance
+			else:
+				assert azure.get_level_ranking()  # reads through the shared pool
+				assert azure.get_char_by_name("tester0x01").name == "tester0x01"
+
+	with ThreadPoolExecutor(max_workers=THREADS) as executor:
+		list(executor.map(worker, range(THREADS)))
+
+	expected = before + (THREADS // 2) * ITERATIONS
+	assert char.meso == expected, \
+		f"Thread safety test failed! Expected (in memory): {expected}; Encountered: {char.meso}"
+	assert azure.get_char_by_name("tester0x00").meso == expected, \
+		f"Thread safety test failed! Expected (in DB): {expected}; " \
+		f"Encountered: {azure.get_char_by_name('tester0x00').meso}"
+	char.meso = before  # reset to baseline
+
+
+# Connection pool tests (no database required) -------------------------------------------------------------
+def test_pool_limits_open_connections(fake_db):
+	opened = fake_db.connections
+	pool = utils.ConnectionPool({}, size=2)
+	in_use = 0
+	peak = 0
+	lock = threading.Lock()
+
+	def worker(_):
+		nonlocal in_use, peak
+		database = pool.acquire()
+		with lock:
+			in_use += 1
+			peak = max(peak, in_use)
+		with lock:
+			in_use -= 1
+		pool.release(database)
+
+	with ThreadPoolExecutor(max_workers=THREADS) as executor:
+		list(executor.map(worker, range(THREADS * ITERATIONS)))
+
+	assert peak <= 2 and len(opened) <= 2, \
+		f"Pool size test failed! Peak in use: {peak}; Connections opened: {len(opened)}"
+	assert pool.idle_count == pool.open_count == len(opened)
+
+
+def test_pool_times_out(fake_db):
+	pool = utils.ConnectionPool({}, size=1)
+	pool.acquire()
+	with pytest.raises(TimeoutError):
+		pool.acquire(timeout=0.01)
+
+
+def test_pool_timeout_is_finite_by_default(fake_db):
+	# pool_size=1 and a second checkout from the same thread (e.g. a write inside a snapshot)
+	config = {
+		'host': "timeout-test", 'user': "root", 'password': "", 'schema': "kms_316",
+		'port': 3306, 'charset': "euckr", 'pool_size': 1, 'pool_timeout': 0.05,
+	}
+	with utils.connection(config):
+		with pytest.raises(PoolExhaustedError, match="all 1 pooled connections"):
+			with utils.connection(config):
+				pass
+	assert utils.ConnectionPool({})._timeout == utils.DEFAULT_POOL_TIMEOUT
+
+
+def test_pool_size_mismatch_is_logged(monkeypatch, caplog):
+	config = {
+		'host': "mismatch-test", 'user': "root", 'password': "", 'schema': "kms_316",
+		'port': 3306, 'charset': "euckr", 'pool_size': 2,
+	}
+	pool = utils.get_pool(config)
+	with caplog.at_level("WARNING", logger=utils._logger.name):
+		assert utils.get_pool({**config, 'pool_size': 8}) is pool
+		utils.get_pool({**config, 'pool_size': 8})
+	assert len(caplog.records) == 1 and "ignoring pool_size=8" in caplog.text
+
+
+def test_leak_detection(fake_db, monkeypatch):
+	monkeypatch.setattr(utils, "_leak_detection", True)
+	config = {
+		'host': "leak-test", 'user': "root", 'password': "", 'schema': "kms_316",
+		'port': 3306, 'charset': "euckr",
+	}
+	with utils.connection(config):
+		pass  # Returned; not a leak
+	leaked = utils.get_pool(config).acquire()  # Never returned
+
+	leaks = [leak for leak in utils.report_leaks() if leak['database'] == "leak-test:3306/kms_316"]
+	assert len(leaks) == 1, f"Leak detection test failed! Leaks: {leaks}"
+	assert "test_leak_detection" in leaks[0]['stack']
+	utils.get_pool(config).release(leaked)
+	assert not utils.get_pool(config).checked_out()
@@ -0,0 +1,57 @@
+"""This is a unit test for checking tracing spans
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+Runs against `fake_db` (see conftest.py) instead of a database.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import json
+import pytest
+from lazuli import tracing
+from lazuli.database import Lazuli
+
+
+@pytest.fixture
+def lazuli(fake_db):
+	"""Returns a database instance backed by fixed rows"""
+	fake_db.serve([{"name": "tester0x00", "level": 200}, {"name": "tester0x01", "level": 10}])
+	yield Lazuli(host="tracing-test")
+	tracing.configure(None)
+
+
+def test_nested_spans(lazuli):
+	exporter = tracing.InMemoryExporter()
+	tracing.configure(exporter)
+	lazuli.get_level_ranking(2)
+
+	spans = {span.name: span for span in exporter.spans}
+	assert [span.name for span in exporter.spans] == ["connect", "execute", "fetch", "query", "Lazuli.get_ranking"], \
+		f"Tracing test failed! Spans: {[span.name for span in exporter.spans]}"
+	root, query = spans["Lazuli.get_ranking"], spans["query"]
+	assert root.parent_id is None and query.parent_id == root.span_id
+	assert all(spans[name].parent_id == query.span_id for name in ("connect", "execute", "fetch"))
+	assert len({span.trace_id for span in exporter.spans}) == 1
+	assert query.attributes == {
+		"operation": "fetch", "rows": 2,
+		"template": "SELECT `name`, `level` FROM `characters` WHERE `gm` < %s ORDER BY `level` DESC LIMIT %s",
+	}
+	assert root.duration >= query.duration > 0
+
+
+def test_unsampled_traces_are_skipped(lazuli):
+	exporter = tracing.InMemoryExporter()
+	tracing.configure(exporter, sample_rate=0)
+	lazuli.get_level_ranking(2)
+	assert not exporter.spans, f"Unsampled trace was exported: {exporter.spans}"
+
+
+def test_json_lines_exporter(lazuli, tmp_path):
+	path = tmp_path / "traces.jsonl"
+	exporter = tracing.JsonLinesExporter(str(path))
+	tracing.configure(exporter)
+	with tracing.span("report", world="Scania"):
+		lazuli.get_db_all_hits("SELECT * FROM `characters` WHERE `name` = 'KOOKIIE'")
+	exporter.close()
+
+	spans = [json.loads(line) for line in path.read_text().splitlines()]
+	assert spans[-1]["name"] == "report" and spans[-1]["attributes"] == {"world": "Scania"}
+	assert spans[-2]["attributes"]["template"] == "SELECT * FROM `characters` WHERE `name` = ?"
@@ -0,0 +1,83 @@
+"""This is a unit test for checking the SQL-building utility functions
+
+NOTE: PLACE THE UNIT TEST FILES IN THE ROOT OF THE REPOSITORY!
+No database is required.
+Copyright KOOKIIE Studios 2022. All rights reserved.
+"""
+import pytest
+import lazuli.utility as utils
+
+
+@pytest.mark.parametrize("filters, expected", [
+	(None, ("", [])),
+	({"level >=": 200}, ("WHERE `level` >= %s", [200])),
+	({"job": [110, 111], "gm <": 1}, ("WHERE `job` IN (%s, %s) AND `gm` < %s", [110, 111, 1])),
+	({"name !=": ("a", "b")}, ("WHERE `name` NOT IN (%s, %s)", ["a", "b"])),
+])
+def test_build_where_clause(filters, expected):
+	assert utils.build_where_clause(filters) == expected, \
+		f"WHERE clause test failed! Expected: {expected}; Encountered: {utils.build_where_clause(filters)}"
+
+
+@pytest.mark.parametrize("filters", [
+	{"level; DROP TABLE characters": 1},
+	{"level LIKE": "1%"},
+	{"id >": [1, 2]},
+	{"id": []},
+])
+def test_build_where_clause_rejects(filters):
+	with pytest.raises(ValueError):
+		utils.build_where_clause(filters)
+
+
+def test_build_chunked_statements():
+	statements = utils.build_chunked_statements(
+		"UPDATE `accounts` SET `banned` = %s", [1], {"id": list(range(5)), "gm <": 1}, chunk_size=2,
+	)
+	assert statements == [
+		("UPDATE `accounts` SET `banned` = %s WHERE `id` IN (%s, %s) AND `gm` < %s", [1, 0, 1, 1]),
+		("UPDATE `accounts` SET `banned` = %s WHERE `id` IN (%s, %s) AND `gm` < %s", [1, 2, 3, 1]),
+		("UPDATE `accounts` SET `banned` = %s WHERE `id` IN (%s) AND `gm` < %s", [1, 4, 1]),
+	], f"Chunked statement test failed! Encountered: {statements}"
+
+
+def test_build_chunked_statements_dedupes():
+	# Names compare case-insensitively; "a" would otherwise match the row of "A" in a second statement
+	statements = utils.build_chunked_statements(
+		"SELECT COUNT(*) FROM `accounts`", [], {"name": ["A", "a", "B"]}, chunk_size=2,
+	)
+	assert statements == [
+		("SELECT COUNT(*) FROM `accounts` WHERE `name` IN (%s, %s)", ["A", "B"]),
+	], f"Duplicate values test failed! Encountered: {statements}"
+
+
+def test_build_chunked_statements_negated_list():
+	# Chunking a `NOT IN (...)` list would update each row excluded by one chunk from the other chunks
+	statements = utils.build_chunked_statements(
+		"UPDATE `accounts` SET `banned` = %s", [1], {"id !=": list(range(5))}, chunk_size=2,
+	)
+	assert statements == [
+		("UPDATE `accounts` SET `banned` = %s WHERE `id` NOT IN (%s, %s, %s, %s, %s)", [1, 0, 1, 2, 3, 4]),
+	], f"Negated list test failed! Encountered: {statements}"
+	statements = utils.build_chunked_statements(
+		"UPDATE `accounts` SET `banned` = %s", [1], {"id <>": [7, 8, 9], "gm": [0, 1, 2]}, chunk_size=2,
+	)
+	assert statements == [
+		("UPDATE `accounts` SET `banned` = %s WHERE `id` NOT IN (%s, %s, %s) AND `gm` IN (%s, %s)", [1, 7, 8, 9, 0, 1]),
+		("UPDATE `accounts` SET `banned` = %s WHERE `id` NOT IN (%s, %s, %s) AND `gm` IN (%s)", [1, 7, 8, 9, 2]),
+	], f"Mixed list test failed! Encountered: {statements}"
+
+
+def test_clamped_add_params():
+	def clamped_add(value, amount, lower, upper):  # Evaluates `utility.CLAMPED_ADD` as MySQL would
+		high, low, amount = utils.clamped_add_params(amount, lower, upper)
+		assert all(lower <= bound <= upper for bound in (high, low)), "Bounds would overflow!"
+		return max(min(value, high), low) + amount
+
+	assert clamped_add(9500000000, 1000000000, 0, 10000000000) == 10000000000
+	assert clamped_add(100, -1000, 0, 10000000000) == 0
+	assert clamped_add(100, 0, 0, 10000000000) == 100
+	lower, upper = utils.CHARACTER_STAT_LIMITS['exp']  # Spans the whole of BIGINT
+	assert clamped_add(upper - 5, 10, lower, upper) == upper
+	assert clamped_add(lower + 5, -10, lower, upper) == lower
+	assert clamped_add(0, 2 ** 70, 1, 275) == 275